@@ -0,0 +1,388 @@
+"""API JSON da biblioteca, servida pela BibliotecaView sob /api/.
+
+Expõe os mesmos dados das páginas HTML sem renderização, para quiosques e
+integrações:
+
+    GET  /api/livros?q=texto         busca por título e autor (limite);
+                                     o último termo vale como prefixo
+    GET  /api/livros/disponiveis     livros disponíveis, paginados (offset,
+                                     limite) ou filtrados por busca (q)
+    GET  /api/livros/<bookId>        disponibilidade de um livro
+    GET  /api/emprestimos            listagem paginada (status, user_id,
+                                     book_id, offset, limite)
+    GET  /api/emprestimos/<loanId>   um empréstimo
+    GET  /api/emprestimos/exportar   histórico completo em fluxo (formato =
+                                     csv, jsonl ou arrow; status, de, ate)
+    GET  /api/emprestimos/atrasados  atrasados em uma data (em; padrão:
+                                     agora), com dias de atraso e multa
+    GET  /api/emprestimos/vencimentos  próximos a vencer (k)
+    POST /api/multas                 aplica as multas agora (além da tarefa
+                                     periódica)
+    POST /api/emprestimos            {"userId", "bookId"} ou lista deles
+    POST /api/devolucoes             {"loanId"} ou lista deles
+    GET  /api/estatisticas           contadores do painel
+    GET  /api/relatorios             relatórios (k = tamanho dos rankings)
+
+Respostas GET levam como ETag a versão dos dados (`controller.get_versao`),
+respondem 304 a `If-None-Match` sem consultar o model e ficam guardadas por
+versão. Corpos grandes vão comprimidos conforme `Accept-Encoding`. Listas no corpo de um POST são processadas com as operações em lote
+do Controller.
+
+A exportação não passa pelo cache: o histórico é gerado lote a lote e
+enviado com Transfer-Encoding: chunked, sem ser montado na memória.
+Atrasados e vencimentos também não: dependem da hora, não só dos dados.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: serializador mais rápido
+    orjson = None
+
+import exportador
+from controler import controller
+from View_and_Interface.cache_paginas import CachePaginas
+from View_and_Interface import compressao
+from View_and_Interface.rotas import Roteador, ErroRota
+
+LIMITE_PADRAO = 50
+LIMITE_MAX = 1000
+LIMITE_BUSCA = 20
+
+# Corpos JSON das respostas GET 200, por URL, válidos na versão dos dados
+_respostas = CachePaginas()
+
+
+class ErroApi(Exception):
+    """Erro de requisição, convertido em resposta JSON com o status dado."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+def serializar(dados):
+    """Serializa para bytes JSON (orjson quando instalado)."""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _status_erro(erro):
+    """Status HTTP de um erro de negócio do model."""
+    if "não encontrado" in erro:
+        return 404
+    return 409
+
+
+def _int(valor, nome):
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ErroApi(400, f"{nome} deve ser um inteiro")
+    return valor
+
+
+def _param(query, nome, padrao=None):
+    valores = query.get(nome)
+    return valores[0] if valores else padrao
+
+
+def _ler_json(corpo):
+    try:
+        return json.loads(corpo or b"null")
+    except ValueError:
+        raise ErroApi(400, "JSON inválido")
+
+
+def _itens(dados, chave_lista):
+    """Normaliza o corpo: objeto único, lista, ou {chave_lista: [...]}."""
+    if isinstance(dados, dict) and chave_lista in dados:
+        dados = dados[chave_lista]
+    if isinstance(dados, list):
+        return dados, True
+    if isinstance(dados, dict):
+        return [dados], False
+    raise ErroApi(400, "Corpo deve ser um objeto ou uma lista")
+
+
+# ========== ROTAS ==========
+
+def get_livros(query):
+    consulta = _param(query, "q", "").strip()
+    if not consulta:
+        raise ErroApi(400, "Informe o texto da busca em q")
+    limite = min(max(1, _int(_param(query, "limite", LIMITE_BUSCA), "limite")), LIMITE_MAX)
+    return 200, {"livros": controller.buscar_livros(consulta, limite)}
+
+
+def get_livros_disponiveis(query):
+    consulta = (_param(query, "q") or "").strip() or None
+    offset = max(0, _int(_param(query, "offset", 0), "offset"))
+    limite = min(max(0, _int(_param(query, "limite", LIMITE_PADRAO), "limite")), LIMITE_MAX)
+    return 200, controller.listar_livros_por_status("disponivel", consulta=consulta, offset=offset, limite=limite)
+
+
+def get_livro(query, book_id):
+    resultado = controller.verificar_disponibilidade(book_id)
+    if "erro" in resultado:
+        raise ErroApi(404, resultado["erro"])
+    return 200, resultado
+
+
+def get_emprestimos(query):
+    filtros = {}
+    status = _param(query, "status")
+    if status is not None:
+        if status not in ("ACTIVE", "RETURNED"):
+            raise ErroApi(400, "status deve ser ACTIVE ou RETURNED")
+        filtros["status"] = status
+    for nome in ("user_id", "book_id"):
+        valor = _param(query, nome)
+        if valor is not None:
+            filtros[nome] = _int(valor, nome)
+    offset = max(0, _int(_param(query, "offset", 0), "offset"))
+    limite = min(max(0, _int(_param(query, "limite", LIMITE_PADRAO), "limite")), LIMITE_MAX)
+    return 200, controller.listar_emprestimos(offset=offset, limite=limite, **filtros)
+
+
+def get_emprestimo(query, loan_id):
+    emprestimo = controller.get_emprestimo_by_id(loan_id)
+    if emprestimo is None:
+        raise ErroApi(404, "Empréstimo não encontrado")
+    return 200, emprestimo
+
+
+def exportar_emprestimos(handler, query):
+    formato = _param(query, "formato", "csv")
+    if formato not in exportador.formatos_disponiveis():
+        raise ErroApi(400, f"formato deve ser {' ou '.join(exportador.formatos_disponiveis())}")
+    status = _param(query, "status")
+    if status is not None and status not in exportador.STATUS:
+        raise ErroApi(400, "status deve ser ACTIVE ou RETURNED")
+    try:
+        inicio, fim = exportador.intervalo(_param(query, "de"), _param(query, "ate"))
+    except ValueError as e:
+        raise ErroApi(400, str(e))
+    partes = exportador.exportar(controller.iterar_emprestimos(status, inicio, fim), formato)
+    tipo, extensao = exportador.FORMATOS[formato]
+    responder_fluxo(handler, partes, tipo, "emprestimos" + extensao)
+
+
+def _data(valor, nome):
+    try:
+        return exportador.ler_data(valor, nome)
+    except ValueError as e:
+        raise ErroApi(400, str(e))
+
+
+def get_atrasados(query):
+    em = _param(query, "em")
+    agora = _data(em, "em") if em else None
+    offset = max(0, _int(_param(query, "offset", 0), "offset"))
+    limite = min(max(0, _int(_param(query, "limite", LIMITE_PADRAO), "limite")), LIMITE_MAX)
+    return 200, controller.listar_atrasados(agora, offset=offset, limite=limite)
+
+
+def get_vencimentos(query):
+    k = min(max(1, _int(_param(query, "k", 10), "k")), LIMITE_MAX)
+    return 200, {"emprestimos": controller.proximos_vencimentos(k)}
+
+
+def post_multas(corpo):
+    return 200, controller.aplicar_multas()
+
+
+def post_emprestimos(corpo):
+    itens, lote = _itens(_ler_json(corpo), "emprestimos")
+    pares = []
+    for item in itens:
+        if not isinstance(item, dict):
+            raise ErroApi(400, "Cada empréstimo deve ser um objeto")
+        pares.append((_int(item.get("userId"), "userId"), _int(item.get("bookId"), "bookId")))
+    if lote:
+        return 200, {"resultados": controller.registrar_emprestimos(pares)}
+    resultado = controller.registrar_emprestimo(*pares[0])
+    if not resultado["sucesso"]:
+        return _status_erro(resultado["erro"]), resultado
+    return 201, resultado
+
+
+def post_devolucoes(corpo):
+    itens, lote = _itens(_ler_json(corpo), "loanIds")
+    loan_ids = [_int(item.get("loanId") if isinstance(item, dict) else item, "loanId") for item in itens]
+    if lote:
+        return 200, {"resultados": controller.registrar_devolucoes(loan_ids)}
+    resultado = controller.registrar_devolucao(loan_ids[0])
+    if not resultado["sucesso"]:
+        return _status_erro(resultado["erro"]), resultado
+    return 200, resultado
+
+
+def get_estatisticas(query):
+    return 200, controller.get_estatisticas()
+
+
+def get_relatorios(query):
+    k = min(max(1, _int(_param(query, "k", 5), "k")), 10)
+    return 200, controller.get_relatorios(k)
+
+
+_rotas = Roteador()
+_rotas.adicionar("/api/livros", get_livros)
+_rotas.adicionar("/api/livros/disponiveis", get_livros_disponiveis)
+_rotas.adicionar("/api/livros/<int:book_id>", get_livro)
+_rotas.adicionar("/api/emprestimos", get_emprestimos)
+_rotas.adicionar("/api/emprestimos/<int:loan_id>", get_emprestimo)
+_rotas.adicionar("/api/emprestimos/exportar", exportar_emprestimos, fluxo=True)
+_rotas.adicionar("/api/emprestimos/atrasados", get_atrasados, cache=False)
+_rotas.adicionar("/api/emprestimos/vencimentos", get_vencimentos, cache=False)
+_rotas.adicionar("/api/multas", post_multas, metodos=("POST",))
+_rotas.adicionar("/api/emprestimos", post_emprestimos, metodos=("POST",))
+_rotas.adicionar("/api/devolucoes", post_devolucoes, metodos=("POST",))
+_rotas.adicionar("/api/estatisticas", get_estatisticas)
+_rotas.adicionar("/api/relatorios", get_relatorios)
+
+
+def etag_confere(handler, etag):
+    """True se o `If-None-Match` da requisição inclui `etag` (ou é "*")."""
+    cabecalho = handler.headers.get("If-None-Match")
+    if not cabecalho:
+        return False
+    valores = [valor.strip() for valor in cabecalho.split(",")]
+    return "*" in valores or etag in valores or ("W/" + etag) in valores
+
+
+def _codificar(handler, corpo):
+    """Comprime `corpo` se o cliente aceitar e o tamanho justificar."""
+    aceita = compressao.escolher_codificacao(handler.headers.get("Accept-Encoding"))
+    if aceita and len(corpo) >= compressao.TAMANHO_MINIMO:
+        return compressao.comprimir(corpo, aceita), aceita
+    return corpo, None
+
+
+def responder(handler, status, dados, etag=None, codificacao=None, permitidos=()):
+    """
+    Envia `dados` como JSON: um objeto (serializado e comprimido aqui) ou
+    bytes já prontos na `codificacao` informada. `permitidos` vira o
+    cabeçalho Allow (405).
+    """
+    if isinstance(dados, bytes):
+        corpo = dados
+    else:
+        corpo, codificacao = _codificar(handler, serializar(dados))
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json; charset=utf-8")
+    handler.send_header("Content-Length", str(len(corpo)))
+    handler.send_header("Vary", "Accept-Encoding")
+    if codificacao:
+        handler.send_header("Content-Encoding", codificacao)
+    if etag:
+        handler.send_header("ETag", etag)
+        handler.send_header("Cache-Control", "no-cache")
+    if permitidos:
+        handler.send_header("Allow", ", ".join(permitidos))
+    handler.end_headers()
+    handler.wfile.write(corpo)
+
+
+def responder_fluxo(handler, partes, tipo, nome_arquivo):
+    """
+    Envia as `partes` (bytes) à medida que são geradas, comprimidas se o
+    cliente aceitar. Em HTTP/1.1 usa Transfer-Encoding: chunked; em HTTP/1.0
+    o fim do corpo é o fechamento da conexão.
+    """
+    chunked = handler.request_version == "HTTP/1.1" and handler.protocol_version == "HTTP/1.1"
+    aceita = compressao.escolher_codificacao(handler.headers.get("Accept-Encoding"))
+    fluxo = compressao.criar_fluxo(aceita) if aceita else None
+    handler.send_response(200)
+    handler.send_header("Content-Type", tipo)
+    handler.send_header("Content-Disposition", f'attachment; filename="{nome_arquivo}"')
+    handler.send_header("Vary", "Accept-Encoding")
+    if aceita:
+        handler.send_header("Content-Encoding", aceita)
+    if chunked:
+        handler.send_header("Transfer-Encoding", "chunked")
+    else:
+        handler.close_connection = True
+    handler.end_headers()
+
+    def escrever(dados):
+        if not dados:
+            return
+        if chunked:
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+        else:
+            handler.wfile.write(dados)
+
+    if fluxo is not None:
+        escrever(fluxo.inicio())
+    for parte in partes:
+        escrever(fluxo.comprimir(parte) if fluxo is not None else parte)
+    if fluxo is not None:
+        escrever(fluxo.fim())
+    if chunked:
+        handler.wfile.write(b"0\r\n\r\n")
+
+
+def _responder_versionado(handler, funcao, query, parametros):
+    """Atende um GET: 304, corpo do cache da versão atual, ou executa a rota."""
+    versao = controller.get_versao()
+    aceita = compressao.escolher_codificacao(handler.headers.get("Accept-Encoding"))
+    etag = f'"{versao}-{aceita}"' if aceita else f'"{versao}"'
+    if etag_confere(handler, etag):
+        handler.send_response(304)
+        handler.send_header("ETag", etag)
+        handler.send_header("Vary", "Accept-Encoding")
+        handler.send_header("Content-Length", "0")
+        handler.end_headers()
+        return
+    guardada = _respostas.get((handler.path, aceita), versao)
+    if guardada is None:
+        status, dados = funcao(query, **parametros)
+        if status != 200:
+            responder(handler, status, dados)
+            return
+        guardada = _codificar(handler, serializar(dados))
+        _respostas.guardar((handler.path, aceita), versao, guardada)
+    corpo, codificacao = guardada
+    responder(handler, 200, corpo, etag, codificacao)
+
+
+def _anotar_rota(handler, rota):
+    """Métricas e log por rota da API, não pelo prefixo /api/."""
+    if handler.requisicao is not None:
+        handler.requisicao.rota = rota
+
+
+def tratar(handler, caminho, query, corpo=b""):
+    """
+    Atende uma requisição sob /api/ (método em `handler.command`).
+
+    Args:
+        handler: a BibliotecaView da requisição
+        caminho: path sem query string
+        query: dict de parse_qs
+        corpo: bytes do corpo (POST)
+    """
+    try:
+        rota, parametros = _rotas.resolver(handler.command, caminho)
+    except ErroRota as e:
+        _anotar_rota(handler, e.rota)
+        responder(handler, e.status, {"erro": e.mensagem}, permitidos=e.permitidos)
+        return
+    _anotar_rota(handler, rota)
+    try:
+        if rota.opcoes.get("fluxo"):
+            rota.funcao(handler, query, **parametros)
+            return
+        if handler.command == "GET" and rota.opcoes.get("cache", True):
+            _responder_versionado(handler, rota.funcao, query, parametros)
+            return
+        status, dados = rota.funcao(query if handler.command == "GET" else corpo, **parametros)
+    except ErroApi as e:
+        status, dados = e.status, {"erro": e.mensagem}
+    responder(handler, status, dados)
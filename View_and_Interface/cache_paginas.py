@@ -0,0 +1,72 @@
+"""Cache das respostas já renderizadas pela View.
+
+As páginas de empréstimos e relatórios (e as respostas GET da API) dependem
+apenas da URL e dos dados. O Controller expõe uma versão dos dados que muda a
+cada alteração; enquanto ela não muda, a mesma URL produz os mesmos bytes,
+que são guardados aqui e reenviados sem consultar o model nem renderizar.
+
+O cache guarda apenas a versão mais recente: ao chegar uma versão nova, as
+páginas da anterior são descartadas de uma vez. Uma resposta renderizada a
+partir de uma versão mais antiga (requisição lenta) não é guardada.
+"""
+
+import threading
+
+MAX_PAGINAS_PADRAO = 256
+
+
+def _mais_nova(versao, atual):
+    """
+    Se `versao` é posterior a `atual`. As versões do repositório têm o formato
+    "instância.contador[.contador...]" e os contadores só crescem: é posterior
+    a que tem todos os contadores maiores ou iguais (e não é a mesma). Outra
+    instância (repositório recriado) conta como posterior.
+    """
+    if atual is None:
+        return True
+    instancia, _, contadores = versao.partition(".")
+    instancia_atual, _, contadores_atuais = atual.partition(".")
+    if instancia != instancia_atual:
+        return True
+    novos = [int(c) for c in contadores.split(".")]
+    antigos = [int(c) for c in contadores_atuais.split(".")]
+    return novos != antigos and all(n >= a for n, a in zip(novos, antigos))
+
+
+class CachePaginas:
+    """
+    Respostas por chave (URL e codificação), válidas enquanto a versão dos
+    dados não muda.
+    """
+
+    def __init__(self, max_paginas=MAX_PAGINAS_PADRAO):
+        self.max_paginas = max_paginas
+        self._versao = None
+        self._paginas = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave, versao):
+        """Retorna a resposta guardada para `chave` na `versao`, ou None."""
+        with self._lock:
+            if versao != self._versao:
+                return None
+            return self._paginas.get(chave)
+
+    def guardar(self, chave, versao, resposta):
+        """Guarda a `resposta` renderizada a partir da `versao` dos dados."""
+        with self._lock:
+            if versao != self._versao:
+                if not _mais_nova(versao, self._versao):
+                    return
+                self._versao = versao
+                self._paginas = {}
+            if chave not in self._paginas and len(self._paginas) >= self.max_paginas:
+                # Descarta a página mais antiga (dicts preservam a ordem)
+                del self._paginas[next(iter(self._paginas))]
+            self._paginas[chave] = resposta
+
+    def limpar(self):
+        """Descarta todas as páginas."""
+        with self._lock:
+            self._versao = None
+            self._paginas = {}
@@ -0,0 +1,171 @@
+"""Compressão das respostas HTTP (gzip e, se instalado, brotli).
+
+A codificação é escolhida a partir do cabeçalho `Accept-Encoding` da
+requisição. Corpos menores que `TAMANHO_MINIMO` vão sem compressão: o ganho
+não paga o custo de CPU nem os bytes do cabeçalho gzip.
+
+O gzip é montado como uma sequência de segmentos DEFLATE independentes,
+cada um terminado com Z_SYNC_FLUSH (alinhado em byte e sem bloco final),
+entre o cabeçalho e o trailer (CRC32 + tamanho) do formato. Isso permite
+comprimir as partes fixas dos templates uma única vez, na carga
+(`SegmentoGzip`), e a cada página comprimir apenas o conteúdo.
+"""
+
+import struct
+import zlib
+
+try:
+    import brotli
+except ImportError:  # dependência opcional: sem ela, apenas gzip
+    brotli = None
+
+TAMANHO_MINIMO = 1024
+NIVEL_GZIP = 6
+QUALIDADE_BROTLI = 5
+
+# ID1 ID2 CM=deflate FLG=0 MTIME=0 XFL=0 OS=desconhecido
+_CABECALHO_GZIP = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# Bloco DEFLATE final vazio (fixo), para fechar um corpo sem segmento final
+_BLOCO_FINAL_VAZIO = b"\x03\x00"
+
+
+def codificacoes_suportadas():
+    """Codificações disponíveis, em ordem de preferência."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def escolher_codificacao(accept_encoding):
+    """
+    Escolhe a codificação da resposta a partir de `Accept-Encoding`.
+
+    Respeita os pesos `q` (q=0 recusa) e o curinga `*`; em caso de empate
+    prefere brotli.
+
+    Returns:
+        "br", "gzip" ou None (sem compressão)
+    """
+    if not accept_encoding:
+        return None
+    pesos = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.partition(";")
+        nome = nome.strip().lower()
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        if nome:
+            pesos[nome] = peso
+    melhor, melhor_peso = None, 0.0
+    for codificacao in codificacoes_suportadas():
+        peso = pesos.get(codificacao, pesos.get("*", 0.0))
+        if peso > melhor_peso:
+            melhor, melhor_peso = codificacao, peso
+    return melhor
+
+
+class SegmentoGzip:
+    """Trecho pré-comprimido de um corpo gzip, com CRC32 e tamanho originais."""
+
+    __slots__ = ("original", "dados", "crc", "final")
+
+    def __init__(self, original, final=False):
+        compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.original = original
+        self.dados = compressor.compress(original) + compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+        self.crc = zlib.crc32(original)
+        self.final = final
+
+
+class FluxoGzip:
+    """Produz um corpo gzip em partes, misturando segmentos pré-comprimidos."""
+
+    def __init__(self):
+        self._compressor = None
+        self._crc = 0
+        self._tamanho = 0
+        self._finalizado = False
+
+    def inicio(self):
+        return _CABECALHO_GZIP
+
+    def segmento(self, segmento):
+        """Acrescenta um SegmentoGzip já comprimido."""
+        # Um compressor novo depois do segmento: as referências de um
+        # compressor não podem atravessar bytes que ele não produziu.
+        self._compressor = None
+        self._crc = segmento.crc if not self._tamanho else zlib.crc32(segmento.original, self._crc)
+        self._tamanho += len(segmento.original)
+        self._finalizado = segmento.final
+        return segmento.dados
+
+    def comprimir(self, dados):
+        """Comprime `dados` e devolve os bytes já enviáveis (sync flush)."""
+        if not dados:
+            return b""
+        if self._compressor is None:
+            self._compressor = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._crc = zlib.crc32(dados, self._crc)
+        self._tamanho += len(dados)
+        return self._compressor.compress(dados) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def fim(self, segmento=None):
+        """Fecha o corpo (opcionalmente com um segmento final) e grava o trailer."""
+        saida = b""
+        if segmento is not None:
+            saida = self.segmento(segmento)
+        if not self._finalizado:
+            saida += self._compressor.flush(zlib.Z_FINISH) if self._compressor else _BLOCO_FINAL_VAZIO
+        return saida + struct.pack("<II", self._crc & 0xFFFFFFFF, self._tamanho & 0xFFFFFFFF)
+
+
+class FluxoBrotli:
+    """Mesma interface de FluxoGzip; segmentos são comprimidos a cada uso."""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=QUALIDADE_BROTLI)
+
+    def inicio(self):
+        return b""
+
+    def segmento(self, segmento):
+        return self.comprimir(segmento.original)
+
+    def comprimir(self, dados):
+        if not dados:
+            return b""
+        return self._compressor.process(dados) + self._compressor.flush()
+
+    def fim(self, segmento=None):
+        saida = self.segmento(segmento) if segmento is not None else b""
+        return saida + self._compressor.finish()
+
+
+def criar_fluxo(codificacao):
+    """Retorna o fluxo de compressão da codificação ("gzip" ou "br")."""
+    if codificacao == "gzip":
+        return FluxoGzip()
+    if codificacao == "br" and brotli is not None:
+        return FluxoBrotli()
+    raise ValueError(f"Codificação não suportada: {codificacao}")
+
+
+def comprimir(dados, codificacao):
+    """Comprime um corpo inteiro."""
+    fluxo = criar_fluxo(codificacao)
+    return fluxo.inicio() + fluxo.comprimir(dados) + fluxo.fim()
+
+
+def comprimir_pagina(template, conteudo, codificacao):
+    """
+    Comprime `template.inicio + conteudo + template.fim` reaproveitando os
+    segmentos pré-comprimidos do template.
+    """
+    fluxo = criar_fluxo(codificacao)
+    return (fluxo.inicio() + fluxo.segmento(template.gzip_inicio)
+            + fluxo.comprimir(conteudo) + fluxo.fim(template.gzip_fim))
@@ -0,0 +1,224 @@
+"""Roteador de requisições da View e da API.
+
+As rotas são registradas uma vez, na importação, e compiladas:
+
+- caminhos fixos (`/emprestimos/novo`) ficam num dict {caminho: {método: rota}}
+  e são encontrados com um único acesso;
+- caminhos com parâmetros (`/emprestimos/devolver/<int:loan_id>`) viram uma
+  expressão regular pré-compilada, agrupadas pelo primeiro segmento do
+  caminho, de modo que só as poucas rotas do mesmo grupo são testadas.
+
+O custo de despachar não cresce com o número de rotas cadastradas.
+
+Os parâmetros têm tipo (`int`, `str` ou `caminho`, que aceita "/"). Um valor
+que casa com a rota mas não converte para o tipo (`/emprestimos/devolver/abc`)
+resulta em 400, não em 404 nem em exceção no handler. Cada rota declara os
+métodos aceitos (405 para os demais) e pode levar opções livres, consultadas
+pelos middlewares.
+
+Middlewares envolvem todas as rotas do roteador:
+
+    def middleware(handler, requisicao, proximo):
+        ...            # antes
+        proximo()      # executa a rota (ou o próximo middleware)
+        ...            # depois
+"""
+
+import re
+from urllib.parse import parse_qs
+
+# tipo -> (expressão do segmento, conversor)
+CONVERSORES = {
+    "int": (r"[^/]+", int),
+    "str": (r"[^/]+", str),
+    "caminho": (r".+", str),
+}
+
+_PARAMETRO = re.compile(r"<(?:(\w+):)?(\w+)>")
+
+
+class ErroRota(Exception):
+    """
+    Requisição sem rota: 404, 405 (com os métodos aceitos) ou 400 (com a
+    rota cujo parâmetro não converteu).
+    """
+
+    def __init__(self, status, mensagem, permitidos=(), rota=None):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+        self.permitidos = tuple(permitidos)
+        self.rota = rota
+
+
+class Rota:
+    """Uma rota registrada: padrão, função, métodos e opções."""
+
+    __slots__ = ("padrao", "funcao", "metodos", "opcoes", "regex", "conversores")
+
+    def __init__(self, padrao, funcao, metodos, opcoes):
+        self.padrao = padrao
+        self.funcao = funcao
+        self.metodos = frozenset(metodos)
+        self.opcoes = opcoes
+        self.regex = None
+        self.conversores = {}
+        if _PARAMETRO.search(padrao):
+            self._compilar()
+
+    def _compilar(self):
+        partes = []
+        posicao = 0
+        for encontrado in _PARAMETRO.finditer(self.padrao):
+            tipo = encontrado.group(1) or "str"
+            if tipo not in CONVERSORES:
+                raise ValueError(f"Tipo de parâmetro desconhecido: {tipo}")
+            expressao, conversor = CONVERSORES[tipo]
+            nome = encontrado.group(2)
+            partes.append(re.escape(self.padrao[posicao:encontrado.start()]))
+            partes.append(f"(?P<{nome}>{expressao})")
+            self.conversores[nome] = (tipo, conversor)
+            posicao = encontrado.end()
+        partes.append(re.escape(self.padrao[posicao:]))
+        self.regex = re.compile("".join(partes) + r"\Z")
+
+    def converter(self, valores):
+        """
+        Converte os parâmetros capturados para seus tipos.
+
+        Raises:
+            ErroRota: 400 se algum valor não for do tipo declarado
+        """
+        parametros = {}
+        for nome, valor in valores.items():
+            tipo, conversor = self.conversores[nome]
+            try:
+                parametros[nome] = conversor(valor)
+            except ValueError:
+                raise ErroRota(400, f"{nome} deve ser do tipo {tipo}", rota=self)
+        return parametros
+
+
+def _grupo(caminho):
+    """Primeiro segmento do caminho ("/emprestimos/1" -> "emprestimos")."""
+    return caminho[1:].split("/", 1)[0]
+
+
+class Roteador:
+    """Tabela de rotas com despacho em tempo constante e middlewares."""
+
+    def __init__(self):
+        self._fixas = {}       # caminho -> {método: Rota}
+        self._dinamicas = {}   # primeiro segmento -> [Rota]
+        self._middlewares = []
+
+    def adicionar(self, padrao, funcao, metodos=("GET",), **opcoes):
+        """
+        Registra `funcao` para `padrao` nos `metodos` informados.
+
+        `funcao` é chamada como `funcao(handler, **parametros)`; se for uma
+        string, é o nome do método do handler a chamar (procurado a cada
+        requisição, de modo que métodos trocados na classe valem na hora).
+        """
+        rota = Rota(padrao, funcao, metodos, opcoes)
+        if rota.regex is None:
+            por_metodo = self._fixas.setdefault(padrao, {})
+            for metodo in rota.metodos:
+                por_metodo[metodo] = rota
+        else:
+            self._dinamicas.setdefault(_grupo(padrao), []).append(rota)
+        return rota
+
+    def rota(self, padrao, metodos=("GET",), **opcoes):
+        """Versão decorador de `adicionar`."""
+        def registrar(funcao):
+            self.adicionar(padrao, funcao, metodos, **opcoes)
+            return funcao
+        return registrar
+
+    def usar(self, middleware):
+        """Acrescenta um middleware (executado na ordem de registro)."""
+        self._middlewares.append(middleware)
+        return middleware
+
+    def resolver(self, metodo, caminho):
+        """
+        Encontra a rota de `metodo` + `caminho`.
+
+        Returns:
+            (Rota, dict de parâmetros já convertidos)
+
+        Raises:
+            ErroRota: 404, 405 ou 400
+        """
+        por_metodo = self._fixas.get(caminho)
+        if por_metodo is not None:
+            rota = por_metodo.get(metodo)
+            if rota is None:
+                raise ErroRota(405, "Método não permitido", sorted(por_metodo))
+            return rota, {}
+
+        permitidos = set()
+        erro_parametro = None
+        for rota in self._dinamicas.get(_grupo(caminho), ()):
+            encontrado = rota.regex.match(caminho)
+            if encontrado is None:
+                continue
+            if metodo not in rota.metodos:
+                permitidos.update(rota.metodos)
+                continue
+            try:
+                return rota, rota.converter(encontrado.groupdict())
+            except ErroRota as erro:
+                erro_parametro = erro_parametro or erro
+        if erro_parametro is not None:
+            raise erro_parametro
+        if permitidos:
+            raise ErroRota(405, "Método não permitido", sorted(permitidos))
+        raise ErroRota(404, "Rota não encontrada")
+
+    def despachar(self, handler, requisicao):
+        """
+        Resolve `requisicao` (usa `metodo` e `caminho`; preenche `rota` e
+        `parametros`) e executa `rota.funcao(handler, **parametros)` através
+        dos middlewares (`getattr(handler, rota.funcao)(**parametros)` se a
+        função for um nome).
+
+        Raises:
+            ErroRota: se não houver rota
+        """
+        rota, parametros = self.resolver(requisicao.metodo, requisicao.caminho)
+        requisicao.rota = rota
+        requisicao.parametros = parametros
+
+        def etapa(indice):
+            if indice == len(self._middlewares):
+                if isinstance(rota.funcao, str):
+                    return getattr(handler, rota.funcao)(**parametros)
+                return rota.funcao(handler, **parametros)
+            return self._middlewares[indice](handler, requisicao, lambda: etapa(indice + 1))
+
+        return etapa(0)
+
+
+class Requisicao:
+    """Dados de uma requisição já interpretados para as rotas."""
+
+    __slots__ = ("metodo", "caminho", "query", "corpo", "rota", "parametros", "_formulario")
+
+    def __init__(self, metodo, caminho, query=None, corpo=b""):
+        self.metodo = metodo
+        self.caminho = caminho
+        self.query = query or {}
+        self.corpo = corpo
+        self.rota = None
+        self.parametros = {}
+        self._formulario = None
+
+    @property
+    def formulario(self):
+        """Corpo x-www-form-urlencoded como dict ({campo: valor ou lista})."""
+        if self._formulario is None:
+            campos = parse_qs(self.corpo.decode("utf-8"))
+            self._formulario = {k: v[0] if len(v) == 1 else v for k, v in campos.items()}
+        return self._formulario
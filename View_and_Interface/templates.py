@@ -0,0 +1,84 @@
+"""Cache dos templates HTML usados pela View.
+
+Cada template é lido uma única vez e já fica dividido em duas partes ao redor
+do marcador `<!--CONTEUDO-->`. Renderizar uma página passa a ser apenas
+`inicio + conteudo + fim`, sem acesso ao disco e sem `str.replace` sobre o
+documento inteiro.
+
+Na carga também são guardadas as duas partes já codificadas em UTF-8 e
+comprimidas em gzip (veja `compressao.SegmentoGzip`), de modo que respostas
+comprimidas só precisam comprimir o conteúdo de cada página.
+
+Em desenvolvimento, `recarregar=True` faz o cache conferir o mtime do arquivo
+a cada uso e reler o template quando ele for editado.
+"""
+
+import os
+import threading
+
+from View_and_Interface.compressao import SegmentoGzip
+
+MARCADOR = "<!--CONTEUDO-->"
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+class Template:
+    """Template pré-dividido ao redor do marcador de conteúdo."""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.mtime = os.stat(caminho).st_mtime
+        with open(caminho, "r", encoding="utf-8") as f:
+            html = f.read()
+        self.inicio, encontrado, self.fim = html.partition(MARCADOR)
+        if not encontrado:
+            # Sem marcador o conteúdo é anexado ao fim, como antes o replace
+            # simplesmente não teria efeito no documento.
+            self.inicio, self.fim = html, ""
+        self.inicio_bytes = self.inicio.encode("utf-8")
+        self.fim_bytes = self.fim.encode("utf-8")
+        self.gzip_inicio = SegmentoGzip(self.inicio_bytes)
+        self.gzip_fim = SegmentoGzip(self.fim_bytes, final=True)
+
+    def render(self, conteudo):
+        """Retorna o documento completo com `conteudo` no lugar do marcador."""
+        return self.inicio + conteudo + self.fim
+
+
+class CacheTemplates:
+    """Guarda os templates de um diretório já carregados em memória."""
+
+    def __init__(self, diretorio=DIRETORIO, recarregar=False):
+        self.diretorio = diretorio
+        self.recarregar = recarregar
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def carregar_todos(self):
+        """Carrega todos os arquivos .html do diretório (uso na inicialização)."""
+        for nome in sorted(os.listdir(self.diretorio)):
+            if nome.endswith(".html"):
+                self.get(nome)
+
+    def get(self, nome):
+        """
+        Retorna o Template `nome`, lendo do disco apenas na primeira vez
+        (ou quando o arquivo mudou, se `recarregar` estiver ativo).
+
+        Raises:
+            FileNotFoundError: se o template não existir
+        """
+        template = self._templates.get(nome)
+        if template is not None and not self.recarregar:
+            return template
+        caminho = os.path.join(self.diretorio, nome)
+        if template is not None and os.stat(caminho).st_mtime == template.mtime:
+            return template
+        with self._lock:
+            template = Template(caminho)
+            self._templates[nome] = template
+        return template
+
+    def render(self, nome, conteudo):
+        """Atalho para `get(nome).render(conteudo)`."""
+        return self.get(nome).render(conteudo)
@@ -1,14 +1,23 @@
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from urllib.parse import parse_qs, urlparse
+from urllib.parse import parse_qs, urlencode, urlparse
 from html import escape
 import sys
 import os
+import time
 
 # Adiciona o diretório pai ao path para importar controler e mocks
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import servidor
+import metricas
+import perfil
+from View_and_Interface.templates import CacheTemplates
+from View_and_Interface.cache_paginas import CachePaginas
+from View_and_Interface import compressao
+from View_and_Interface.rotas import Roteador, Requisicao, ErroRota
+
 try:
     from controler import controller
+    from View_and_Interface import api
     import mock_catalogo
     import mock_usuarios
     CONTROLLER_AVAILABLE = True
@@ -16,111 +25,214 @@ except ImportError:
     CONTROLLER_AVAILABLE = False
 
 
+# Templates carregados uma vez na inicialização. Defina
+# BIBLIOTECA_RECARREGAR_TEMPLATES=1 para reler arquivos editados (desenvolvimento).
+_templates = CacheTemplates(recarregar=os.environ.get("BIBLIOTECA_RECARREGAR_TEMPLATES") == "1")
+_templates.carregar_todos()
+
+# Corpos das paginas versionadas (rotas com versionada=True), por versao
+_paginas = CachePaginas()
+
+
 def _esc(v):
     """Escapa valores HTML para evitar XSS"""
     return escape("" if v is None else str(v))
 
 
-class BibliotecaView(BaseHTTPRequestHandler):
+# Paginacao da listagem de emprestimos
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAX = 200
+# Quantas linhas da tabela sao montadas e enviadas de cada vez
+LINHAS_POR_PARTE = 100
+# Livros disponiveis listados por pagina no formulario de emprestimo
+LIVROS_POR_PAGINA = 50
+
+
+def _primeiro(query, chave):
+    """Retorna o primeiro valor de `chave` numa query de parse_qs (ou None)"""
+    valores = (query or {}).get(chave)
+    return valores[0] if valores else None
+
+
+def _int_positivo(valor, padrao):
+    """Converte para int >= 1, usando `padrao` se invalido"""
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        return padrao
+    return numero if numero >= 1 else padrao
+
+
+def _filtros_emprestimos(query):
+    """Extrai os filtros validos (status, user_id, book_id) da query string"""
+    filtros = {}
+    status = _primeiro(query, 'status')
+    if status in ("ACTIVE", "RETURNED"):
+        filtros['status'] = status
+    for chave in ('user_id', 'book_id'):
+        valor = _int_positivo(_primeiro(query, chave), None)
+        if valor is not None:
+            filtros[chave] = valor
+    return filtros
+
+
+def _linha_emprestimo(emp):
+    """Monta a linha <tr> de um emprestimo"""
+    status_badge = "🟢 ATIVO" if emp['status'] == "ACTIVE" else "🔵 DEVOLVIDO"
+    checkbox = ""
+    botao_devolver = ""
+    if emp['status'] == "ACTIVE":
+        # Checkbox para seleção em devolução em lote
+        checkbox = f'<input type="checkbox" name="loan_id" value="{emp["loanId"]}" />'
+        botao_devolver = f'<a href="/emprestimos/devolver/{emp["loanId"]}" class="btn btn-danger">Devolver</a>'
+    return f"""
+                        <tr>
+                            <td style="width:48px; text-align: center;">{checkbox}</td>
+                            <td>{emp['loanId']}</td>
+                            <td>{emp['userId']}</td>
+                            <td>{emp['bookId']}</td>
+                            <td>{emp['loanDate'][:10]}</td>
+                            <td>{emp['dueDate'][:10]}</td>
+                            <td>{status_badge}</td>
+                            <td style="text-align: center;">{botao_devolver}</td>
+                        </tr>
+                        """
+
+
+def _paginacao(filtros, pagina, por_pagina, total, caminho='/emprestimos', itens='empréstimos'):
+    """Monta os links de pagina anterior/proxima preservando os filtros"""
+    total_paginas = max(1, -(-total // por_pagina))
+
+    def link(numero, rotulo):
+        params = dict(filtros, pagina=numero, por_pagina=por_pagina)
+        return f'<a href="{caminho}?{urlencode(params)}" class="btn btn-secondary">{rotulo}</a>'
+
+    partes = []
+    if pagina > 1:
+        partes.append(link(pagina - 1, "&laquo; Anterior"))
+    partes.append(f'<span>Pagina {pagina} de {total_paginas} ({total} {itens})</span>')
+    if pagina < total_paginas:
+        partes.append(link(pagina + 1, "Proxima &raquo;"))
+    return f'<div class="paginacao" style="padding:12px; display:flex; justify-content:center; gap:12px; align-items:center;">{"".join(partes)}</div>'
+
+
+class BibliotecaView(servidor.ManipuladorPersistente):
     """
     Servidor HTTP que controla todas as telas do SGBU via Python.
     Os alunos devem implementar as classes em Model/ e integrar via controler.py
     """
 
+    # ETag e versao dos dados da pagina em renderizacao (paginas versionadas)
+    _etag = None
+    _versao_cache = None
+    # Requisicao em atendimento e status enviado (metricas e log)
+    requisicao = None
+    _status = None
+
+    def handle_one_request(self):
+        """Atende uma requisicao medindo sua duracao (metricas e log de acesso)"""
+        inicio = time.perf_counter()
+        self.requisicao = self._status = None
+        try:
+            super().handle_one_request()
+        except BaseException:
+            if self.requestline and self._status is None:
+                self._status = 500
+            raise
+        finally:
+            # Sem status: a conexao terminou sem requisicao
+            if self._status is not None:
+                self._registrar_acesso(time.perf_counter() - inicio)
+
+    def _nome_rota(self):
+        rota = self.requisicao.rota if self.requisicao is not None else None
+        return rota.padrao if rota is not None else "<sem rota>"
+
+    def _registrar_acesso(self, duracao):
+        metricas.registro.observar_requisicao(self._nome_rota(), self.command or "-", self._status, duracao)
+        self.log_message('"%s" %s %.2fms', self.requestline, self._status, duracao * 1000)
+
+    def send_response(self, code, message=None):
+        if code >= 200:
+            self._status = code
+        super().send_response(code, message)
+
+    def log_request(self, code='-', size='-'):
+        # A linha de acesso e registrada ao fim da requisicao, com a duracao
+        pass
+
     def do_GET(self):
         """Trata requisicoes GET - exibe paginas"""
-        parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        # Redireciona raiz para cadastro
-        if path == '/':
-            self.send_response(302)
-            self.send_header("Location", "/cadastro")
-            self.end_headers()
-        
-        # Modulo 1: Cadastro de Usuarios
-        elif path == '/cadastro':
-            self.render_cadastro()
-        elif path == '/cadastro/novo':
-            self.render_form_usuario()
-        
-        # Modulo 2: Catalogo de Livros
-        elif path == '/livros':
-            self.render_livros()
-        elif path == '/livros/novo':
-            self.render_form_livro()
-        elif path == '/autores':
-            self.render_autores()
-        
-        # Modulo 3: Emprestimos
-        elif path == '/emprestimos':
-            self.render_emprestimos()
-        elif path == '/emprestimos/novo':
-            self.render_form_emprestimo()
-        elif path.startswith('/emprestimos/devolver/'):
-            loan_id = int(path.split('/')[-1])
-            self.processar_devolucao(loan_id)
-        
-        # Modulo 4: Relatorios
-        elif path == '/relatorios':
-            self.render_relatorios()
-        
-        else:
-            self.send_error(404, "Pagina nao encontrada")
+        self.despachar()
 
     def do_POST(self):
         """Trata requisicoes POST - processa formularios"""
+        # Lido antes de rotear: mesmo um 404/405 deixa a conexao pronta
+        # para a proxima requisicao
+        corpo = self.ler_corpo()
+        if corpo is not None:
+            self.despachar(corpo)
+
+    def despachar(self, corpo=b""):
+        """Encontra a rota da requisicao em `roteador` e a executa"""
         parsed_path = urlparse(self.path)
-        path = parsed_path.path
-        
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length).decode('utf-8')
-        params = parse_qs(body)
-        
-        # Converte para dict simples
-        data = {k: v[0] if len(v) == 1 else v for k, v in params.items()}
-        
-        if path == '/cadastro/salvar':
-            self.processar_usuario(data)
-        elif path == '/livros/salvar':
-            self.processar_livro(data)
-        elif path == '/emprestimos/salvar':
-            self.processar_emprestimo(data)
-        elif path == '/emprestimos/devolver':
-            # Espera loan_id como campo (pode vir múltiplos: loan_id=1&loan_id=2)
-            loan_ids = []
-            if 'loan_id' in data:
-                # parse_qs já normalizou para strings simples no início
-                # Se houver vírgula, aceita também formatos como "1,2"
-                raw = data.get('loan_id')
-                if isinstance(raw, list):
-                    for v in raw:
-                        for part in str(v).split(','):
-                            part = part.strip()
-                            if part:
-                                try:
-                                    loan_ids.append(int(part))
-                                except ValueError:
-                                    pass
-                else:
-                    for part in str(raw).split(','):
-                        part = part.strip()
-                        if part:
-                            try:
-                                loan_ids.append(int(part))
-                            except ValueError:
-                                pass
-            self.processar_devolucoes(loan_ids)
+        self.requisicao = Requisicao(self.command, parsed_path.path, parse_qs(parsed_path.query), corpo)
+        # O handler atende varias requisicoes na mesma conexao
+        self._etag = self._versao_cache = None
+        # Desligado, o perfilamento custa apenas esta verificacao
+        amostrar = perfil.perfilador.ativo and perfil.perfilador.deve_amostrar(
+            self.headers.get(perfil.CABECALHO_AMOSTRA) == '1')
+        if amostrar:
+            perfil.perfilador.iniciar(self.command)
+        try:
+            roteador.despachar(self, self.requisicao)
+        except ErroRota as e:
+            self.requisicao.rota = e.rota
+            self.enviar_erro_rota(e)
+        finally:
+            if amostrar:
+                perfil.perfilador.finalizar(f"{self.command} {self._nome_rota()}")
+
+    def enviar_erro_rota(self, erro):
+        """Responde 400/404/405 de uma requisicao sem rota valida"""
+        if erro.status == 404:
+            self.send_error(404, "Pagina nao encontrada")
+        elif erro.status == 405:
+            corpo = erro.mensagem.encode('utf-8')
+            self.send_response(405)
+            self.send_header('Allow', ', '.join(erro.permitidos))
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
         else:
-            self.send_error(404)
+            self.send_error(erro.status, erro.mensagem)
+
+    def redirecionar(self, destino):
+        """Responde 302 para `destino`"""
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def processar_devolucoes_formulario(self):
+        """Devolucao em lote: loan_id repetido (loan_id=1&loan_id=2) ou "1,2" """
+        raw = self.requisicao.formulario.get('loan_id', [])
+        loan_ids = []
+        for v in raw if isinstance(raw, list) else [raw]:
+            for part in str(v).split(','):
+                part = part.strip()
+                if part:
+                    try:
+                        loan_ids.append(int(part))
+                    except ValueError:
+                        pass
+        self.processar_devolucoes(loan_ids)
 
     # ========== RENDERIZACAO - MODULO 1: USUARIOS ==========
     
     def render_cadastro(self):
         """Renderiza pagina de listagem de usuarios"""
-        with open("View_and_Interface/cadastro.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         # TODO: Buscar usuarios via controler.py
         conteudo = """
             <div class="actions">
@@ -136,14 +248,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         """
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("cadastro.html", conteudo)
     
     def render_form_usuario(self):
         """Renderiza formulario de cadastro de usuario"""
-        with open("View_and_Interface/cadastro.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         conteudo = '''
             <div class="form-container">
                 <h2>Novo Usuario</h2>
@@ -177,14 +285,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("cadastro.html", conteudo)
     
     def processar_usuario(self, data):
         """Processa formulario de usuario (exibe dados mas nao salva)"""
-        with open("View_and_Interface/cadastro.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         # TODO: Salvar via controler.py
         mensagem = f'''
             <div class="alert alert-success">
@@ -205,16 +309,12 @@ class BibliotecaView(BaseHTTPRequestHandler):
             <a href="/cadastro" class="btn btn-primary">Voltar para lista</a>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', mensagem)
-        self.send_html(html)
+        self.send_pagina("cadastro.html", mensagem)
 
     # ========== RENDERIZACAO - MODULO 2: LIVROS ==========
     
     def render_livros(self):
         """Renderiza pagina de catalogo de livros"""
-        with open("View_and_Interface/crud_livros.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         conteudo = '''
             <div class="tabs">
                 <a href="/livros" class="tab active">Livros</a>
@@ -233,14 +333,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("crud_livros.html", conteudo)
     
     def render_autores(self):
         """Renderiza pagina de autores"""
-        with open("View_and_Interface/crud_livros.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         conteudo = '''
             <div class="tabs">
                 <a href="/livros" class="tab">Livros</a>
@@ -259,14 +355,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("crud_livros.html", conteudo)
     
     def render_form_livro(self):
         """Renderiza formulario de cadastro de livro"""
-        with open("View_and_Interface/crud_livros.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         conteudo = '''
             <div class="form-container">
                 <h2>Novo Livro</h2>
@@ -301,14 +393,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("crud_livros.html", conteudo)
     
     def processar_livro(self, data):
         """Processa formulario de livro (exibe dados mas nao salva)"""
-        with open("View_and_Interface/crud_livros.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         mensagem = f'''
             <div class="alert alert-success">
                 Dados recebidos com sucesso!
@@ -328,70 +416,109 @@ class BibliotecaView(BaseHTTPRequestHandler):
             <a href="/livros" class="btn btn-primary">Voltar para catalogo</a>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', mensagem)
-        self.send_html(html)
+        self.send_pagina("crud_livros.html", mensagem)
 
     # ========== RENDERIZACAO - MODULO 3: EMPRESTIMOS ==========
     
-    def render_emprestimos(self):
-        """Renderiza pagina de emprestimos"""
-        with open("View_and_Interface/emprestimos.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
+    def render_emprestimos(self, query=None):
+        """Renderiza pagina de emprestimos (paginada, enviada em partes)"""
         # Tenta buscar emprestimos via controller se disponível
         if CONTROLLER_AVAILABLE:
             try:
-                emprestimos = controller.get_emprestimos()
-                ativos = len([e for e in emprestimos if e['status'] == 'ACTIVE'])
-                devolvidos = len([e for e in emprestimos if e['status'] == 'RETURNED'])
-                total = len(emprestimos)
-                
-                # Monta tabela de emprestimos
-                linhas_tabela = ""
-                if emprestimos:
-                    for emp in emprestimos:
-                        status_badge = "🟢 ATIVO" if emp['status'] == "ACTIVE" else "🔵 DEVOLVIDO"
-                        checkbox = ""
-                        botao_devolver = ""
-                        if emp['status'] == "ACTIVE":
-                            # Checkbox para seleção em devolução em lote
-                            checkbox = f'<input type="checkbox" name="loan_id" value="{emp["loanId"]}" />'
-                            botao_devolver = f'<a href="/emprestimos/devolver/{emp["loanId"]}" class="btn btn-danger">Devolver</a>'
-                        linhas_tabela += f"""
-                        <tr>
-                            <td style="width:48px; text-align: center;">{checkbox}</td>
-                            <td>{emp['loanId']}</td>
-                            <td>{emp['userId']}</td>
-                            <td>{emp['bookId']}</td>
-                            <td>{emp['loanDate'][:10]}</td>
-                            <td>{emp['dueDate'][:10]}</td>
-                            <td>{status_badge}</td>
-                            <td style="text-align: center;">{botao_devolver}</td>
-                        </tr>
-                        """
-                else:
-                    linhas_tabela = "<tr><td colspan='8' style='text-align: center;'>Nenhum empréstimo registrado</td></tr>"
-                
-                # Formulário com possibilidade de devolução em lote
+                filtros = _filtros_emprestimos(query or {})
+                pagina = _int_positivo(_primeiro(query, 'pagina'), 1)
+                por_pagina = min(_int_positivo(_primeiro(query, 'por_pagina'), POR_PAGINA_PADRAO), POR_PAGINA_MAX)
+                resultado = controller.listar_emprestimos(
+                    offset=(pagina - 1) * por_pagina, limite=por_pagina, **filtros
+                )
+                estatisticas = controller.get_estatisticas()
+            except Exception as e:
                 conteudo = f'''
+                    <div class="alert alert-error">
+                        Erro ao buscar empréstimos: {_esc(e)}
+                    </div>
+                    <div class="actions" style="justify-content: space-between; display: flex;">
+                        <h2>Lista de Emprestimos</h2>
+                        <a href="/emprestimos/novo" class="btn btn-primary">+ Novo Emprestimo</a>
+                    </div>
+                    <div class="table-container">
+                        <div class="empty-state">
+                            <h3>Funcionalidade parcialmente implementada</h3>
+                            <p>Certifique-se de que todos os módulos estão configurados corretamente.</p>
+                        </div>
+                    </div>
+                '''
+                self.send_pagina("emprestimos.html", conteudo)
+                return
+
+            self.send_html_stream(self._partes_emprestimos(
+                resultado, filtros, pagina, por_pagina, estatisticas
+            ), _templates.get("emprestimos.html"))
+            return
+
+        conteudo = '''
+            <div class="stats">
+                <div class="stat-card">
+                    <h3>Emprestimos Ativos</h3>
+                    <div class="value">?</div>
+                </div>
+                <div class="stat-card">
+                    <h3>Emprestimos em Atraso</h3>
+                    <div class="value">?</div>
+                </div>
+                <div class="stat-card">
+                    <h3>Devolvidos Hoje</h3>
+                    <div class="value">?</div>
+                </div>
+            </div>
+            <div class="actions" style="justify-content: space-between; display: flex;">
+                <h2>Lista de Emprestimos</h2>
+                <a href="/emprestimos/novo" class="btn btn-primary">+ Novo Emprestimo</a>
+            </div>
+            <div class="table-container">
+                <div class="empty-state">
+                    <h3>Funcionalidade nao implementada</h3>
+                    <p>Os alunos devem implementar a classe <strong>Emprestimo</strong> em <code>Model/Emprestimo.py</code></p>
+                    <p>e integrar via <code>controler.py</code> para listar emprestimos aqui.</p>
+                    <p><strong>Nota:</strong> Este modulo depende de Usuario e Livro implementados!</p>
+                </div>
+            </div>
+        '''
+        
+        self.send_pagina("emprestimos.html", conteudo)
+
+    def _partes_emprestimos(self, resultado, filtros, pagina, por_pagina, estatisticas):
+        """Gera o conteudo da pagina de emprestimos em partes: cabecalho, linhas em lotes e rodape"""
+        status_sel = filtros.get('status') or ''
+        opcoes_status = ''.join(
+            f'<option value="{valor}"{" selected" if valor == status_sel else ""}>{rotulo}</option>'
+            for valor, rotulo in (('', 'Todos'), ('ACTIVE', 'Ativos'), ('RETURNED', 'Devolvidos'))
+        )
+        yield f'''
                     <div class="stats">
                         <div class="stat-card">
                             <h3>Emprestimos Ativos</h3>
-                            <div class="value">{ativos}</div>
+                            <div class="value">{estatisticas['ativos']}</div>
                         </div>
                         <div class="stat-card">
                             <h3>Emprestimos Devolvidos</h3>
-                            <div class="value">{devolvidos}</div>
+                            <div class="value">{estatisticas['devolvidos']}</div>
                         </div>
                         <div class="stat-card">
                             <h3>Total</h3>
-                            <div class="value">{total}</div>
+                            <div class="value">{estatisticas['total']}</div>
                         </div>
                     </div>
                     <div class="actions" style="justify-content: space-between; display: flex;">
                         <h2>Lista de Emprestimos</h2>
                         <a href="/emprestimos/novo" class="btn btn-primary">+ Novo Emprestimo</a>
                     </div>
+                    <form action="/emprestimos" method="get" style="display:flex; gap:8px; margin-bottom:12px;">
+                        <select name="status">{opcoes_status}</select>
+                        <input type="number" name="user_id" placeholder="Usuário ID" value="{_esc(filtros.get('user_id'))}">
+                        <input type="number" name="book_id" placeholder="Livro ID" value="{_esc(filtros.get('book_id'))}">
+                        <button type="submit" class="btn btn-secondary">Filtrar</button>
+                    </form>
                     <div class="table-container">
                         <form action="/emprestimos/devolver" method="post" id="devolverForm">
                         <table style="width: 100%; border-collapse: collapse;">
@@ -408,7 +535,15 @@ class BibliotecaView(BaseHTTPRequestHandler):
                                 </tr>
                             </thead>
                             <tbody>
-                                {linhas_tabela}
+        '''
+
+        emprestimos = resultado["emprestimos"]
+        if not emprestimos:
+            yield "<tr><td colspan='8' style='text-align: center;'>Nenhum empréstimo registrado</td></tr>"
+        for inicio in range(0, len(emprestimos), LINHAS_POR_PARTE):
+            yield ''.join(_linha_emprestimo(emp) for emp in emprestimos[inicio:inicio + LINHAS_POR_PARTE])
+
+        yield f'''
                             </tbody>
                         </table>
                         <div style="padding:12px; display:flex; justify-content:flex-end; gap:8px;">
@@ -417,74 +552,37 @@ class BibliotecaView(BaseHTTPRequestHandler):
                         </div>
                         </form>
                     </div>
-                '''
-            except Exception as e:
-                conteudo = f'''
-                    <div class="alert alert-error">
-                        Erro ao buscar empréstimos: {str(e)}
-                    </div>
-                    <div class="actions" style="justify-content: space-between; display: flex;">
-                        <h2>Lista de Emprestimos</h2>
-                        <a href="/emprestimos/novo" class="btn btn-primary">+ Novo Emprestimo</a>
-                    </div>
-                    <div class="table-container">
-                        <div class="empty-state">
-                            <h3>Funcionalidade parcialmente implementada</h3>
-                            <p>Certifique-se de que todos os módulos estão configurados corretamente.</p>
-                        </div>
-                    </div>
-                '''
-        else:
-            conteudo = '''
-                <div class="stats">
-                    <div class="stat-card">
-                        <h3>Emprestimos Ativos</h3>
-                        <div class="value">?</div>
-                    </div>
-                    <div class="stat-card">
-                        <h3>Emprestimos em Atraso</h3>
-                        <div class="value">?</div>
-                    </div>
-                    <div class="stat-card">
-                        <h3>Devolvidos Hoje</h3>
-                        <div class="value">?</div>
-                    </div>
-                </div>
-                <div class="actions" style="justify-content: space-between; display: flex;">
-                    <h2>Lista de Emprestimos</h2>
-                    <a href="/emprestimos/novo" class="btn btn-primary">+ Novo Emprestimo</a>
-                </div>
-                <div class="table-container">
-                    <div class="empty-state">
-                        <h3>Funcionalidade nao implementada</h3>
-                        <p>Os alunos devem implementar a classe <strong>Emprestimo</strong> em <code>Model/Emprestimo.py</code></p>
-                        <p>e integrar via <code>controler.py</code> para listar emprestimos aqui.</p>
-                        <p><strong>Nota:</strong> Este modulo depende de Usuario e Livro implementados!</p>
-                    </div>
-                </div>
-            '''
-        
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+                    {_paginacao(filtros, pagina, por_pagina, resultado["total"])}
+        '''
     
-    def render_form_emprestimo(self):
-        """Renderiza formulario de novo emprestimo"""
-        with open("View_and_Interface/emprestimos.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
+    def render_form_emprestimo(self, query=None):
+        """
+        Renderiza formulario de novo emprestimo. Os livros disponiveis vem
+        em paginas (`pagina`) e podem ser filtrados por titulo/autor (`q`),
+        sem listar o catalogo inteiro.
+        """
         opcoes_usuarios = ""
         opcoes_livros = ""
+        consulta = (_primeiro(query, 'q') or '').strip()
+        pagina = _int_positivo(_primeiro(query, 'pagina'), 1)
+        filtros = {'q': consulta} if consulta else {}
+        paginacao = ""
         
         # Tenta buscar usuarios e livros via mocks se disponível
         if CONTROLLER_AVAILABLE:
             try:
-                usuarios = mock_usuarios.listar_usuarios()
+                usuarios = controller.listar_usuarios()
                 for usuario in usuarios:
                     opcoes_usuarios += f'<option value="{usuario["userId"]}">{usuario["userId"]} - {usuario["nome"]} ({usuario["tipo"]})</option>'
                 
-                livros = mock_catalogo.listar_livros_disponiveis()
-                for livro in livros:
-                    opcoes_livros += f'<option value="{livro["bookId"]}">{livro["bookId"]} - {livro["titulo"]}</option>'
+                resultado = controller.listar_livros_por_status(
+                    "disponivel", consulta=consulta or None,
+                    offset=(pagina - 1) * LIVROS_POR_PAGINA, limite=LIVROS_POR_PAGINA
+                )
+                for livro in resultado["livros"]:
+                    opcoes_livros += f'<option value="{livro["bookId"]}">{livro["bookId"]} - {_esc(livro["titulo"])}</option>'
+                paginacao = _paginacao(filtros, pagina, LIVROS_POR_PAGINA, resultado["total"],
+                                       '/emprestimos/novo', 'livros disponíveis')
             except Exception as e:
                 opcoes_usuarios = f'<option value="">Erro ao carregar usuários: {str(e)}</option>'
                 opcoes_livros = f'<option value="">Erro ao carregar livros: {str(e)}</option>'
@@ -497,6 +595,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
         conteudo = f'''
             <div class="form-container">
                 <h2>Novo Emprestimo</h2>
+                <form action="/emprestimos/novo" method="get" style="display:flex; gap:8px; margin-bottom:12px;">
+                    <input type="search" name="q" placeholder="Buscar livro por titulo ou autor" value="{_esc(consulta)}">
+                    <button type="submit" class="btn btn-secondary">Buscar</button>
+                </form>
                 <form action="/emprestimos/salvar" method="post">
                     <div class="form-group">
                         <label>Usuario *</label>
@@ -511,6 +613,7 @@ class BibliotecaView(BaseHTTPRequestHandler):
                             <option value="">Selecione um livro...</option>
                             {opcoes_livros}
                         </select>
+                        {paginacao}
                     </div>
                     <div class="form-actions">
                         <a href="/emprestimos" class="btn btn-secondary" style="background: #6b7280; color: white; text-decoration: none;">Cancelar</a>
@@ -520,14 +623,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
             </div>
         '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("emprestimos.html", conteudo)
     
     def processar_emprestimo(self, data):
         """Processa formulario de emprestimo via controller"""
-        with open("View_and_Interface/emprestimos.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         user_id = int(data.get('user_id', 0)) if data.get('user_id') else 0
         book_id = int(data.get('book_id', 0)) if data.get('book_id') else 0
         
@@ -597,14 +696,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
                 <a href="/emprestimos" class="btn btn-primary">Voltar para lista</a>
             '''
         
-        html = html.replace('<!--CONTEUDO-->', mensagem)
-        self.send_html(html)
+        self.send_pagina("emprestimos.html", mensagem)
 
     def processar_devolucao(self, loan_id):
         """Processa devolução de um empréstimo via controller"""
-        with open("View_and_Interface/emprestimos.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
         if not loan_id:
             mensagem = '''
                 <div class="alert alert-error">
@@ -662,14 +757,10 @@ class BibliotecaView(BaseHTTPRequestHandler):
                 <a href="/emprestimos" class="btn btn-primary">Voltar para lista</a>
             '''
         
-        html = html.replace('<!--CONTEUDO-->', mensagem)
-        self.send_html(html)
+        self.send_pagina("emprestimos.html", mensagem)
 
     def processar_devolucoes(self, loan_ids):
         """Processa devolução de múltiplos empréstimos via controller (POST)."""
-        with open("View_and_Interface/emprestimos.html", "r", encoding="utf-8") as f:
-            html = f.read()
-
         if not loan_ids:
             mensagem = '''
                 <div class="alert alert-error">
@@ -678,21 +769,17 @@ class BibliotecaView(BaseHTTPRequestHandler):
                 <br>
                 <a href="/emprestimos" class="btn btn-primary">Voltar para lista</a>
             '''
-            html = html.replace('<!--CONTEUDO-->', mensagem)
-            self.send_html(html)
+            self.send_pagina("emprestimos.html", mensagem)
             return
 
         results = []
         if CONTROLLER_AVAILABLE:
-            for lid in loan_ids:
-                try:
-                    res = controller.registrar_devolucao(loan_id=lid)
-                    if res.get('sucesso'):
-                        results.append((lid, True, None))
-                    else:
-                        results.append((lid, False, res.get('erro')))
-                except Exception as e:
-                    results.append((lid, False, str(e)))
+            try:
+                # Uma única operação em lote valida e aplica todas as devoluções
+                for lid, res in zip(loan_ids, controller.registrar_devolucoes(loan_ids)):
+                    results.append((lid, bool(res.get('sucesso')), res.get('erro')))
+            except Exception as e:
+                results = [(lid, False, str(e)) for lid in loan_ids]
         else:
             for lid in loan_ids:
                 results.append((lid, False, 'Controller não disponível'))
@@ -712,68 +799,314 @@ class BibliotecaView(BaseHTTPRequestHandler):
 
         mensagem += '<br><a href="/emprestimos" class="btn btn-primary">Voltar para lista</a>'
 
-        html = html.replace('<!--CONTEUDO-->', mensagem)
-        self.send_html(html)
+        self.send_pagina("emprestimos.html", mensagem)
 
     # ========== RENDERIZACAO - MODULO 4: RELATORIOS ==========
     
     def render_relatorios(self):
         """Renderiza pagina de relatorios"""
-        with open("View_and_Interface/relatorios.html", "r", encoding="utf-8") as f:
-            html = f.read()
-        
-        conteudo = '''
-            <div class="report-cards">
-                <div class="report-card">
-                    <div class="icon">Stats</div>
-                    <h3>Visao Geral</h3>
-                    <p>Dashboard com estatisticas gerais</p>
-                </div>
-                <div class="report-card">
-                    <div class="icon">Books</div>
-                    <h3>Livros Mais Emprestados</h3>
-                    <p>Ranking de popularidade</p>
-                </div>
-                <div class="report-card">
-                    <div class="icon">Users</div>
-                    <h3>Usuarios Mais Ativos</h3>
-                    <p>Top usuarios por emprestimos</p>
+        if CONTROLLER_AVAILABLE:
+            try:
+                relatorios = controller.get_relatorios()
+                visao = relatorios["visao_geral"]
+                ocupacao = relatorios["taxa_ocupacao"]
+                livros = ''.join(
+                    f'<li>{_esc(l["titulo"] or l["bookId"])} — {l["emprestimos"]} empréstimo(s)</li>'
+                    for l in relatorios["livros_mais_emprestados"]
+                ) or '<li>Nenhum empréstimo registrado</li>'
+                usuarios = ''.join(
+                    f'<li>{_esc(u["nome"] or u["userId"])} — {u["emprestimos"]} empréstimo(s)</li>'
+                    for u in relatorios["usuarios_mais_ativos"]
+                ) or '<li>Nenhum empréstimo registrado</li>'
+                conteudo = f'''
+                    <div class="report-cards">
+                        <div class="report-card">
+                            <div class="icon">Stats</div>
+                            <h3>Visao Geral</h3>
+                            <p>{visao["ativos"]} ativos, {visao["devolvidos"]} devolvidos, {visao["total"]} no total</p>
+                        </div>
+                        <div class="report-card">
+                            <div class="icon">Books</div>
+                            <h3>Livros Mais Emprestados</h3>
+                            <ol>{livros}</ol>
+                        </div>
+                        <div class="report-card">
+                            <div class="icon">Users</div>
+                            <h3>Usuarios Mais Ativos</h3>
+                            <ol>{usuarios}</ol>
+                        </div>
+                        <div class="report-card">
+                            <div class="icon">Chart</div>
+                            <h3>Taxa de Ocupacao</h3>
+                            <p>{ocupacao["taxa"]}% ({ocupacao["emprestados"]} de {ocupacao["total"]} livros emprestados)</p>
+                        </div>
+                    </div>
+                '''
+            except Exception as e:
+                conteudo = f'''
+                    <div class="alert alert-error">
+                        Erro ao gerar relatórios: {_esc(e)}
+                    </div>
+                '''
+        else:
+            conteudo = '''
+                <div class="report-cards">
+                    <div class="report-card">
+                        <div class="icon">Stats</div>
+                        <h3>Visao Geral</h3>
+                        <p>Dashboard com estatisticas gerais</p>
+                    </div>
+                    <div class="report-card">
+                        <div class="icon">Books</div>
+                        <h3>Livros Mais Emprestados</h3>
+                        <p>Ranking de popularidade</p>
+                    </div>
+                    <div class="report-card">
+                        <div class="icon">Users</div>
+                        <h3>Usuarios Mais Ativos</h3>
+                        <p>Top usuarios por emprestimos</p>
+                    </div>
+                    <div class="report-card">
+                        <div class="icon">Chart</div>
+                        <h3>Taxa de Ocupacao</h3>
+                        <p>Percentual de livros emprestados</p>
+                    </div>
                 </div>
-                <div class="report-card">
-                    <div class="icon">Chart</div>
-                    <h3>Taxa de Ocupacao</h3>
-                    <p>Percentual de livros emprestados</p>
+                <div class="empty-state">
+                    <h3>Funcionalidade nao implementada</h3>
+                    <p>Os alunos devem implementar a classe <strong>Relatorio</strong> em <code>Model/Relatorio.py</code></p>
+                    <p>e integrar via <code>controler.py</code> para gerar relatorios.</p>
+                    <p><strong>Nota:</strong> Este modulo depende de TODOS os outros modulos!</p>
                 </div>
-            </div>
-            <div class="empty-state">
-                <h3>Funcionalidade nao implementada</h3>
-                <p>Os alunos devem implementar a classe <strong>Relatorio</strong> em <code>Model/Relatorio.py</code></p>
-                <p>e integrar via <code>controler.py</code> para gerar relatorios.</p>
-                <p><strong>Nota:</strong> Este modulo depende de TODOS os outros modulos!</p>
-            </div>
-        '''
+            '''
         
-        html = html.replace('<!--CONTEUDO-->', conteudo)
-        self.send_html(html)
+        self.send_pagina("relatorios.html", conteudo)
 
     # ========== METODOS AUXILIARES ==========
     
+    def _negociar_codificacao(self):
+        """Codificacao aceita pelo cliente (Accept-Encoding), ou None"""
+        return compressao.escolher_codificacao(self.headers.get('Accept-Encoding'))
+
+    def responder_do_cache(self):
+        """
+        Responde uma pagina versionada sem renderiza-la, se possivel: 304 se o
+        cliente ja tem a versao atual, ou o corpo guardado para esta versao.
+        Caso contrario prepara o ETag e retorna False para renderizar.
+        """
+        try:
+            versao = controller.get_versao()
+        except Exception:
+            return False
+        aceita = self._negociar_codificacao()
+        # Cada codificacao e uma representacao diferente: ETag proprio
+        self._etag = f'"{versao}-{aceita}"' if aceita else f'"{versao}"'
+        if api.etag_confere(self, self._etag):
+            self.send_response(304)
+            self.send_header('ETag', self._etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return True
+        guardada = _paginas.get((self.path, aceita), versao)
+        if guardada is not None:
+            self._enviar_corpo_html(*guardada)
+            return True
+        self._versao_cache = versao
+        return False
+
+    def _cabecalhos_html(self, codificacao):
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Vary', 'Accept-Encoding')
+        if codificacao:
+            self.send_header('Content-Encoding', codificacao)
+        if self._etag:
+            self.send_header('ETag', self._etag)
+            self.send_header('Cache-Control', 'no-cache')
+
+    def _enviar_corpo_html(self, corpo, codificacao=None):
+        self.send_response(200)
+        self._cabecalhos_html(codificacao)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _enviar_e_guardar(self, corpo, codificacao, aceita):
+        if self._versao_cache is not None:
+            _paginas.guardar((self.path, aceita), self._versao_cache, (corpo, codificacao))
+        self._enviar_corpo_html(corpo, codificacao)
+
+    def send_pagina(self, nome_template, conteudo):
+        """
+        Envia `conteudo` dentro do template, comprimido se o cliente aceitar e
+        a pagina passar de compressao.TAMANHO_MINIMO. As partes fixas do
+        template ja estao codificadas e comprimidas desde a carga.
+        """
+        template = _templates.get(nome_template)
+        dados = conteudo.encode('utf-8')
+        aceita = self._negociar_codificacao()
+        tamanho = len(template.inicio_bytes) + len(dados) + len(template.fim_bytes)
+        if aceita and tamanho >= compressao.TAMANHO_MINIMO:
+            self._enviar_e_guardar(compressao.comprimir_pagina(template, dados, aceita), aceita, aceita)
+        else:
+            self._enviar_e_guardar(template.inicio_bytes + dados + template.fim_bytes, None, aceita)
+
     def send_html(self, html):
-        """Envia resposta HTML"""
+        """Envia resposta HTML (comprimida se aceito e acima do tamanho minimo)"""
+        corpo = html.encode('utf-8')
+        aceita = self._negociar_codificacao()
+        if aceita and len(corpo) >= compressao.TAMANHO_MINIMO:
+            self._enviar_e_guardar(compressao.comprimir(corpo, aceita), aceita, aceita)
+        else:
+            self._enviar_e_guardar(corpo, None, aceita)
+
+    def send_html_stream(self, partes, template=None):
+        """
+        Envia resposta HTML parte a parte, sem montar o documento inteiro,
+        opcionalmente dentro de `template`.
+
+        Em HTTP/1.1 usa Transfer-Encoding: chunked; em HTTP/1.0 o fim do
+        corpo é sinalizado pelo fechamento da conexão. Se o cliente aceitar,
+        o corpo vai comprimido (sempre, pois o tamanho final nao e conhecido),
+        reaproveitando as partes pre-comprimidas do template.
+        """
+        chunked = self.request_version == 'HTTP/1.1' and self.protocol_version == 'HTTP/1.1'
+        aceita = self._negociar_codificacao()
+        fluxo = compressao.criar_fluxo(aceita) if aceita else None
+        enviadas = [] if self._versao_cache is not None else None
         self.send_response(200)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self._cabecalhos_html(aceita)
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.close_connection = True
         self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+
+        def escrever(dados):
+            if not dados:
+                return
+            if enviadas is not None:
+                enviadas.append(dados)
+            if chunked:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+            else:
+                self.wfile.write(dados)
+
+        if fluxo is not None:
+            escrever(fluxo.inicio())
+            if template is not None:
+                escrever(fluxo.segmento(template.gzip_inicio))
+        elif template is not None:
+            escrever(template.inicio_bytes)
+        for parte in partes:
+            dados = parte.encode('utf-8')
+            escrever(fluxo.comprimir(dados) if fluxo is not None else dados)
+        if fluxo is not None:
+            escrever(fluxo.fim(template.gzip_fim if template is not None else None))
+        elif template is not None:
+            escrever(template.fim_bytes)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        if enviadas is not None:
+            _paginas.guardar((self.path, aceita), self._versao_cache, (b"".join(enviadas), aceita))
 
     def log_message(self, format, *args):
-        """Log das requisicoes HTTP"""
-        print(f"[{self.log_date_time_string()}] {format % args}")
+        """Log das requisicoes HTTP (escrito em lote, fora da requisicao)"""
+        metricas.log_assincrono.registrar(f"[{self.log_date_time_string()}] {format % args}")
+
+    def send_texto(self, texto, tipo='text/plain; charset=utf-8'):
+        """Envia uma resposta de texto simples (metricas, perfilamento)"""
+        corpo = texto.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', tipo)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def render_metricas(self):
+        """Metricas no formato de exposicao do Prometheus"""
+        self.send_texto(metricas.registro.exportar(), 'text/plain; version=0.0.4; charset=utf-8')
+
+    def alterar_perfil(self, acao):
+        """Liga (taxa=0..1), desliga ou limpa o perfilamento em tempo de execucao"""
+        if acao == 'ativar':
+            try:
+                perfil.perfilador.ativar(float(self.requisicao.formulario.get('taxa', 1.0)))
+            except (TypeError, ValueError):
+                # TypeError: campo repetido (taxa=0.1&taxa=0.2) chega como lista
+                self.send_error(400, "taxa deve ser um numero entre 0 e 1")
+                return
+        elif acao == 'desativar':
+            perfil.perfilador.desativar()
+        elif acao == 'limpar':
+            perfil.perfilador.limpar()
+        self.send_texto(perfil.perfilador.resumo())
+
+
+# ========== ROTAS ==========
+
+def _middleware_versionadas(handler, requisicao, proximo):
+    """
+    Paginas que dependem apenas da URL e dos dados (versionada=True): ETag da
+    versao dos dados, 304 para If-None-Match e corpo guardado por versao.
+    """
+    if requisicao.rota.opcoes.get('versionada') and CONTROLLER_AVAILABLE and handler.responder_do_cache():
+        return
+    proximo()
+
+
+roteador = Roteador()
+roteador.usar(_middleware_versionadas)
+
+roteador.adicionar('/', lambda v: v.redirecionar('/cadastro'))
+
+# Modulo 1: Cadastro de Usuarios
+roteador.adicionar('/cadastro', 'render_cadastro')
+roteador.adicionar('/cadastro/novo', 'render_form_usuario')
+roteador.adicionar('/cadastro/salvar', lambda v: v.processar_usuario(v.requisicao.formulario), metodos=('POST',))
+
+# Modulo 2: Catalogo de Livros
+roteador.adicionar('/livros', 'render_livros')
+roteador.adicionar('/livros/novo', 'render_form_livro')
+roteador.adicionar('/livros/salvar', lambda v: v.processar_livro(v.requisicao.formulario), metodos=('POST',))
+roteador.adicionar('/autores', 'render_autores')
+
+# Modulo 3: Emprestimos
+roteador.adicionar('/emprestimos', lambda v: v.render_emprestimos(v.requisicao.query), versionada=True)
+roteador.adicionar('/emprestimos/novo', lambda v: v.render_form_emprestimo(v.requisicao.query), versionada=True)
+roteador.adicionar('/emprestimos/salvar', lambda v: v.processar_emprestimo(v.requisicao.formulario), metodos=('POST',))
+roteador.adicionar('/emprestimos/devolver', 'processar_devolucoes_formulario', metodos=('POST',))
+roteador.adicionar('/emprestimos/devolver/<int:loan_id>', 'processar_devolucao')
+
+# Modulo 4: Relatorios
+roteador.adicionar('/relatorios', 'render_relatorios', versionada=True)
+
+# Observabilidade
+roteador.adicionar('/metrics', 'render_metricas')
+roteador.adicionar('/perfil', lambda v: v.send_texto(perfil.perfilador.resumo()))
+roteador.adicionar('/perfil/pilhas', lambda v: v.send_texto(perfil.perfilador.pilhas()))
+for _acao in ('ativar', 'desativar', 'limpar'):
+    roteador.adicionar('/perfil/' + _acao, lambda v, acao=_acao: v.alterar_perfil(acao), metodos=('POST',))
+if CONTROLLER_AVAILABLE:
+    metricas.registro.registrar_medidor(
+        'emprestimos', 'Empréstimos registrados (ativos e devolvidos)',
+        lambda: controller.get_estatisticas()['total'])
+    metricas.registro.registrar_medidor(
+        'livros_catalogo', 'Livros no catálogo',
+        lambda: sum(controller.repositorio.contar_livros_por_status().values()))
+
+# API JSON: o corpo e JSON, nao formulario; as rotas internas ficam em api.py
+if CONTROLLER_AVAILABLE:
+    roteador.adicionar(
+        '/api/<caminho:resto>',
+        lambda v, resto: api.tratar(v, v.requisicao.caminho, v.requisicao.query, v.requisicao.corpo),
+        metodos=('GET', 'POST'),
+    )
 
 
-def run_server(port=8000):
-    """Inicia o servidor HTTP na porta especificada"""
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, BibliotecaView)
+def run_server(port=8000, workers=servidor.WORKERS_PADRAO):
+    """Inicia o servidor HTTP na porta especificada, com `workers` threads"""
+    httpd = servidor.criar_servidor(BibliotecaView, host='', porta=port, workers=workers)
     print(f"Servidor SGBU iniciado em http://localhost:{port}")
     print(f"Acesse: http://localhost:{port}/cadastro")
     print(f"Pressione Ctrl+C para encerrar")
@@ -0,0 +1,400 @@
+"""Benchmark do ciclo de empréstimo: vazão e latência (p50/p99) por operação.
+
+Para cada escala N monta dados sintéticos e reprodutíveis (semente fixa):
+N livros, N/100 usuários (mínimo 10) e um histórico de N empréstimos, 10%
+ainda ativos. Então mede:
+
+- model (`modulo_emprestimo`): adicionar_emprestimo, registrar_devolucao,
+  get_emprestimos e get_emprestimo_by_id;
+- HTTP (BibliotecaView numa porta local, --modo threads ou asyncio), com
+  --clientes conexões keep-alive concorrentes: GET /api/livros/<id>,
+  GET /api/emprestimos, GET /emprestimos (HTML) e o ciclo
+  POST /api/emprestimos + POST /api/devolucoes.
+
+O resultado (JSON) traz, por escala e operação, operações por segundo e as
+latências p50/p99/máxima em microssegundos, além do commit e do ambiente.
+No modo de comparação, aponta as operações cuja latência p99 subiu ou cuja
+vazão caiu além da tolerância e termina com código 1 se houver regressão.
+
+Escalas de 10^7 precisam de vários GB de memória (o catálogo e o histórico
+vivem em memória).
+
+Uso:
+    python benchmarks/ciclo_emprestimo.py [--escalas 1e3,1e4,1e5] [--saida novo.json]
+    python benchmarks/ciclo_emprestimo.py --escalas 1e4 --base base.json
+    python benchmarks/ciclo_emprestimo.py --comparar base.json novo.json [--tolerancia 0.1]
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import mock_catalogo
+import mock_usuarios
+import modulo_emprestimo
+import servidor
+import servidor_async
+from View_and_Interface import view
+
+# Orçamento de itens percorridos por get_emprestimos (lista inteira) em cada
+# escala: limita o número de chamadas nas escalas grandes
+ITENS_LISTAGEM = 2_000_000
+
+
+# ========== DADOS SINTÉTICOS ==========
+
+def gerar_dados(escala, semente):
+    """
+    Substitui catálogo, usuários e empréstimos por dados sintéticos.
+
+    Returns:
+        lista dos bookIds disponíveis, embaralhada
+    """
+    aleatorio = random.Random(semente)
+    total_usuarios = max(10, escala // 100)
+    mock_usuarios._usuarios_db = {
+        i: {"userId": i, "nome": f"Usuario {i}", "tipo": "professor" if i % 10 == 0 else "aluno",
+            "email": f"usuario{i}@escola.com"}
+        for i in range(1, total_usuarios + 1)
+    }
+    catalogo = {}
+    emprestimos = []
+    disponiveis = []
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    for i in range(1, escala + 1):
+        ativo = i % 10 == 0
+        catalogo[i] = {"bookId": i, "titulo": f"Livro {i}", "autor": f"Autor {i % 997}",
+                       "status": "emprestado" if ativo else "disponivel"}
+        if not ativo:
+            disponiveis.append(i)
+        data = base + timedelta(minutes=i)
+        emprestimos.append(modulo_emprestimo.Emprestimo(
+            user_id=aleatorio.randint(1, total_usuarios), book_id=i, loan_id=i,
+            loan_date=data, due_date=data + timedelta(days=14),
+            status="ACTIVE" if ativo else "RETURNED",
+            return_date=None if ativo else data + timedelta(days=7),
+        ))
+    mock_catalogo._catalogo_db = catalogo
+    modulo_emprestimo.emprestimos = emprestimos
+    modulo_emprestimo.next_loan_id = escala + 1
+    # Constrói os índices agora, fora das medições
+    modulo_emprestimo.get_estatisticas()
+    mock_catalogo.contar_livros_por_status()
+    aleatorio.shuffle(disponiveis)
+    return disponiveis
+
+
+# ========== MEDIÇÃO ==========
+
+def percentil(ordenadas, p):
+    """Percentil `p` (0-100) por posição mais próxima numa lista ordenada."""
+    if not ordenadas:
+        return 0.0
+    posicao = max(0, min(len(ordenadas) - 1, round(p / 100 * len(ordenadas) + 0.5) - 1))
+    return ordenadas[posicao]
+
+
+def resumir(escala, grupo, operacao, latencias_ns, duracao, extra=None):
+    """Monta o registro de resultado a partir das latências (ns) e da duração (s)."""
+    ordenadas = sorted(latencias_ns)
+    resultado = {
+        "escala": escala,
+        "grupo": grupo,
+        "operacao": operacao,
+        "operacoes": len(ordenadas),
+        "por_segundo": round(len(ordenadas) / duracao, 1) if duracao else 0.0,
+        "p50_us": round(percentil(ordenadas, 50) / 1000, 2),
+        "p99_us": round(percentil(ordenadas, 99) / 1000, 2),
+        "max_us": round(ordenadas[-1] / 1000, 2) if ordenadas else 0.0,
+    }
+    resultado.update(extra or {})
+    return resultado
+
+
+def medir_chamadas(escala, operacao, funcao, argumentos):
+    """Chama `funcao(*args)` para cada item de `argumentos`, cronometrando cada uma."""
+    relogio = time.perf_counter_ns
+    latencias = []
+    inicio = time.perf_counter()
+    for args in argumentos:
+        antes = relogio()
+        funcao(*args)
+        latencias.append(relogio() - antes)
+    return resumir(escala, "model", operacao, latencias, time.perf_counter() - inicio)
+
+
+def medir_model(escala, disponiveis, operacoes, semente):
+    aleatorio = random.Random(semente)
+    total_usuarios = len(mock_usuarios._usuarios_db)
+    livros = disponiveis[:operacoes]
+    primeiro_id = modulo_emprestimo.next_loan_id
+    resultados = [
+        medir_chamadas(escala, "adicionar_emprestimo", modulo_emprestimo.adicionar_emprestimo,
+                       [(aleatorio.randint(1, total_usuarios), book_id) for book_id in livros]),
+        medir_chamadas(escala, "registrar_devolucao", modulo_emprestimo.registrar_devolucao,
+                       [(loan_id,) for loan_id in range(primeiro_id, primeiro_id + len(livros))]),
+    ]
+    total = len(modulo_emprestimo.emprestimos)
+    resultados.append(medir_chamadas(escala, "get_emprestimos", modulo_emprestimo.get_emprestimos,
+                                     [()] * max(3, min(operacoes, ITENS_LISTAGEM // total))))
+    resultados.append(medir_chamadas(escala, "get_emprestimo_by_id", modulo_emprestimo.get_emprestimo_by_id,
+                                     [(aleatorio.randint(1, total),) for _ in range(operacoes)]))
+    return resultados
+
+
+class ServidorBenchmark:
+    """Sobe a BibliotecaView numa porta livre, no modo pedido."""
+
+    def __init__(self, modo, workers):
+        self.modo = modo
+        if modo == "asyncio":
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+            self.thread.start()
+            self.httpd = servidor_async.ServidorAssincrono(view.BibliotecaView, porta=0, workers=workers,
+                                                           max_requisicoes=10 ** 9)
+            asyncio.run_coroutine_threadsafe(self.httpd.iniciar(), self.loop).result(10)
+        else:
+            self.httpd = servidor.criar_servidor(view.BibliotecaView, porta=0, workers=workers,
+                                                 max_requisicoes=10 ** 9)
+            self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+            self.thread.start()
+        self.porta = self.httpd.server_address[1]
+
+    def parar(self):
+        if self.modo == "asyncio":
+            asyncio.run_coroutine_threadsafe(self.httpd.encerrar(), self.loop).result(30)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+        else:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+
+def _requisitar(conexao, metodo, caminho, corpo=None, cabecalhos=None):
+    """
+    Envia uma requisição e lê a resposta. Se o servidor fechou a conexão
+    keep-alive ociosa (ele o faz quando há conexões esperando worker), reabre
+    e reenvia: a requisição não chegou a ser processada.
+    """
+    for tentativa in (1, 2):
+        try:
+            conexao.request(metodo, caminho, body=corpo, headers=cabecalhos or {})
+            resposta = conexao.getresponse()
+            return resposta, resposta.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conexao.close()
+            if tentativa == 2:
+                raise
+
+
+def _get(porta, caminhos, latencias, erros):
+    """GET de cada caminho numa conexão keep-alive, cronometrando cada um."""
+    conexao = http.client.HTTPConnection("localhost", porta, timeout=30)
+    try:
+        for caminho in caminhos:
+            antes = time.perf_counter_ns()
+            resposta, _ = _requisitar(conexao, "GET", caminho, cabecalhos={"Accept-Encoding": "gzip"})
+            latencias.append(time.perf_counter_ns() - antes)
+            if resposta.status >= 400:
+                erros.append(resposta.status)
+    finally:
+        conexao.close()
+
+
+def _emprestar_e_devolver(porta, corpos, latencias, erros):
+    """POST de cada empréstimo seguido da devolução do loanId retornado."""
+    conexao = http.client.HTTPConnection("localhost", porta, timeout=30)
+    cabecalhos = {"Content-Type": "application/json"}
+    try:
+        for corpo in corpos:
+            antes = time.perf_counter_ns()
+            resposta, dados = _requisitar(conexao, "POST", "/api/emprestimos", corpo, cabecalhos)
+            dados = json.loads(dados)
+            if resposta.status != 201:
+                erros.append(resposta.status)
+                continue
+            devolucao = json.dumps({"loanId": dados["loan"]["loanId"]}).encode()
+            resposta, _ = _requisitar(conexao, "POST", "/api/devolucoes", devolucao, cabecalhos)
+            latencias.append(time.perf_counter_ns() - antes)
+            if resposta.status != 200:
+                erros.append(resposta.status)
+    finally:
+        conexao.close()
+
+
+def medir_clientes(escala, operacao, cliente, porta, itens_por_cliente):
+    """Roda `cliente(porta, itens, latencias, erros)` em paralelo, um por lista de itens."""
+    latencias, erros = [], []
+    threads = [threading.Thread(target=cliente, args=(porta, itens, latencias, erros))
+               for itens in itens_por_cliente]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resumir(escala, "http", operacao, latencias, time.perf_counter() - inicio,
+                   {"clientes": len(threads), "erros": len(erros)})
+
+
+def medir_http(escala, disponiveis, args):
+    aleatorio = random.Random(args.semente + 1)
+    total = len(modulo_emprestimo.emprestimos)
+    total_usuarios = len(mock_usuarios._usuarios_db)
+    por_cliente = max(1, args.requisicoes // args.clientes)
+    paginas = max(1, total // 50)
+
+    def distribuir(gerar):
+        return [[gerar() for _ in range(por_cliente)] for _ in range(args.clientes)]
+
+    # Livros ainda não usados pelo model: cada empréstimo pega um diferente,
+    # sem conflitos entre clientes
+    livros = iter(disponiveis[args.operacoes:])
+
+    def emprestimo():
+        book_id = next(livros, None) or aleatorio.randint(1, escala)
+        return json.dumps({"userId": aleatorio.randint(1, total_usuarios), "bookId": book_id}).encode()
+
+    cenarios = [
+        ("GET /api/livros/<id>", lambda: f"/api/livros/{aleatorio.randint(1, escala)}"),
+        ("GET /api/emprestimos", lambda: f"/api/emprestimos?limite=50&offset={aleatorio.randrange(total)}"),
+        ("GET /emprestimos", lambda: f"/emprestimos?pagina={aleatorio.randint(1, paginas)}"),
+    ]
+    servidor_http = ServidorBenchmark(args.modo, args.workers)
+    try:
+        resultados = [medir_clientes(escala, nome, _get, servidor_http.porta, distribuir(gerar))
+                      for nome, gerar in cenarios]
+        resultados.append(medir_clientes(escala, "POST /api/emprestimos + /api/devolucoes",
+                                         _emprestar_e_devolver, servidor_http.porta, distribuir(emprestimo)))
+    finally:
+        servidor_http.parar()
+    return resultados
+
+
+# ========== EXECUÇÃO E COMPARAÇÃO ==========
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def executar(args):
+    # O log de acesso iria para a saída misturado ao JSON
+    view.BibliotecaView.log_message = lambda *a: None
+    resultados = []
+    for escala in args.escalas:
+        inicio = time.perf_counter()
+        disponiveis = gerar_dados(escala, args.semente)
+        print(f"escala {escala}: dados gerados em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+        resultados += medir_model(escala, disponiveis, min(args.operacoes, len(disponiveis)), args.semente)
+        if not args.sem_http:
+            resultados += medir_http(escala, disponiveis, args)
+    return {
+        "meta": {
+            "commit": _commit(),
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "semente": args.semente,
+            "operacoes": args.operacoes,
+            "requisicoes": args.requisicoes,
+            "clientes": args.clientes,
+            "modo": args.modo,
+            "workers": args.workers,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(base, novo, tolerancia):
+    """
+    Compara dois resultados por (escala, operação).
+
+    Returns:
+        (linhas de texto, quantidade de regressões)
+    """
+    anteriores = {(r["escala"], r["operacao"]): r for r in base["resultados"]}
+    linhas = [f"base {base['meta'].get('commit')} -> novo {novo['meta'].get('commit')} "
+              f"(tolerância {tolerancia:.0%})",
+              f"{'escala':>9}  {'operacao':<42} {'p99 base':>10} {'p99 novo':>10} {'ops/s base':>11} {'ops/s novo':>11}  "]
+    regressoes = 0
+    for r in novo["resultados"]:
+        anterior = anteriores.get((r["escala"], r["operacao"]))
+        if anterior is None:
+            continue
+        piorou = []
+        if anterior["p99_us"] and r["p99_us"] > anterior["p99_us"] * (1 + tolerancia):
+            piorou.append("p99")
+        if anterior["por_segundo"] and r["por_segundo"] < anterior["por_segundo"] * (1 - tolerancia):
+            piorou.append("vazão")
+        regressoes += bool(piorou)
+        linhas.append(f"{r['escala']:>9}  {r['operacao']:<42} {anterior['p99_us']:>10.1f} {r['p99_us']:>10.1f} "
+                      f"{anterior['por_segundo']:>11.1f} {r['por_segundo']:>11.1f}  "
+                      + ("REGRESSÃO (" + ", ".join(piorou) + ")" if piorou else "ok"))
+    return linhas, regressoes
+
+
+def _escalas(texto):
+    return [int(float(parte)) for parte in texto.split(",") if parte.strip()]
+
+
+def _ler(caminho):
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escalas", type=_escalas, default=[1000, 10000, 100000],
+                        help="tamanhos de catálogo/histórico, separados por vírgula (aceita 1e6)")
+    parser.add_argument("--operacoes", type=int, default=2000, help="chamadas por operação do model")
+    parser.add_argument("--requisicoes", type=int, default=2000, help="requisições HTTP por cenário")
+    parser.add_argument("--clientes", type=int, default=8, help="clientes HTTP concorrentes")
+    parser.add_argument("--modo", choices=("threads", "asyncio"), default="threads")
+    parser.add_argument("--workers", type=int, default=servidor.WORKERS_PADRAO)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--sem-http", action="store_true", help="mede apenas o model")
+    parser.add_argument("--saida", metavar="ARQUIVO", help="grava o resultado JSON neste arquivo")
+    parser.add_argument("--base", metavar="ARQUIVO", help="compara o resultado com este JSON anterior")
+    parser.add_argument("--comparar", nargs=2, metavar=("BASE", "NOVO"),
+                        help="apenas compara dois resultados já gravados")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="piora relativa aceita antes de acusar regressão")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        base, novo = (_ler(caminho) for caminho in args.comparar)
+    else:
+        novo = executar(args)
+        texto = json.dumps(novo, indent=2, ensure_ascii=False)
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as arquivo:
+                arquivo.write(texto + "\n")
+        print(texto)
+        if not args.base:
+            return 0
+        base = _ler(args.base)
+    linhas, regressoes = comparar(base, novo, args.tolerancia)
+    print("\n".join(linhas), file=sys.stderr if not args.comparar else sys.stdout)
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
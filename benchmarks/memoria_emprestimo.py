@@ -0,0 +1,75 @@
+"""Benchmark de memória: bytes por empréstimo em `modulo_emprestimo.Emprestimo`.
+
+Compara a representação atual (__slots__, datas como inteiros, status como
+código) com o layout anterior (objeto com __dict__ e dois datetime).
+
+Uso:
+    python benchmarks/memoria_emprestimo.py [--quantidade 200000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import modulo_emprestimo
+
+
+class EmprestimoDict:
+    """Layout anterior do Emprestimo, mantido aqui apenas para comparação."""
+
+    def __init__(self, user_id, book_id, loan_id, loan_date, due_date, status="ACTIVE", return_date=None, fine=0.0):
+        self._user_id = user_id
+        self._book_id = book_id
+        self._loan_id = loan_id
+        self._loan_date = loan_date
+        self._due_date = due_date
+        self._return_date = return_date
+        self._status = status
+        self._fine = fine
+
+
+def medir(classe, quantidade):
+    """Retorna quantos bytes, em média, cada empréstimo ocupa."""
+    base = datetime(2025, 1, 1, 8, 0, 0)
+    tracemalloc.start()
+    inicio, _ = tracemalloc.get_traced_memory()
+    objetos = []
+    for i in range(quantidade):
+        # Datas distintas por empréstimo, como no uso real
+        data = base + timedelta(seconds=i * 37)
+        objetos.append(classe(
+            user_id=i % 50000,
+            book_id=i % 500000,
+            loan_id=i + 1,
+            loan_date=data,
+            due_date=data + timedelta(days=14),
+        ))
+    fim, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Desconta a lista que guarda os objetos (8 bytes por referência)
+    return (fim - inicio - sys.getsizeof(objetos)) / quantidade
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quantidade", type=int, default=200000)
+    args = parser.parse_args(argv)
+
+    resultado = {
+        "quantidade": args.quantidade,
+        "bytes_por_emprestimo": {
+            "slots": round(medir(modulo_emprestimo.Emprestimo, args.quantidade), 1),
+            "dict": round(medir(EmprestimoDict, args.quantidade), 1),
+        },
+    }
+    print(json.dumps(resultado, indent=2))
+    return resultado
+
+
+if __name__ == "__main__":
+    main()
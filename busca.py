@@ -0,0 +1,269 @@
+"""Índice invertido para busca textual no catálogo (título e autor).
+
+Cada termo aponta para os livros em que aparece, com um peso por livro
+(ocorrências no título valem mais que no autor, e campos curtos mais que
+longos). Uma consulta:
+
+- é normalizada como os textos indexados: sem acentos nem diferença entre
+  maiúsculas e minúsculas ("Programação" casa com "programacao");
+- exige todos os termos (E lógico);
+- trata o último termo como prefixo ("engenharia de so" encontra
+  "Engenharia de Software"), para autocompletar enquanto se digita;
+- é ordenada por relevância: peso do termo no livro vezes sua raridade no
+  catálogo (idf). Termos completados por prefixo valem menos que exatos.
+
+Os termos ficam também numa lista ordenada, de modo que um prefixo é
+expandido com busca binária; a expansão é limitada a MAX_EXPANSAO termos
+para que prefixos de uma letra não custem o vocabulário inteiro. Só os
+`limite` melhores resultados são ordenados (heap).
+
+Livros são incluídos, trocados e removidos individualmente, sem reconstruir
+o índice.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Peso de cada campo indexado
+PESOS_CAMPOS = {"titulo": 2.0, "autor": 1.0}
+
+# Máximo de termos considerados na expansão de um prefixo
+MAX_EXPANSAO = 256
+
+# Fator aplicado aos termos encontrados apenas por prefixo
+FATOR_PREFIXO = 0.5
+
+# Consultas recentes guardadas (descartadas a cada alteração do índice)
+TAMANHO_CACHE = 1024
+
+# Letras e dígitos (o "_" separa termos, como no tokenizador do SQLite)
+_TERMO = re.compile(r"[^\W_]+")
+
+
+def normalizar(texto):
+    """Remove acentos e diferença entre maiúsculas e minúsculas."""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def melhores(pontuacoes, limite):
+    """Os `limite` pares (doc_id, pontuação) mais bem pontuados, em ordem."""
+    return heapq.nsmallest(limite, pontuacoes.items(), key=lambda item: (-item[1], item[0]))
+
+
+def termos(texto):
+    """Lista de termos normalizados de `texto` (None ou "" resulta em [])."""
+    if not texto:
+        return []
+    return _TERMO.findall(normalizar(texto))
+
+
+class IndiceTextual:
+    """Índice invertido de documentos com campos `titulo` e `autor`."""
+
+    def __init__(self, pesos=PESOS_CAMPOS):
+        self.pesos = dict(pesos)
+        self._lock = threading.Lock()
+        self._postagens = {}    # termo -> {doc_id: peso}
+        self._ordenadas = {}    # termo -> doc_ids do maior peso para o menor
+        self._termos_doc = {}   # doc_id -> termos do documento
+        self._vocabulario = []  # termos em ordem, para busca por prefixo
+        self._cache = OrderedDict()  # (termos, limite) -> resultado
+
+    def __len__(self):
+        return len(self._termos_doc)
+
+    def _pesos_documento(self, titulo, autor):
+        """{termo: peso} de um documento."""
+        pesos = {}
+        for texto, peso_campo in ((titulo, self.pesos["titulo"]), (autor, self.pesos["autor"])):
+            lista = termos(texto)
+            if not lista:
+                continue
+            # Campos curtos: cada termo representa uma parte maior do campo
+            peso = peso_campo / math.sqrt(len(lista))
+            for termo in lista:
+                pesos[termo] = pesos.get(termo, 0.0) + peso
+        return pesos
+
+    def _ordem(self, termo):
+        """Chave da lista ordenada de `termo`: maior peso, depois menor id."""
+        postagens = self._postagens[termo]
+        return lambda doc_id: (-postagens[doc_id], doc_id)
+
+    def _remover(self, doc_id):
+        self._cache.clear()
+        for termo in self._termos_doc.pop(doc_id, ()):
+            postagens = self._postagens[termo]
+            if len(postagens) == 1:
+                del self._postagens[termo]
+                del self._ordenadas[termo]
+                del self._vocabulario[bisect.bisect_left(self._vocabulario, termo)]
+                continue
+            ordenada = self._ordenadas[termo]
+            del ordenada[bisect.bisect_left(ordenada, (-postagens[doc_id], doc_id), key=self._ordem(termo))]
+            del postagens[doc_id]
+
+    def adicionar(self, doc_id, titulo, autor=None):
+        """Indexa (ou reindexa) o documento `doc_id`."""
+        pesos = self._pesos_documento(titulo, autor)
+        with self._lock:
+            self._remover(doc_id)
+            for termo, peso in pesos.items():
+                postagens = self._postagens.get(termo)
+                if postagens is None:
+                    self._postagens[termo] = {doc_id: peso}
+                    self._ordenadas[termo] = [doc_id]
+                    bisect.insort(self._vocabulario, termo)
+                    continue
+                postagens[doc_id] = peso
+                bisect.insort(self._ordenadas[termo], doc_id, key=self._ordem(termo))
+            self._termos_doc[doc_id] = tuple(pesos)
+
+    def remover(self, doc_id):
+        """Retira o documento do índice (se estiver indexado)."""
+        with self._lock:
+            self._remover(doc_id)
+
+    def construir(self, documentos):
+        """
+        Substitui o conteúdo do índice pelos `documentos`, em lote.
+
+        Args:
+            documentos: iterável de (doc_id, titulo, autor)
+        """
+        postagens = {}
+        termos_doc = {}
+        for doc_id, titulo, autor in documentos:
+            pesos = self._pesos_documento(titulo, autor)
+            for termo, peso in pesos.items():
+                postagens.setdefault(termo, {})[doc_id] = peso
+            termos_doc[doc_id] = tuple(pesos)
+        ordenadas = {}
+        for termo, docs in postagens.items():
+            ordenadas[termo] = sorted(docs, key=lambda doc_id: (-docs[doc_id], doc_id))
+        with self._lock:
+            self._postagens = postagens
+            self._ordenadas = ordenadas
+            self._termos_doc = termos_doc
+            self._vocabulario = sorted(postagens)
+            self._cache.clear()
+
+    def limpar(self):
+        with self._lock:
+            self._postagens = {}
+            self._ordenadas = {}
+            self._termos_doc = {}
+            self._vocabulario = []
+            self._cache.clear()
+
+    def _expandir(self, prefixo):
+        """Termos do vocabulário que começam com `prefixo` (até MAX_EXPANSAO)."""
+        inicio = bisect.bisect_left(self._vocabulario, prefixo)
+        teto = min(len(self._vocabulario), inicio + MAX_EXPANSAO)
+        fim = bisect.bisect_left(self._vocabulario, prefixo + "\U0010ffff", inicio, teto)
+        return self._vocabulario[inicio:fim]
+
+    def _candidatos(self, termo, prefixo, total):
+        """[(termo do índice, fator)] que casam com um termo da consulta."""
+        encontrados = [termo] if termo in self._postagens else []
+        if prefixo:
+            encontrados += [t for t in self._expandir(termo) if t != termo]
+        candidatos = []
+        for encontrado in encontrados:
+            idf = math.log(1.0 + total / len(self._postagens[encontrado]))
+            candidatos.append((encontrado, idf if encontrado == termo else idf * FATOR_PREFIXO))
+        return candidatos
+
+    def _melhores_de(self, candidatos, limite):
+        """
+        Consulta de um só termo: basta ler os `limite` primeiros documentos
+        de cada termo candidato (as listas já estão em ordem de peso), em vez
+        de pontuar todas as postagens.
+        """
+        resultado = {}
+        for termo, fator in candidatos:
+            postagens = self._postagens[termo]
+            for doc_id in self._ordenadas[termo][:limite]:
+                valor = postagens[doc_id] * fator
+                if valor > resultado.get(doc_id, 0.0):
+                    resultado[doc_id] = valor
+        return resultado
+
+    def _pontuar(self, por_termo):
+        """{doc_id: pontuação} dos documentos que casam com todos os termos."""
+        # Interseção a partir do termo mais seletivo: os demais só são
+        # consultados para os documentos que ainda restam
+        por_termo.sort(key=lambda candidatos: sum(len(self._postagens[t]) for t, _ in candidatos))
+        resultado = {}
+        for termo, fator in por_termo[0]:
+            for doc_id, peso in self._postagens[termo].items():
+                if peso * fator > resultado.get(doc_id, 0.0):
+                    resultado[doc_id] = peso * fator
+        for candidatos in por_termo[1:]:
+            postagens = [(self._postagens[t], fator) for t, fator in candidatos]
+            filtrado = {}
+            for doc_id, valor in resultado.items():
+                melhor = max((p[doc_id] * fator for p, fator in postagens if doc_id in p), default=None)
+                if melhor is not None:
+                    filtrado[doc_id] = valor + melhor
+            resultado = filtrado
+        return resultado
+
+    def _candidatos_consulta(self, lista):
+        total = len(self._termos_doc)
+        return [self._candidatos(termo, i == len(lista) - 1, total) for i, termo in enumerate(lista)]
+
+    def encontrar(self, consulta):
+        """
+        Todos os documentos que casam com `consulta`, sem ordenar (para
+        filtrar antes de escolher os melhores).
+
+        Returns:
+            dict {doc_id: pontuação}
+        """
+        lista = termos(consulta)
+        if not lista:
+            return {}
+        with self._lock:
+            por_termo = self._candidatos_consulta(lista)
+            return self._pontuar(por_termo) if all(por_termo) else {}
+
+    def buscar(self, consulta, limite=20):
+        """
+        Busca `consulta` (o último termo é prefixo).
+
+        Consultas repetidas (comuns no autocompletar: todos digitam as mesmas
+        primeiras letras) são respondidas de um cache, descartado quando o
+        índice muda.
+
+        Returns:
+            lista de (doc_id, pontuação), da mais relevante para a menos
+            (empates pelo menor doc_id)
+        """
+        lista = termos(consulta)
+        if not lista or limite <= 0:
+            return []
+        chave = (" ".join(lista), limite)
+        with self._lock:
+            guardado = self._cache.get(chave)
+            if guardado is not None:
+                self._cache.move_to_end(chave)
+                return list(guardado)
+            por_termo = self._candidatos_consulta(lista)
+            if not all(por_termo):
+                resultado = {}
+            elif len(por_termo) == 1:
+                resultado = self._melhores_de(por_termo[0], limite)
+            else:
+                resultado = self._pontuar(por_termo)
+            encontrados = melhores(resultado, limite)
+            self._cache[chave] = encontrados
+            if len(self._cache) > TAMANHO_CACHE:
+                self._cache.popitem(last=False)
+        return list(encontrados)
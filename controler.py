@@ -3,32 +3,114 @@
 O Controller mantém a interface esperada pela View e pelos testes, mas não
 reimplementa regras de negócio. Isso evita duplicação e mantém o modelo como
 fonte única da verdade.
+
+O armazenamento é plugável: por padrão o Controller usa os módulos em memória
+(`repositorio.RepositorioMemoria`); com `usar_repositorio` ele passa a usar
+outro backend com o mesmo contrato, como `repositorio_sqlite.RepositorioSQLite`.
 """
 
-import modulo_emprestimo
+import metricas
+import modulo_relatorio
+from repositorio import RepositorioMemoria
 
 
 class Controller:
-    def __init__(self):
+    def __init__(self, repositorio=None):
         # Não mantemos estado local de empréstimos aqui. O estado é mantido
-        # em `modulo_emprestimo`.
-        pass
+        # pelo repositório (por padrão, `modulo_emprestimo` e os mocks).
+        self.repositorio = repositorio or RepositorioMemoria()
+
+    def usar_repositorio(self, repositorio):
+        """Troca o backend de armazenamento usado pelo controller."""
+        self.repositorio = repositorio
 
     def verificar_disponibilidade(self, book_id):
         """Retorna informações do livro (ou dicionário de erro) delegando ao model."""
-        return modulo_emprestimo.verificar_disponibilidade(book_id)
+        return self.repositorio.verificar_disponibilidade(book_id)
 
     def registrar_emprestimo(self, user_id, book_id):
         """Tenta criar um empréstimo delegando ao model."""
-        return modulo_emprestimo.adicionar_emprestimo(user_id, book_id)
+        resultado = self.repositorio.adicionar_emprestimo(user_id, book_id)
+        if resultado.get("sucesso"):
+            metricas.registro.incrementar("emprestimos_criados")
+        return resultado
 
     def registrar_devolucao(self, loan_id):
         """Registra devolução delegando ao model."""
-        return modulo_emprestimo.registrar_devolucao(loan_id)
+        resultado = self.repositorio.registrar_devolucao(loan_id)
+        if resultado.get("sucesso"):
+            metricas.registro.incrementar("devolucoes_processadas")
+        return resultado
+
+    def registrar_emprestimos(self, pares):
+        """Registra vários empréstimos [(user_id, book_id), ...] de uma vez."""
+        resultados = self.repositorio.registrar_emprestimos(pares)
+        metricas.registro.incrementar("emprestimos_criados", sum(1 for r in resultados if r.get("sucesso")))
+        return resultados
+
+    def registrar_devolucoes(self, loan_ids):
+        """Registra várias devoluções de uma vez; um resultado por ID."""
+        resultados = self.repositorio.registrar_devolucoes(loan_ids)
+        metricas.registro.incrementar("devolucoes_processadas", sum(1 for r in resultados if r.get("sucesso")))
+        return resultados
 
     def get_emprestimos(self):
         """Retorna a lista de empréstimos (representada pelo model)."""
-        return modulo_emprestimo.get_emprestimos()
+        return self.repositorio.get_emprestimos()
+
+    def iterar_emprestimos(self, status=None, inicio=None, fim=None):
+        """Gera os empréstimos do histórico, filtrados, sem montar a lista."""
+        return self.repositorio.iterar_emprestimos(status=status, inicio=inicio, fim=fim)
+
+    def get_emprestimo_by_id(self, loan_id):
+        """Retorna um empréstimo (dict) ou None."""
+        return self.repositorio.get_emprestimo_by_id(loan_id)
+
+    def listar_emprestimos(self, status=None, user_id=None, book_id=None, offset=0, limite=50):
+        """Retorna uma página de empréstimos filtrados (veja o model)."""
+        return self.repositorio.listar_emprestimos(
+            status=status, user_id=user_id, book_id=book_id, offset=offset, limite=limite
+        )
+
+    def listar_atrasados(self, agora=None, offset=0, limite=50):
+        """Retorna uma página dos empréstimos atrasados em `agora`, com multa."""
+        return self.repositorio.listar_atrasados(agora=agora, offset=offset, limite=limite)
+
+    def proximos_vencimentos(self, k=10, agora=None):
+        """Retorna os k empréstimos ativos que vencem primeiro a partir de `agora`."""
+        return self.repositorio.proximos_vencimentos(k=k, agora=agora)
+
+    def aplicar_multas(self, agora=None):
+        """Grava nos empréstimos atrasados a multa acumulada (tarefa periódica)."""
+        return self.repositorio.aplicar_multas(agora=agora)
+
+    def get_estatisticas(self):
+        """Retorna os contadores do painel (ativos, devolvidos, total)."""
+        return self.repositorio.get_estatisticas()
+
+    def get_versao(self):
+        """Retorna a versão dos dados (muda a cada alteração; usada em ETags)."""
+        return self.repositorio.get_versao()
+
+    def get_relatorios(self, k=5):
+        """Retorna os relatórios (top livros, top usuários, ocupação)."""
+        return modulo_relatorio.gerar_relatorios(k, self.repositorio)
+
+    def listar_usuarios(self):
+        """Retorna todos os usuários cadastrados."""
+        return self.repositorio.listar_usuarios()
+
+    def listar_livros_disponiveis(self):
+        """Retorna os livros disponíveis para empréstimo."""
+        return self.repositorio.listar_livros_disponiveis()
+
+    def listar_livros_por_status(self, status, consulta=None, offset=0, limite=50):
+        """Retorna uma página dos livros com `status`, opcionalmente filtrada por busca."""
+        return self.repositorio.listar_livros_por_status(status, consulta=consulta, offset=offset, limite=limite)
+
+    def buscar_livros(self, consulta, limite=20):
+        """Busca livros por título e autor (o último termo vale como prefixo)."""
+        return self.repositorio.buscar_livros(consulta, limite)
 
     def run(self, debug=True, port=5000):
         # Método de conveniência para compatibilidade com a API anterior.
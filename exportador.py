@@ -0,0 +1,254 @@
+"""Exportação do histórico de empréstimos em CSV, JSON Lines ou Arrow.
+
+O histórico é lido em fluxo (`iterar_emprestimos` do repositório) e
+convertido em blocos de bytes, lote a lote: a memória usada depende do
+tamanho do lote, não do histórico. `exportar` é um gerador, consumido tanto
+pela API (`GET /api/emprestimos/exportar`, enviada com Transfer-Encoding:
+chunked) quanto pela linha de comando.
+
+Formatos:
+
+- csv: primeira linha com os nomes das colunas; returnDate vazio se o
+  empréstimo está ativo.
+- jsonl: um objeto por linha, igual ao da API.
+- arrow: formato de stream do Apache Arrow (IPC), colunar, lido direto por
+  pandas, polars e DuckDB. Exige o pacote pyarrow; sem ele o formato não é
+  oferecido.
+
+Filtros: status e intervalo de datas do empréstimo (`de` inclusive, `ate`
+inclusive; uma data sem hora em `ate` inclui o dia inteiro).
+
+Uso:
+    python exportador.py csv emprestimos.csv --de 2024-01-01 --ate 2024-12-31 --dados dados/
+    python exportador.py arrow - --status RETURNED --backend sqlite --banco biblioteca.db > hist.arrows
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: serializador mais rápido
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # dependência opcional: formato arrow
+    pyarrow = None
+
+import persistencia
+import repositorio
+
+TAMANHO_LOTE_PADRAO = 1000
+
+COLUNAS = ("loanId", "userId", "bookId", "loanDate", "dueDate", "returnDate", "status", "fine")
+COLUNAS_DATA = ("loanDate", "dueDate", "returnDate")
+STATUS = ("ACTIVE", "RETURNED")
+
+# formato -> (Content-Type, extensão do arquivo)
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", ".csv"),
+    "jsonl": ("application/x-ndjson", ".jsonl"),
+    "arrow": ("application/vnd.apache.arrow.stream", ".arrows"),
+}
+
+
+def formatos_disponiveis():
+    """Formatos que podem ser gerados com as dependências instaladas."""
+    return tuple(formato for formato in FORMATOS if formato != "arrow" or pyarrow is not None)
+
+
+def intervalo(de=None, ate=None):
+    """
+    Converte os limites de data (texto ISO 8601) em (inicio, fim), com `fim`
+    exclusivo, como espera `iterar_emprestimos`.
+
+    Raises:
+        ValueError: data inválida ou intervalo invertido
+    """
+    inicio = fim = None
+    if de:
+        inicio = ler_data(de, "de")
+    if ate:
+        fim = ler_data(ate, "ate")
+        # Só a data: o dia inteiro entra
+        fim += timedelta(days=1) if len(ate.strip()) == 10 else timedelta(microseconds=1)
+    if inicio is not None and fim is not None and inicio >= fim:
+        raise ValueError("de deve ser anterior a ate")
+    return inicio, fim
+
+
+def ler_data(valor, nome):
+    """
+    Converte uma data ISO (AAAA-MM-DD ou AAAA-MM-DDTHH:MM:SS) em datetime
+    local, sem fuso. Lança ValueError citando `nome` se o valor for inválido.
+    """
+    try:
+        data = datetime.fromisoformat(valor.strip())
+    except ValueError:
+        raise ValueError(f"{nome} deve ser uma data (AAAA-MM-DD ou AAAA-MM-DDTHH:MM:SS)")
+    # As datas dos empréstimos são locais, sem fuso
+    return data.replace(tzinfo=None)
+
+
+def _lotes(emprestimos, tamanho):
+    iterador = iter(emprestimos)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+# ========== FORMATOS ==========
+
+def _csv(lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator="\n")
+    escritor.writerow(COLUNAS)
+    yield buffer.getvalue().encode("utf-8")
+    for lote in lotes:
+        buffer.seek(0)
+        buffer.truncate()
+        escritor.writerows([emp[coluna] for coluna in COLUNAS] for emp in lote)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl(lotes):
+    for lote in lotes:
+        if orjson is not None:
+            yield b"".join(orjson.dumps(emp) + b"\n" for emp in lote)
+        else:
+            yield "".join(json.dumps(emp, ensure_ascii=False) + "\n" for emp in lote).encode("utf-8")
+
+
+class _Saida:
+    """Arquivo só de escrita que entrega os bytes recebidos a cada `retirar`."""
+
+    closed = False
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self):
+        dados = b"".join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _esquema_arrow():
+    data = pyarrow.timestamp("us")
+    tipos = {"loanId": pyarrow.int64(), "userId": pyarrow.int64(), "bookId": pyarrow.int64(),
+             "loanDate": data, "dueDate": data, "returnDate": data,
+             "status": pyarrow.string(), "fine": pyarrow.float64()}
+    return pyarrow.schema([(coluna, tipos[coluna]) for coluna in COLUNAS])
+
+
+def _arrow(lotes):
+    esquema = _esquema_arrow()
+    saida = _Saida()
+    escritor = pyarrow.ipc.new_stream(saida, esquema)
+    yield saida.retirar()
+    for lote in lotes:
+        colunas = []
+        for coluna in COLUNAS:
+            valores = [emp[coluna] for emp in lote]
+            if coluna in COLUNAS_DATA:
+                valores = [datetime.fromisoformat(v) if v is not None else None for v in valores]
+            colunas.append(pyarrow.array(valores, esquema.field(coluna).type))
+        escritor.write_batch(pyarrow.record_batch(colunas, schema=esquema))
+        yield saida.retirar()
+    escritor.close()
+    yield saida.retirar()
+
+
+_GERADORES = {"csv": _csv, "jsonl": _jsonl, "arrow": _arrow}
+
+
+def exportar(emprestimos, formato, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    """
+    Converte `emprestimos` (dicts de `Emprestimo.to_dict`, em qualquer
+    iterável) no `formato`, lote a lote.
+
+    Yields:
+        bytes: partes consecutivas do arquivo
+
+    Raises:
+        ValueError: formato desconhecido ou indisponível (na chamada, antes
+            de qualquer parte)
+    """
+    if formato not in formatos_disponiveis():
+        raise ValueError(f"Formato indisponível: {formato} (use {', '.join(formatos_disponiveis())})")
+    return _GERADORES[formato](_lotes(emprestimos, tamanho_lote))
+
+
+# ========== LINHA DE COMANDO ==========
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("formato", choices=formatos_disponiveis())
+    parser.add_argument("arquivo", help='arquivo de saída ("-" para a saída padrão)')
+    parser.add_argument("--status", choices=STATUS)
+    parser.add_argument("--de", help="data inicial do empréstimo (inclusive)")
+    parser.add_argument("--ate", help="data final do empréstimo (inclusive)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="empréstimos por lote")
+    parser.add_argument("--backend", choices=repositorio.BACKENDS, default="memoria")
+    parser.add_argument("--banco", default="biblioteca.db", help="arquivo do banco (backend sqlite)")
+    parser.add_argument("--dados", metavar="DIRETORIO",
+                        help="backend memória: lê (sem alterar) o snapshot e o journal deste diretório")
+    args = parser.parse_args(argv)
+    if args.lote < 1:
+        parser.error("--lote deve ser positivo")
+    if args.backend == "memoria" and not args.dados:
+        parser.error("com o backend memória, informe --dados com o histórico a exportar")
+    if args.backend != "memoria" and args.dados:
+        parser.error("--dados vale apenas para o backend memória")
+    if args.dados and not os.path.isdir(args.dados):
+        parser.error(f"diretório não encontrado: {args.dados}")
+    try:
+        inicio, fim = intervalo(args.de, args.ate)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.dados:
+        # Só leitura: pode rodar ao lado do servidor que escreve no journal
+        persistencia.Journal(args.dados).restaurar()
+    repo = repositorio.criar_repositorio(args.backend, args.banco)
+    saida = sys.stdout.buffer if args.arquivo == "-" else open(args.arquivo, "wb")
+    try:
+        emprestimos = repo.iterar_emprestimos(status=args.status, inicio=inicio, fim=fim, lote=args.lote)
+        for parte in exportar(emprestimos, args.formato, args.lote):
+            saida.write(parte)
+    except OSError as e:
+        parser.exit(2, f"Erro: {e}\n")
+    finally:
+        if saida is not sys.stdout.buffer:
+            saida.close()
+        repo.fechar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
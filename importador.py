@@ -0,0 +1,388 @@
+"""Importação em massa de livros e usuários a partir de CSV ou JSON Lines.
+
+O arquivo é lido em fluxo, registro a registro: a memória usada depende do
+tamanho do lote, não do arquivo. Cada lote de registros é interpretado e
+validado, e os válidos são gravados de uma vez (`adicionar_livros` /
+`adicionar_usuarios` do repositório: uma trava ou uma transação por lote).
+
+Registros inválidos não interrompem a importação: cada um vira um erro com
+o número da linha no arquivo. Os primeiros MAX_ERROS_GUARDADOS ficam no
+relatório; todos podem ser gravados em `saida_erros` (JSON Lines).
+
+Com `processos` > 1, a interpretação e a validação dos lotes são feitas em
+paralelo por um pool de processos; o processo principal apenas separa os
+registros e grava os lotes, na ordem do arquivo. No máximo 2 lotes por
+processo ficam pendentes, mantendo a memória limitada.
+
+Formatos (pela extensão, ou `formato`):
+
+- CSV (.csv): primeira linha com os nomes das colunas; campos entre aspas
+  podem conter quebras de linha.
+- JSON Lines (.jsonl, .ndjson): um objeto por linha.
+
+Colunas de livros: bookId, titulo, autor (opcional), status (opcional:
+sem ele, um livro já cadastrado mantém o status atual e um novo fica
+"disponivel"). Um status que contradiga os empréstimos (livro emprestado
+marcado "disponivel", ou o contrário) é recusado como erro da linha, então
+reimportar o catálogo não libera livros emprestados. De usuários: userId,
+nome, tipo, email.
+
+Uso:
+    python importador.py livros acervo.csv [--backend sqlite --banco biblioteca.db]
+    python importador.py usuarios alunos.jsonl --dados dados/ --processos 4
+
+Com --dados (backend memória) a importação grava no journal do diretório,
+que só um processo usa por vez: pare o `main.py --dados` que usa o mesmo
+diretório antes de importar (senão a importação termina com erro, sem
+gravar nada). Com o servidor no ar, use o backend sqlite.
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+import persistencia
+import repositorio
+
+TAMANHO_LOTE_PADRAO = 5000
+MAX_ERROS_GUARDADOS = 1000
+# Linhas físicas que um registro CSV (campo entre aspas com quebras de
+# linha) pode ocupar: limita a memória se uma aspa nunca for fechada
+MAX_LINHAS_POR_REGISTRO = 100
+
+STATUS_LIVRO = ("disponivel", "emprestado")
+TIPOS_USUARIO = ("aluno", "professor")
+
+FORMATOS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# tipo -> (colunas obrigatórias, função do repositório que grava o lote)
+TIPOS = {
+    "livros": (("bookId", "titulo"), "adicionar_livros"),
+    "usuarios": (("userId", "nome", "tipo", "email"), "adicionar_usuarios"),
+}
+
+
+# ========== VALIDAÇÃO ==========
+
+def _id(registro, campo):
+    valor = registro.get(campo)
+    if isinstance(valor, bool):
+        raise ValueError(f"{campo} deve ser um inteiro positivo")
+    try:
+        numero = int(str(valor).strip()) if not isinstance(valor, int) else valor
+    except ValueError:
+        raise ValueError(f"{campo} deve ser um inteiro positivo")
+    if numero < 1:
+        raise ValueError(f"{campo} deve ser um inteiro positivo")
+    return numero
+
+
+def _texto(registro, campo, obrigatorio=True):
+    valor = registro.get(campo)
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        if obrigatorio:
+            raise ValueError(f"{campo} é obrigatório")
+        return None
+    if not isinstance(valor, str):
+        raise ValueError(f"{campo} deve ser texto")
+    return valor.strip()
+
+
+def validar_livro(registro):
+    """
+    Converte um registro no formato de `adicionar_livros`.
+
+    Returns:
+        (book_id, titulo, autor, status); status None se não informado
+
+    Raises:
+        ValueError: com a descrição do problema
+    """
+    status = _texto(registro, "status", obrigatorio=False)
+    if status is not None and status not in STATUS_LIVRO:
+        raise ValueError(f"status deve ser {' ou '.join(STATUS_LIVRO)}")
+    return _id(registro, "bookId"), _texto(registro, "titulo"), _texto(registro, "autor", False), status
+
+
+def validar_usuario(registro):
+    """
+    Converte um registro no formato de `adicionar_usuarios`.
+
+    Returns:
+        (user_id, nome, tipo, email)
+
+    Raises:
+        ValueError: com a descrição do problema
+    """
+    tipo = _texto(registro, "tipo")
+    if tipo not in TIPOS_USUARIO:
+        raise ValueError(f"tipo deve ser {' ou '.join(TIPOS_USUARIO)}")
+    email = _texto(registro, "email")
+    if "@" not in email:
+        raise ValueError("email inválido")
+    return _id(registro, "userId"), _texto(registro, "nome"), tipo, email
+
+
+VALIDADORES = {"livros": validar_livro, "usuarios": validar_usuario}
+
+
+# ========== LEITURA ==========
+
+def detectar_formato(caminho):
+    """Formato ("csv" ou "jsonl") pela extensão do arquivo."""
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao not in FORMATOS:
+        raise ValueError(f"Formato desconhecido para {caminho}: use .csv, .jsonl ou .ndjson")
+    return FORMATOS[extensao]
+
+
+def _registros_brutos(arquivo, formato, primeira_linha=1):
+    """
+    Gera (número da linha, texto) de cada registro do arquivo, sem
+    interpretá-lo. No CSV, um registro continua na linha seguinte enquanto
+    houver aspas abertas (campo com quebra de linha).
+    """
+    inicio, partes, aspas = None, [], 0
+    for numero, linha in enumerate(arquivo, primeira_linha):
+        if formato == "jsonl":
+            if linha.strip():
+                yield numero, linha
+            continue
+        if not partes:
+            inicio = numero
+        partes.append(linha)
+        aspas += linha.count('"')
+        if aspas % 2 == 0 or len(partes) >= MAX_LINHAS_POR_REGISTRO:
+            texto = "".join(partes)
+            if texto.strip():
+                yield inicio, texto
+            partes, aspas = [], 0
+    if partes:
+        yield inicio, "".join(partes)
+
+
+def _lotes(registros, tamanho):
+    lote = []
+    for registro in registros:
+        lote.append(registro)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _interpretar(texto, formato, colunas):
+    if formato == "jsonl":
+        try:
+            registro = json.loads(texto)
+        except ValueError:
+            raise ValueError("JSON inválido")
+        if not isinstance(registro, dict):
+            raise ValueError("cada linha deve ser um objeto JSON")
+        return registro
+    valores = next(csv.reader(io.StringIO(texto)))
+    if len(valores) != len(colunas):
+        raise ValueError(f"esperadas {len(colunas)} colunas, encontradas {len(valores)}")
+    return dict(zip(colunas, valores))
+
+
+def processar_lote(tipo, formato, colunas, lote):
+    """
+    Interpreta e valida um lote de registros brutos (roda nos processos do
+    pool quando há paralelismo).
+
+    Returns:
+        (lista de (linha, registro válido), lista de (linha, mensagem de erro))
+    """
+    validar = VALIDADORES[tipo]
+    validos, erros = [], []
+    for linha, texto in lote:
+        try:
+            validos.append((linha, validar(_interpretar(texto, formato, colunas))))
+        except ValueError as e:
+            erros.append((linha, str(e)))
+    return validos, erros
+
+
+# ========== IMPORTAÇÃO ==========
+
+class Relatorio:
+    """Andamento e resultado de uma importação."""
+
+    def __init__(self, tipo, caminho):
+        self.tipo = tipo
+        self.caminho = caminho
+        self.registros = 0
+        self.importados = 0
+        self.erros = 0
+        self.primeiros_erros = []  # [{"linha", "erro"}], até MAX_ERROS_GUARDADOS
+        self.inicio = time.perf_counter()
+        self.segundos = 0.0
+
+    @property
+    def registros_por_segundo(self):
+        return self.registros / self.segundos if self.segundos else 0.0
+
+    def to_dict(self):
+        return {
+            "tipo": self.tipo,
+            "arquivo": self.caminho,
+            "registros": self.registros,
+            "importados": self.importados,
+            "erros": self.erros,
+            "primeiros_erros": list(self.primeiros_erros),
+            "segundos": round(self.segundos, 3),
+            "registros_por_segundo": round(self.registros_por_segundo, 1),
+        }
+
+
+def _colunas_csv(arquivo, obrigatorias):
+    """Lê o cabeçalho do CSV e confere as colunas."""
+    cabecalho = arquivo.readline()
+    colunas = [coluna.strip() for coluna in next(csv.reader([cabecalho]), [])]
+    ausentes = [coluna for coluna in obrigatorias if coluna not in colunas]
+    if ausentes:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(ausentes)}")
+    return colunas
+
+
+def _resultados(tipo, formato, colunas, lotes, processos):
+    """Resultados de `processar_lote` na ordem dos lotes (em paralelo se processos > 1)."""
+    if processos <= 1:
+        for lote in lotes:
+            yield len(lote), processar_lote(tipo, formato, colunas, lote)
+        return
+    with Pool(processos) as pool:
+        pendentes = deque()
+        for lote in lotes:
+            pendentes.append((len(lote), pool.apply_async(processar_lote, (tipo, formato, colunas, lote))))
+            if len(pendentes) >= 2 * processos:
+                quantidade, resultado = pendentes.popleft()
+                yield quantidade, resultado.get()
+        while pendentes:
+            quantidade, resultado = pendentes.popleft()
+            yield quantidade, resultado.get()
+
+
+def importar(caminho, tipo, repo=None, formato=None, tamanho_lote=TAMANHO_LOTE_PADRAO,
+             processos=1, progresso=None, saida_erros=None):
+    """
+    Importa livros ou usuários de um arquivo CSV ou JSON Lines.
+
+    Args:
+        caminho: arquivo a importar
+        tipo: "livros" ou "usuarios"
+        repo: repositório de destino (padrão: os módulos em memória)
+        formato: "csv" ou "jsonl" (padrão: pela extensão)
+        tamanho_lote: registros validados e gravados de cada vez
+        processos: processos que interpretam e validam os lotes
+        progresso: função chamada com o Relatorio após cada lote gravado
+        saida_erros: arquivo de texto onde cada erro é escrito como uma
+            linha JSON {"linha", "erro"}
+
+    Returns:
+        Relatorio
+
+    Raises:
+        ValueError: tipo ou formato desconhecido, ou CSV sem as colunas
+            obrigatórias
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo desconhecido: {tipo} (use {' ou '.join(TIPOS)})")
+    obrigatorias, gravar = TIPOS[tipo]
+    formato = formato or detectar_formato(caminho)
+    gravar = getattr(repo or repositorio.RepositorioMemoria(), gravar)
+    relatorio = Relatorio(tipo, caminho)
+
+    # newline="": o módulo csv trata as quebras de linha dentro de aspas
+    with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+        colunas = _colunas_csv(arquivo, obrigatorias) if formato == "csv" else None
+        # No CSV a linha 1 é o cabeçalho
+        primeira_linha = 2 if formato == "csv" else 1
+        lotes = _lotes(_registros_brutos(arquivo, formato, primeira_linha), tamanho_lote)
+        for quantidade, (validos, erros) in _resultados(tipo, formato, colunas, lotes, processos):
+            importados = len(validos)
+            if validos:
+                # Registros recusados pelo repositório (ex.: status de livro
+                # que contradiz os empréstimos) também são erros da linha
+                recusados = gravar([registro for _, registro in validos])
+                if recusados:
+                    importados -= len(recusados)
+                    erros = sorted(erros + [(validos[posicao][0], mensagem) for posicao, mensagem in recusados])
+            relatorio.registros += quantidade
+            relatorio.importados += importados
+            relatorio.erros += len(erros)
+            for linha, mensagem in erros:
+                erro = {"linha": linha, "erro": mensagem}
+                if len(relatorio.primeiros_erros) < MAX_ERROS_GUARDADOS:
+                    relatorio.primeiros_erros.append(erro)
+                if saida_erros is not None:
+                    saida_erros.write(json.dumps(erro, ensure_ascii=False) + "\n")
+            relatorio.segundos = time.perf_counter() - relatorio.inicio
+            if progresso is not None:
+                progresso(relatorio)
+    relatorio.segundos = time.perf_counter() - relatorio.inicio
+    return relatorio
+
+
+# ========== LINHA DE COMANDO ==========
+
+def _mostrar_progresso(relatorio):
+    sys.stderr.write(f"\r{relatorio.registros} registros, {relatorio.importados} importados, "
+                     f"{relatorio.erros} erros ({relatorio.registros_por_segundo:,.0f} registros/s)")
+    sys.stderr.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("tipo", choices=sorted(TIPOS))
+    parser.add_argument("arquivo")
+    parser.add_argument("--formato", choices=("csv", "jsonl"), help="padrão: pela extensão do arquivo")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE_PADRAO, help="registros por lote")
+    parser.add_argument("--processos", type=int, default=1, help="processos que validam os lotes")
+    parser.add_argument("--erros", metavar="ARQUIVO", help="grava todos os erros (JSON Lines) neste arquivo")
+    parser.add_argument("--backend", choices=repositorio.BACKENDS, default="memoria")
+    parser.add_argument("--banco", default="biblioteca.db", help="arquivo do banco (backend sqlite)")
+    parser.add_argument("--dados", metavar="DIRETORIO",
+                        help="backend memória: grava no journal deste diretório (como main.py --dados; "
+                             "o servidor que usa o diretório deve estar parado)")
+    args = parser.parse_args(argv)
+    if args.lote < 1 or args.processos < 1:
+        parser.error("--lote e --processos devem ser positivos")
+    if args.backend == "memoria" and not args.dados:
+        parser.error("com o backend memória, informe --dados para que a importação persista")
+    if args.backend != "memoria" and args.dados:
+        parser.error("--dados vale apenas para o backend memória")
+
+    if args.dados:
+        try:
+            persistencia.ativar(args.dados)
+        except persistencia.DiretorioEmUso as e:
+            parser.exit(2, f"Erro: {e}\n")
+    repo = repositorio.criar_repositorio(args.backend, args.banco)
+    saida_erros = open(args.erros, "w", encoding="utf-8") if args.erros else None
+    try:
+        relatorio = importar(args.arquivo, args.tipo, repo, args.formato, args.lote,
+                             args.processos, _mostrar_progresso, saida_erros)
+    except (OSError, ValueError) as e:
+        parser.exit(2, f"Erro: {e}\n")
+    finally:
+        if saida_erros is not None:
+            saida_erros.close()
+        repo.fechar()
+        if args.dados:
+            persistencia.desativar()
+    sys.stderr.write("\n")
+    print(json.dumps(relatorio.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if relatorio.erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,156 @@
 from View_and_Interface import view as vw
-from http.server import HTTPServer
+import servidor as srv
+import servidor_async
+import prefork
+import persistencia
+import mock_catalogo
+import metricas
+import perfil
+import multas
+import repositorio
+from controler import controller
+import argparse
 import signal
-import sys
 
-def main():
+def servir(args, sock=None):
+    """Atende requisições no modo escolhido até SIGINT/SIGTERM."""
+    if args.modo == "asyncio":
+        # SIGINT/SIGTERM encerram o loop graciosamente
+        servidor_async.rodar(vw.BibliotecaView, porta=args.porta, workers=args.workers,
+                             tempo_ocioso=args.tempo_ocioso, max_requisicoes=args.max_requisicoes, sock=sock)
+        return
+    servidor = srv.criar_servidor(vw.BibliotecaView, host="", porta=args.porta, workers=args.workers,
+                                  tempo_ocioso=args.tempo_ocioso, max_requisicoes=args.max_requisicoes, sock=sock)
+    # SIGTERM encerra como o Ctrl+C: interrompe serve_forever na
+    # própria thread, sem chamar shutdown() de dentro dela
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+def iniciar_multas(args):
+    """Tarefa periódica de multas (None com --intervalo-multas 0)."""
+    if not args.intervalo_multas:
+        return None
+    return multas.TarefaMultas(controller.aplicar_multas, args.intervalo_multas).iniciar()
+
+
+def gravar_perfil(args, sufixo=""):
+    """Grava as pilhas do perfilamento em --perfil-saida (um arquivo por processo)."""
+    if args.perfil_saida and perfil.perfilador.amostras:
+        with open(args.perfil_saida + sufixo, "w", encoding="utf-8") as arquivo:
+            arquivo.write(perfil.perfilador.pilhas())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço de Biblioteca")
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--modo", choices=("threads", "asyncio"), default="threads",
+                        help="threads: uma thread por conexão; asyncio: conexões num event loop")
+    parser.add_argument("--workers", type=int, default=srv.WORKERS_PADRAO,
+                        help="número de threads que atendem requisições")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="processos servindo a mesma porta (prefork; exige --backend sqlite)")
+    parser.add_argument("--tempo-ocioso", type=float, default=srv.TEMPO_OCIOSO_PADRAO,
+                        help="segundos que uma conexão keep-alive pode ficar ociosa")
+    parser.add_argument("--max-requisicoes", type=int, default=srv.MAX_REQUISICOES_PADRAO,
+                        help="requisições por conexão antes de fechá-la")
+    parser.add_argument("--dados", metavar="DIRETORIO",
+                        help="persiste empréstimos e catálogo (journal + snapshots) neste diretório")
+    parser.add_argument("--backend", choices=repositorio.BACKENDS, default="memoria",
+                        help="armazenamento de usuários, catálogo e empréstimos")
+    parser.add_argument("--banco", default="biblioteca.db",
+                        help="arquivo do banco SQLite (com --backend sqlite)")
+    parser.add_argument("--perfil", type=float, metavar="TAXA",
+                        help="liga o perfilamento, amostrando esta fração (0 a 1) das requisições")
+    parser.add_argument("--perfil-saida", metavar="ARQUIVO",
+                        help="ao encerrar, grava as pilhas do perfilamento (formato folded, para flamegraph)")
+    parser.add_argument("--multa-diaria", type=float, default=multas.VALOR_DIARIO_PADRAO,
+                        help="valor da multa por dia de atraso")
+    parser.add_argument("--carencia", type=int, default=0,
+                        help="dias de atraso sem multa")
+    parser.add_argument("--teto-multa", type=float,
+                        help="valor máximo da multa de um empréstimo")
+    parser.add_argument("--intervalo-multas", type=float, default=multas.INTERVALO_PADRAO,
+                        help="segundos entre as aplicações de multas aos atrasados (0 desliga)")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers deve ser positivo")
+    if args.processos < 1:
+        parser.error("--processos deve ser positivo")
+    if args.dados and args.backend != "memoria":
+        parser.error("--dados só se aplica ao backend em memória")
+    if args.processos > 1 and args.backend != "sqlite":
+        parser.error("--processos exige --backend sqlite (estado compartilhado entre processos)")
+    if args.perfil is not None and not 0 <= args.perfil <= 1:
+        parser.error("--perfil deve estar entre 0 e 1")
+    try:
+        multas.definir_politica(multas.PoliticaMultas(args.multa_diaria, args.carencia, args.teto_multa))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.intervalo_multas < 0:
+        parser.error("--intervalo-multas não pode ser negativo")
+
     print("Iniciando Serviço de Biblioteca...\n")
+
+    if args.dados:
+        try:
+            journal = persistencia.ativar(args.dados)
+        except persistencia.DiretorioEmUso as e:
+            parser.exit(2, f"Erro: {e}\n")
+        print(f"Estado recuperado de {args.dados} (evento {journal.seq})")
+    if args.backend == "sqlite":
+        repo = repositorio.criar_repositorio("sqlite", args.banco)
+        repo.importar_mocks()
+        controller.usar_repositorio(repo)
+        print(f"Usando banco SQLite em {args.banco}")
+    else:
+        # A primeira busca não paga a indexação do catálogo inteiro
+        mock_catalogo.preparar_busca()
     
-    servidor = HTTPServer(("localhost", 8000), vw.BibliotecaView)
-    print("Servidor rodando em http://localhost:8000")
-    print("Acesse: http://localhost:8000/emprestimos")
+    if args.perfil is not None:
+        perfil.perfilador.ativar(args.perfil)
+        print(f"Perfilamento ativo (taxa {args.perfil:g}): /perfil e /perfil/pilhas")
+
+    print(f"Servidor rodando em http://localhost:{args.porta} "
+          f"({args.modo}, {args.workers} workers, {args.processos} processo(s))")
+    print(f"Acesse: http://localhost:{args.porta}/emprestimos")
     print("Pressione Ctrl+C para encerrar\n")
-    
-    # Trata Ctrl+C para parar o servidor
-    def parar_servidor(sig, frame):
-        print("\n\n🛑 Encerrando servidor...")
-        servidor.shutdown()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, parar_servidor)
-    
+
     try:
-        servidor.serve_forever()
-    except KeyboardInterrupt:
-        print("\n🛑 Servidor encerrado!")
-        sys.exit(0)
+        if args.processos > 1:
+            # Nenhuma conexão SQLite aberta atravessa o fork
+            controller.repositorio.fechar()
+            sock = prefork.abrir_socket("", args.porta)
+            def trabalhar(sock, indice):
+                # Só um processo aplica as multas no banco compartilhado
+                tarefa = iniciar_multas(args) if indice == 0 else None
+                try:
+                    servir(args, sock)
+                finally:
+                    if tarefa is not None:
+                        tarefa.parar()
+                    controller.repositorio.fechar()
+                    # O filho sai com os._exit, sem atexit
+                    metricas.log_assincrono.esvaziar()
+                    gravar_perfil(args, f".{indice}")
+            prefork.rodar(trabalhar, sock, args.processos)
+        else:
+            tarefa = iniciar_multas(args)
+            try:
+                servir(args)
+            finally:
+                if tarefa is not None:
+                    tarefa.parar()
+            gravar_perfil(args)
+    finally:
+        persistencia.desativar()
+        controller.repositorio.fechar()
+    print("\n🛑 Servidor encerrado!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
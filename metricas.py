@@ -0,0 +1,265 @@
+"""Métricas do serviço (formato de exposição do Prometheus) e log assíncrono.
+
+`registro` acumula, por rota e método:
+
+- histogramas de latência das requisições, com buckets fixos (o custo de
+  observar é uma busca binária e um incremento, sem guardar amostras);
+- contagem de requisições e de erros (status >= 400) por status;
+
+além de contadores de negócio (empréstimos criados, devoluções processadas) e
+medidores calculados na hora da coleta (tamanho do acervo e dos empréstimos).
+`exportar()` gera o texto servido em /metrics.
+
+`log_assincrono` substitui o print síncrono por requisição: as linhas vão para
+uma fila em memória e uma thread as escreve em lote. Se a saída não der
+conta, a fila é limitada e as linhas excedentes são descartadas (e contadas)
+em vez de atrasar as respostas.
+
+Com prefork cada processo tem seus próprios contadores; a coleta de /metrics
+mostra o processo que atendeu a conexão.
+"""
+
+import atexit
+import bisect
+import os
+import sys
+import threading
+
+# Limites superiores (segundos) dos buckets de latência
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PREFIXO = "biblioteca_"
+
+# Contadores de negócio: nome -> descrição
+CONTADORES = {
+    "emprestimos_criados": "Empréstimos registrados com sucesso",
+    "devolucoes_processadas": "Devoluções registradas com sucesso",
+}
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _rotulos(**rotulos):
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + "}"
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class Histograma:
+    """Histograma de buckets fixos (contagens não cumulativas + soma)."""
+
+    __slots__ = ("limites", "contagens", "soma", "total")
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        # Última posição: acima do maior limite (+Inf)
+        self.contagens = [0] * (len(self.limites) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        # bisect_left: um valor igual ao limite pertence ao bucket (le=)
+        self.contagens[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def quantil(self, q):
+        """
+        Estima o quantil `q` (0..1) por interpolação linear dentro do bucket,
+        como o `histogram_quantile` do Prometheus. None se vazio.
+        """
+        if not self.total:
+            return None
+        alvo = q * self.total
+        acumulado = 0
+        for indice, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                if indice == len(self.limites):
+                    return self.limites[-1]
+                inferior = self.limites[indice - 1] if indice else 0.0
+                return inferior + (self.limites[indice] - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.limites[-1]
+
+
+class Metricas:
+    """Registro de métricas do processo, seguro entre threads."""
+
+    def __init__(self, limites=LIMITES_LATENCIA):
+        self.limites = tuple(limites)
+        self._lock = threading.Lock()
+        self._latencias = {}    # (rota, método) -> Histograma
+        self._requisicoes = {}  # (rota, método, status) -> quantidade
+        self._contadores = dict.fromkeys(CONTADORES, 0)
+        self._medidores = {}    # nome -> (descrição, função)
+        if hasattr(os, "register_at_fork"):
+            # O lock pode ter sido copiado travado por outra thread do pai
+            os.register_at_fork(after_in_child=self._apos_fork)
+
+    def _apos_fork(self):
+        self._lock = threading.Lock()
+
+    def observar_requisicao(self, rota, metodo, status, duracao):
+        """Registra uma requisição atendida e sua duração em segundos."""
+        with self._lock:
+            histograma = self._latencias.get((rota, metodo))
+            if histograma is None:
+                histograma = self._latencias[(rota, metodo)] = Histograma(self.limites)
+            histograma.observar(duracao)
+            chave = (rota, metodo, status)
+            self._requisicoes[chave] = self._requisicoes.get(chave, 0) + 1
+
+    def incrementar(self, nome, quantidade=1):
+        """Soma `quantidade` ao contador de negócio `nome` (veja CONTADORES)."""
+        with self._lock:
+            self._contadores[nome] += quantidade
+
+    def registrar_medidor(self, nome, descricao, funcao):
+        """Registra um medidor cujo valor é `funcao()` no momento da coleta."""
+        self._medidores[nome] = (descricao, funcao)
+
+    def latencia(self, rota, metodo):
+        """Cópia do histograma de latência de uma rota (ou None)."""
+        with self._lock:
+            histograma = self._latencias.get((rota, metodo))
+            if histograma is None:
+                return None
+            copia = Histograma(histograma.limites)
+            copia.contagens = list(histograma.contagens)
+            copia.soma, copia.total = histograma.soma, histograma.total
+            return copia
+
+    def contador(self, nome):
+        with self._lock:
+            return self._contadores[nome]
+
+    def limpar(self):
+        """Zera histogramas e contadores (os medidores continuam registrados)."""
+        with self._lock:
+            self._latencias.clear()
+            self._requisicoes.clear()
+            self._contadores = dict.fromkeys(CONTADORES, 0)
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        with self._lock:
+            latencias = {chave: (list(h.contagens), h.soma, h.total) for chave, h in self._latencias.items()}
+            requisicoes = dict(self._requisicoes)
+            contadores = dict(self._contadores)
+        linhas = []
+
+        nome = PREFIXO + "requisicao_duracao_segundos"
+        linhas += [f"# HELP {nome} Duração das requisições HTTP por rota", f"# TYPE {nome} histogram"]
+        for (rota, metodo), (contagens, soma, total) in sorted(latencias.items()):
+            acumulado = 0
+            for limite, contagem in zip(self.limites, contagens):
+                acumulado += contagem
+                linhas.append(f"{nome}_bucket{_rotulos(rota=rota, metodo=metodo, le=limite)} {acumulado}")
+            linhas.append(f"{nome}_bucket{_rotulos(rota=rota, metodo=metodo, le='+Inf')} {total}")
+            linhas.append(f"{nome}_sum{_rotulos(rota=rota, metodo=metodo)} {_numero(soma)}")
+            linhas.append(f"{nome}_count{_rotulos(rota=rota, metodo=metodo)} {total}")
+
+        for nome, descricao, minimo in (("requisicoes_total", "Requisições HTTP atendidas", 0),
+                                        ("erros_total", "Respostas HTTP com status >= 400", 400)):
+            linhas += [f"# HELP {PREFIXO}{nome} {descricao}", f"# TYPE {PREFIXO}{nome} counter"]
+            for (rota, metodo, status), quantidade in sorted(requisicoes.items()):
+                if status >= minimo:
+                    linhas.append(f"{PREFIXO}{nome}{_rotulos(rota=rota, metodo=metodo, status=status)} {quantidade}")
+
+        for nome, quantidade in contadores.items():
+            linhas += [f"# HELP {PREFIXO}{nome}_total {CONTADORES[nome]}",
+                       f"# TYPE {PREFIXO}{nome}_total counter",
+                       f"{PREFIXO}{nome}_total {quantidade}"]
+
+        for nome, (descricao, funcao) in sorted(self._medidores.items()):
+            try:
+                valor = funcao()
+            except Exception:
+                continue
+            linhas += [f"# HELP {PREFIXO}{nome} {descricao}", f"# TYPE {PREFIXO}{nome} gauge",
+                       f"{PREFIXO}{nome} {_numero(valor)}"]
+
+        nome = PREFIXO + "log_linhas_descartadas_total"
+        linhas += [f"# HELP {nome} Linhas de log descartadas com a fila cheia", f"# TYPE {nome} counter",
+                   f"{nome} {log_assincrono.descartadas}"]
+        return "\n".join(linhas) + "\n"
+
+
+class LogAssincrono:
+    """
+    Log em lote: `registrar` apenas enfileira a linha; uma thread escreve os
+    lotes em `saida` (sys.stdout por padrão) a cada `intervalo` segundos ou
+    quando a fila atinge `tamanho_lote` linhas.
+
+    Args:
+        saida: arquivo de texto (None = sys.stdout no momento da escrita)
+        tamanho_lote: linhas que disparam uma escrita imediata
+        intervalo: tempo máximo (s) que uma linha espera na fila
+        max_fila: linhas pendentes a partir das quais novas são descartadas
+    """
+
+    def __init__(self, saida=None, tamanho_lote=256, intervalo=0.5, max_fila=10000):
+        self.saida = saida
+        self.tamanho_lote = tamanho_lote
+        self.intervalo = intervalo
+        self.max_fila = max_fila
+        self.descartadas = 0
+        self._preparar()
+        if hasattr(os, "register_at_fork"):
+            # No filho as linhas pendentes e os locks herdados são do pai, e a
+            # thread de escrita não existe
+            os.register_at_fork(after_in_child=self._preparar)
+
+    def _preparar(self):
+        self._pendentes = []
+        self._condicao = threading.Condition(threading.Lock())
+        # Garante a ordem entre a thread e `esvaziar` chamado por outra
+        self._escrita = threading.Lock()
+        self._inicio = threading.Lock()
+        self._thread = None
+
+    def registrar(self, linha):
+        """Enfileira uma linha (sem "\\n") para escrita em lote."""
+        if self._thread is None:
+            with self._inicio:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._trabalhar, name="log-assincrono", daemon=True)
+                    self._thread.start()
+        with self._condicao:
+            if len(self._pendentes) >= self.max_fila:
+                self.descartadas += 1
+                return
+            self._pendentes.append(linha)
+            if len(self._pendentes) >= self.tamanho_lote:
+                self._condicao.notify()
+
+    def _trabalhar(self):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: len(self._pendentes) >= self.tamanho_lote, self.intervalo)
+            self.esvaziar()
+
+    def esvaziar(self):
+        """Escreve agora todas as linhas pendentes."""
+        with self._escrita:
+            with self._condicao:
+                lote, self._pendentes = self._pendentes, []
+            if not lote:
+                return
+            saida = self.saida or sys.stdout
+            try:
+                saida.write("\n".join(lote) + "\n")
+                saida.flush()
+            except (OSError, ValueError):
+                # Saída fechada (ex.: encerramento do interpretador)
+                pass
+
+
+registro = Metricas()
+log_assincrono = LogAssincrono()
+atexit.register(log_assincrono.esvaziar)
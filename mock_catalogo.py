@@ -1,5 +1,10 @@
 """Mock de catálogo - simula um banco de dados de livros."""
 
+import threading
+from itertools import islice
+
+from busca import IndiceTextual, melhores
+
 # Base de dados simulada de livros
 _catalogo_db = {
     1: {"bookId": 1, "titulo": "Engenharia de Software", "autor": "Sommerville", "status": "disponivel"},
@@ -7,6 +12,83 @@ _catalogo_db = {
     3: {"bookId": 3, "titulo": "IA Moderna", "autor": "Russell", "status": "disponivel"},
 }
 
+# Protege as alterações de status contra requisições concorrentes
+_lock = threading.RLock()
+
+# Livros de cada status ({status: {bookId: livro}}), mantidos a cada
+# alteração: contar e listar os disponíveis não percorre o catálogo.
+# Reconstruídos quando `_catalogo_db` é substituído (como fazem os testes).
+_livros_por_status = {}
+_catalogo_particionado = None
+
+# Versão do catálogo: cresce a cada alteração (e quando `_catalogo_db` é
+# substituído). Usada pela View para ETags e cache de páginas.
+_versao = 0
+
+# Índice de busca por título e autor: construído na primeira busca e depois
+# atualizado a cada livro adicionado. Reconstruído quando `_catalogo_db` é
+# substituído.
+_indice = IndiceTextual()
+_catalogo_indexado = None
+
+# Funções chamadas a cada alteração do catálogo (veja registrar_ouvinte)
+_ouvintes = []
+
+
+def _sincronizar_status():
+    """Reconstrói `_livros_por_status` se `_catalogo_db` foi substituído."""
+    global _catalogo_particionado, _versao
+    if _catalogo_particionado is not _catalogo_db:
+        _versao += 1
+        _livros_por_status.clear()
+        for book_id, livro in _catalogo_db.items():
+            _livros_por_status.setdefault(livro["status"], {})[book_id] = livro
+        _catalogo_particionado = _catalogo_db
+
+
+def _mover_status(book_id, livro, status_anterior):
+    """Passa `livro` da partição de `status_anterior` para a do status atual."""
+    if status_anterior is not None:
+        _livros_por_status[status_anterior].pop(book_id, None)
+    _livros_por_status.setdefault(livro["status"], {})[book_id] = livro
+
+
+def _sincronizar_indice():
+    """Reconstrói o índice de busca se `_catalogo_db` foi substituído."""
+    global _catalogo_indexado
+    if _catalogo_indexado is not _catalogo_db:
+        _indice.construir((l["bookId"], l["titulo"], l.get("autor")) for l in _catalogo_db.values())
+        _catalogo_indexado = _catalogo_db
+
+
+def registrar_ouvinte(funcao):
+    """
+    Registra `funcao(tipo, dados)`, chamada após cada alteração do catálogo.
+    Usado pela persistência (journal) para registrar eventos.
+    """
+    _ouvintes.append(funcao)
+
+
+def remover_ouvinte(funcao):
+    """Remove um ouvinte registrado com `registrar_ouvinte`."""
+    if funcao in _ouvintes:
+        _ouvintes.remove(funcao)
+
+
+def _notificar(tipo, dados):
+    """Repassa um evento de alteração para os ouvintes registrados."""
+    for ouvinte in _ouvintes:
+        ouvinte(tipo, dados)
+
+
+def get_versao():
+    """
+    Retorna a versão atual do catálogo (só cresce a cada alteração).
+    """
+    with _lock:
+        _sincronizar_status()
+        return _versao
+
 
 def get_livro(book_id):
     """
@@ -34,21 +116,34 @@ def livro_existe(book_id):
     return book_id in _catalogo_db
 
 
-def update_status_livro(book_id, novo_status):
+def update_status_livro(book_id, novo_status, status_esperado=None):
     """
     Atualiza o status de um livro (disponivel ou emprestado).
     
     Args:
         book_id: ID do livro
         novo_status: novo status ('disponivel' ou 'emprestado')
+        status_esperado: se informado, só atualiza quando o status atual
+            for este (comparação e troca atômica)
         
     Returns:
-        True se atualizado com sucesso, False se livro não existe
+        True se atualizado com sucesso, False se livro não existe ou se o
+        status atual difere de `status_esperado`
     """
-    if book_id in _catalogo_db:
-        _catalogo_db[book_id]["status"] = novo_status
+    global _versao
+    with _lock:
+        _sincronizar_status()
+        livro = _catalogo_db.get(book_id)
+        if livro is None:
+            return False
+        if status_esperado is not None and livro["status"] != status_esperado:
+            return False
+        status_anterior = livro["status"]
+        livro["status"] = novo_status
+        _mover_status(book_id, livro, status_anterior)
+        _versao += 1
+        _notificar("status_livro", {"bookId": book_id, "status": novo_status})
         return True
-    return False
 
 
 def adicionar_livro(book_id, titulo, autor, status="disponivel"):
@@ -61,12 +156,89 @@ def adicionar_livro(book_id, titulo, autor, status="disponivel"):
         autor: Autor do livro
         status: status inicial (padrão: 'disponivel')
     """
-    _catalogo_db[book_id] = {
-        "bookId": book_id,
-        "titulo": titulo,
-        "autor": autor,
-        "status": status
-    }
+    global _versao
+    with _lock:
+        _sincronizar_status()
+        anterior = _catalogo_db.get(book_id)
+        livro = _catalogo_db[book_id] = {
+            "bookId": book_id,
+            "titulo": titulo,
+            "autor": autor,
+            "status": status
+        }
+        _mover_status(book_id, livro, anterior["status"] if anterior is not None else None)
+        if _catalogo_indexado is _catalogo_db:
+            _indice.adicionar(book_id, titulo, autor)
+        _versao += 1
+        _notificar("livro", dict(_catalogo_db[book_id]))
+
+
+def buscar_livros(consulta, limite=20):
+    """
+    Busca livros por título e autor, sem diferenciar acentos nem maiúsculas;
+    o último termo da consulta vale como prefixo (autocompletar).
+
+    Args:
+        consulta: texto digitado
+        limite: quantidade máxima de resultados
+
+    Returns:
+        lista de livros (dicts), do mais relevante para o menos
+    """
+    with _lock:
+        _sincronizar_indice()
+    # A busca usa o lock do próprio índice: não espera pelos empréstimos
+    livros = (_catalogo_db.get(book_id) for book_id, _ in _indice.buscar(consulta, limite))
+    return [dict(livro) for livro in livros if livro is not None]
+
+
+def preparar_busca():
+    """Constrói o índice de busca agora, em vez de na primeira busca."""
+    with _lock:
+        _sincronizar_indice()
+
+
+def adicionar_livros(livros):
+    """
+    Adiciona (ou atualiza) vários livros de uma vez, com uma única trava e
+    uma única mudança de versão. Se o índice de busca já foi construído, os
+    livros entram nele um a um, como em `adicionar_livro`; os que voltam com
+    o mesmo título e autor (reimportação) não são reindexados.
+
+    Não confere o status com os empréstimos; o repositório usa
+    `modulo_emprestimo.adicionar_livros`, que confere.
+
+    Args:
+        livros: iterável de (book_id, titulo, autor, status); com status
+            None, um livro já cadastrado mantém o status atual e um novo
+            fica 'disponivel'
+
+    Returns:
+        quantidade de livros gravados
+    """
+    global _versao
+    quantidade = 0
+    with _lock:
+        _sincronizar_status()
+        indexar = _catalogo_indexado is _catalogo_db
+        for book_id, titulo, autor, status in livros:
+            anterior = _catalogo_db.get(book_id)
+            if status is None:
+                status = anterior["status"] if anterior is not None else "disponivel"
+            livro = _catalogo_db[book_id] = {
+                "bookId": book_id,
+                "titulo": titulo,
+                "autor": autor,
+                "status": status
+            }
+            _mover_status(book_id, livro, anterior["status"] if anterior is not None else None)
+            if indexar and (anterior is None or (anterior["titulo"], anterior.get("autor")) != (titulo, autor)):
+                _indice.adicionar(book_id, titulo, autor)
+            _notificar("livro", dict(livro))
+            quantidade += 1
+        if quantidade:
+            _versao += 1
+    return quantidade
 
 
 def listar_livros():
@@ -76,9 +248,65 @@ def listar_livros():
 
 def listar_livros_disponiveis():
     """Retorna apenas livros disponíveis."""
-    return [l for l in _catalogo_db.values() if l["status"] == "disponivel"]
+    with _lock:
+        _sincronizar_status()
+        return list(_livros_por_status.get("disponivel", {}).values())
+
+
+def listar_livros_por_status(status, consulta=None, offset=0, limite=50):
+    """
+    Lista uma página dos livros com `status`, sem percorrer o catálogo.
+
+    Sem `consulta`, os livros vêm na ordem em que passaram ao status e a
+    página custa O(offset + limite). Com `consulta`, vêm os livros do status
+    que casam com a busca por título e autor (veja `buscar_livros`), do mais
+    relevante para o menos.
+
+    Args:
+        status: 'disponivel' ou 'emprestado'
+        consulta: texto de busca (opcional)
+        offset: quantos livros pular
+        limite: tamanho máximo da página
+
+    Returns:
+        dict com "livros" (lista de dicts da página) e "total" (quantidade
+        de livros com o status que satisfazem a busca)
+    """
+    if consulta is None:
+        with _lock:
+            _sincronizar_status()
+            particao = _livros_por_status.get(status, {})
+            pagina = islice(particao.values(), offset, offset + limite)
+            return {"livros": [dict(livro) for livro in pagina], "total": len(particao)}
+
+    with _lock:
+        _sincronizar_indice()
+    encontrados = _indice.encontrar(consulta)
+    with _lock:
+        _sincronizar_status()
+        particao = _livros_por_status.get(status, {})
+        encontrados = {book_id: valor for book_id, valor in encontrados.items() if book_id in particao}
+        pagina = melhores(encontrados, offset + limite)[offset:]
+        return {"livros": [dict(particao[book_id]) for book_id, _ in pagina], "total": len(encontrados)}
+
+
+def contar_livros_por_status():
+    """
+    Retorna a quantidade de livros por status, sem percorrer o catálogo.
+
+    Returns:
+        dict {status: quantidade}
+    """
+    with _lock:
+        _sincronizar_status()
+        return {status: len(livros) for status, livros in _livros_por_status.items() if livros}
 
 
 def limpar_catalogo():
     """Limpa todo o catálogo (útil para testes)."""
-    _catalogo_db.clear()
\ No newline at end of file
+    global _versao
+    with _lock:
+        _catalogo_db.clear()
+        _livros_por_status.clear()
+        _indice.limpar()
+        _versao += 1
\ No newline at end of file
@@ -1,5 +1,7 @@
 """Mock de usuários - simula um banco de dados de usuários."""
 
+import threading
+
 # Base de dados simulada de usuários
 _usuarios_db = {
     1: {"userId": 1, "nome": "Ana Silva", "tipo": "aluno", "email": "ana@escola.com"},
@@ -7,6 +9,49 @@ _usuarios_db = {
     3: {"userId": 3, "nome": "Carla Dias", "tipo": "aluno", "email": "carla@escola.com"},
 }
 
+# Serializa as alterações de usuários (e a cópia feita pelo snapshot da
+# persistência, para que nenhuma alteração fique entre a cópia e o journal)
+_lock = threading.RLock()
+
+# Versão dos usuários: cresce a cada alteração (e quando `_usuarios_db` é
+# substituído). Usada pela View para ETags e cache de páginas.
+_versao = 0
+_usuarios_versionados = None
+
+# Funções chamadas a cada alteração dos usuários (veja registrar_ouvinte)
+_ouvintes = []
+
+
+def registrar_ouvinte(funcao):
+    """
+    Registra `funcao(tipo, dados)`, chamada após cada alteração dos usuários.
+    Usado pela persistência (journal) para registrar eventos.
+    """
+    _ouvintes.append(funcao)
+
+
+def remover_ouvinte(funcao):
+    """Remove um ouvinte registrado com `registrar_ouvinte`."""
+    if funcao in _ouvintes:
+        _ouvintes.remove(funcao)
+
+
+def _notificar(tipo, dados):
+    """Repassa um evento de alteração para os ouvintes registrados."""
+    for ouvinte in _ouvintes:
+        ouvinte(tipo, dados)
+
+
+def get_versao():
+    """
+    Retorna a versão atual dos usuários (só cresce a cada alteração).
+    """
+    global _versao, _usuarios_versionados
+    if _usuarios_versionados is not _usuarios_db:
+        _versao += 1
+        _usuarios_versionados = _usuarios_db
+    return _versao
+
 
 def get_usuario(user_id):
     """
@@ -44,12 +89,45 @@ def adicionar_usuario(user_id, nome, tipo, email):
         tipo: 'aluno' ou 'professor'
         email: Email do usuário
     """
-    _usuarios_db[user_id] = {
-        "userId": user_id,
-        "nome": nome,
-        "tipo": tipo,
-        "email": email
-    }
+    global _versao
+    with _lock:
+        _usuarios_db[user_id] = {
+            "userId": user_id,
+            "nome": nome,
+            "tipo": tipo,
+            "email": email
+        }
+        _versao += 1
+        _notificar("usuario", dict(_usuarios_db[user_id]))
+
+
+def adicionar_usuarios(usuarios):
+    """
+    Adiciona (ou substitui) vários usuários de uma vez, com uma única
+    mudança de versão.
+
+    Args:
+        usuarios: iterável de (user_id, nome, tipo, email)
+
+    Returns:
+        lista vazia: nenhum usuário é recusado (mesmo retorno de
+        `adicionar_livros`)
+    """
+    global _versao
+    quantidade = 0
+    with _lock:
+        for user_id, nome, tipo, email in usuarios:
+            usuario = _usuarios_db[user_id] = {
+                "userId": user_id,
+                "nome": nome,
+                "tipo": tipo,
+                "email": email
+            }
+            _notificar("usuario", dict(usuario))
+            quantidade += 1
+        if quantidade:
+            _versao += 1
+    return []
 
 
 def listar_usuarios():
@@ -59,4 +137,7 @@ def listar_usuarios():
 
 def limpar_usuarios():
     """Limpa todos os usuários (útil para testes)."""
-    _usuarios_db.clear()
\ No newline at end of file
+    global _versao
+    with _lock:
+        _usuarios_db.clear()
+        _versao += 1
\ No newline at end of file
@@ -1,17 +1,62 @@
 # modulo_emprestimo.py
+from collections import Counter
 from datetime import datetime, timedelta
+from itertools import islice
+import bisect
+import heapq
+import threading
 import mock_usuarios
 import mock_catalogo
+import multas
+
+# Representação compacta dos empréstimos: datas guardadas como inteiros
+# (microssegundos desde 1970-01-01, sem fuso, como os datetime usados aqui) e
+# status como um código pequeno. A API pública continua usando datetime e as
+# strings de status.
+_EPOCA = datetime(1970, 1, 1)
+_MICROSSEGUNDO = timedelta(microseconds=1)
+_STATUS = ["ACTIVE", "RETURNED"]
+_CODIGO_STATUS = {status: codigo for codigo, status in enumerate(_STATUS)}
+
+def _para_epoca(data):
+    """
+    Converte datetime (sem fuso) para microssegundos desde a época.
+    """
+    if data is None:
+        return None
+    return (data - _EPOCA) // _MICROSSEGUNDO
+
+def _de_epoca(micros):
+    """
+    Converte microssegundos desde a época de volta para datetime.
+    """
+    if micros is None:
+        return None
+    return _EPOCA + timedelta(microseconds=micros)
+
+def _codigo_status(status):
+    """
+    Retorna o código numérico de um status, registrando status novos.
+    """
+    codigo = _CODIGO_STATUS.get(status)
+    if codigo is None:
+        codigo = len(_STATUS)
+        _STATUS.append(status)
+        _CODIGO_STATUS[status] = codigo
+    return codigo
 
 class Emprestimo:
+    __slots__ = ("_user_id", "_book_id", "_loan_id", "_loan_date", "_due_date",
+                 "_return_date", "_status", "_fine")
+
     def __init__(self, user_id, book_id, loan_id, loan_date, due_date, status="ACTIVE", return_date=None, fine=0.0):
         self._user_id = user_id
         self._book_id = book_id
         self._loan_id = loan_id
-        self._loan_date = loan_date
-        self._due_date = due_date
-        self._return_date = return_date
-        self._status = status
+        self._loan_date = _para_epoca(loan_date)
+        self._due_date = _para_epoca(due_date)
+        self._return_date = _para_epoca(return_date)
+        self._status = _codigo_status(status)
         self._fine = fine
 
     def get_loan_id(self):
@@ -24,31 +69,336 @@ class Emprestimo:
         return self._book_id
 
     def get_status(self):
-        return self._status
+        return _STATUS[self._status]
+
+    def get_loan_date(self):
+        return _de_epoca(self._loan_date)
+
+    def get_due_date(self):
+        return _de_epoca(self._due_date)
+
+    def get_return_date(self):
+        return _de_epoca(self._return_date)
+
+    def get_fine(self):
+        return self._fine
 
     def set_return_date(self, return_date):
-        self._return_date = return_date
+        self._return_date = _para_epoca(return_date)
 
     def set_status(self, status):
-        self._status = status
+        self._status = _codigo_status(status)
 
     def to_dict(self):
         return {
             "loanId": self._loan_id,
             "userId": self._user_id,
             "bookId": self._book_id,
-            "loanDate": self._loan_date.isoformat(),
-            "dueDate": self._due_date.isoformat(),
-            "returnDate": self._return_date.isoformat() if self._return_date else None,
-            "status": self._status,
+            "loanDate": _de_epoca(self._loan_date).isoformat(),
+            "dueDate": _de_epoca(self._due_date).isoformat(),
+            "returnDate": _de_epoca(self._return_date).isoformat() if self._return_date is not None else None,
+            "status": _STATUS[self._status],
             "fine": self._fine
         }
 
+def _ordem_ranking(item):
+    """Chave de ordenação de (chave, contagem): maior contagem, depois menor chave."""
+    return (-item[1], item[0])
+
+class RankingTopK:
+    """
+    Mantém os K maiores valores de um Counter cujas contagens só crescem.
+
+    Como as contagens nunca diminuem, basta comparar o item incrementado com o
+    último do ranking para manter o top-K exato em O(K) por atualização, sem
+    reordenar todos os itens. A ordem é a de `top()` e do backend SQLite:
+    maior contagem primeiro e, no empate, a menor chave.
+    """
+
+    def __init__(self, contador, k=10):
+        self.k = k
+        self._contador = contador
+        self._top = {}
+
+    def incrementado(self, chave):
+        """Atualiza o ranking após `contador[chave]` ser incrementado."""
+        valor = self._contador[chave]
+        if chave in self._top or len(self._top) < self.k:
+            self._top[chave] = valor
+            return
+        ultimo = max(self._top.items(), key=_ordem_ranking)
+        if _ordem_ranking((chave, valor)) < _ordem_ranking(ultimo):
+            del self._top[ultimo[0]]
+            self._top[chave] = valor
+
+    def reconstruir(self):
+        """Recalcula o ranking a partir do contador inteiro."""
+        self._top = dict(heapq.nsmallest(self.k, self._contador.items(), key=_ordem_ranking))
+
+    def top(self, k=None):
+        """
+        Retorna [(chave, contagem), ...] em ordem decrescente de contagem.
+
+        Pedidos maiores que o K mantido são respondidos a partir do contador
+        inteiro, em O(n log k), em vez de truncados em K.
+        """
+        if k is not None and k > self.k:
+            return heapq.nsmallest(k, self._contador.items(), key=_ordem_ranking)
+        itens = sorted(self._top.items(), key=_ordem_ranking)
+        return itens[:k] if k is not None else itens
+
+
 # Lista global de empréstimos (similar ao model.py)
 emprestimos = []
 next_loan_id = 1
 
+# Serializa as mutações de empréstimos (criação, devolução e geração de
+# `next_loan_id`) quando o servidor atende requisições em várias threads.
+# As leituras dos índices também o tomam: sincronizar os índices altera-os, e
+# percorrer um dict enquanto outra thread o altera é erro. É reentrante para que operações compostas possam reaproveitá-lo.
+_lock = threading.RLock()
+
+# Funções chamadas a cada alteração de empréstimos (veja registrar_ouvinte)
+_ouvintes = []
+
+# Índices em memória sobre `emprestimos`. O índice primário (por loan_id) dá
+# acesso O(1) a um empréstimo; os secundários guardam {loan_id: Emprestimo}
+# (dicts preservam a ordem de inserção) por usuário, livro e status.
+_indice_por_id = {}
+_indice_por_usuario = {}
+_indice_por_livro = {}
+_indice_por_status = {}
+# Contadores agregados mantidos junto com os índices: empréstimos por status,
+# empréstimos ativos por usuário e total de empréstimos por livro.
+_contagem_status = Counter()
+_ativos_por_usuario = Counter()
+_emprestimos_por_livro = Counter()
+_emprestimos_por_usuario = Counter()
+# Rankings usados pelos relatórios (livros mais emprestados, usuários mais
+# ativos), alimentados pelos mesmos contadores.
+TOP_K = 10
+_ranking_livros = RankingTopK(_emprestimos_por_livro, TOP_K)
+_ranking_usuarios = RankingTopK(_emprestimos_por_usuario, TOP_K)
+# Empréstimos ativos por dia de vencimento ({dia: {loan_id: Emprestimo}}) e
+# os dias com algum vencimento, em ordem. Os próximos a vencer e os atrasados
+# em uma data saem de uma busca binária nos dias, sem percorrer o histórico.
+_vencimentos = {}
+_dias_vencimento = []
+# Lista sobre a qual os índices foram construídos e quantos itens dela já
+# foram indexados. Permite detectar quando `emprestimos` é substituída ou
+# recebe `append` direto (como fazem os testes).
+_lista_indexada = None
+_total_indexado = 0
+# Versão dos dados de empréstimos: cresce a cada alteração (e quando a lista
+# é substituída). Usada pela View para ETags e cache de páginas.
+_versao = 0
+
 # Funções auxiliares
+def registrar_ouvinte(funcao):
+    """
+    Registra `funcao(tipo, dados)`, chamada após cada alteração de empréstimos.
+    Usado pela persistência (journal) para registrar eventos.
+    """
+    _ouvintes.append(funcao)
+
+def remover_ouvinte(funcao):
+    """Remove um ouvinte registrado com `registrar_ouvinte`."""
+    if funcao in _ouvintes:
+        _ouvintes.remove(funcao)
+
+def _notificar(tipo, dados):
+    """Repassa um evento de alteração para os ouvintes registrados."""
+    for ouvinte in _ouvintes:
+        ouvinte(tipo, dados)
+
+def _registro_emprestimo(emprestimo):
+    """
+    Serializa um empréstimo na forma compacta (datas como inteiros), usada
+    pela persistência.
+    """
+    return {
+        "loanId": emprestimo._loan_id,
+        "userId": emprestimo._user_id,
+        "bookId": emprestimo._book_id,
+        "loanDate": emprestimo._loan_date,
+        "dueDate": emprestimo._due_date,
+        "returnDate": emprestimo._return_date,
+        "status": _STATUS[emprestimo._status],
+        "fine": emprestimo._fine,
+    }
+
+def _emprestimo_de_registro(registro):
+    """
+    Recria um Emprestimo a partir da forma compacta de `_registro_emprestimo`.
+    """
+    emprestimo = Emprestimo(
+        user_id=registro["userId"],
+        book_id=registro["bookId"],
+        loan_id=registro["loanId"],
+        loan_date=None,
+        due_date=None,
+        status=registro["status"],
+        fine=registro.get("fine", 0.0),
+    )
+    emprestimo._loan_date = registro["loanDate"]
+    emprestimo._due_date = registro["dueDate"]
+    emprestimo._return_date = registro.get("returnDate")
+    return emprestimo
+
+def _restaurar_emprestimo(registro):
+    """
+    Recria um Emprestimo a partir de `_registro_emprestimo` e o insere na
+    lista global, sem notificar ouvintes (usado na recuperação).
+    """
+    global next_loan_id
+    with _lock:
+        emprestimo = _emprestimo_de_registro(registro)
+        emprestimos.append(emprestimo)
+        _sincronizar_indices()
+        next_loan_id = max(next_loan_id, registro["loanId"] + 1)
+    return emprestimo
+
+def _restaurar_devolucao(loan_id, return_date, fine=0.0):
+    """
+    Reaplica uma devolução registrada no journal (sem notificar ouvintes).
+
+    O snapshot pode já trazer a devolução, inteira ou pela metade (ele é
+    serializado fora da trava; veja `persistencia.Journal.compactar`): os
+    valores do evento são regravados e os índices só mudam uma vez.
+    """
+    with _lock:
+        emprestimo = _buscar_emprestimo(loan_id)
+        if emprestimo is None:
+            return False
+        status_anterior = emprestimo.get_status()
+        emprestimo._return_date = return_date
+        emprestimo.set_status("RETURNED")
+        emprestimo._fine = fine
+        if status_anterior == "ACTIVE":
+            _reindexar_status(emprestimo, "ACTIVE")
+    return True
+
+def _restaurar_multas(multas_por_emprestimo):
+    """
+    Reaplica multas gravadas por `aplicar_multas` (sem notificar ouvintes).
+    """
+    global _versao
+    with _lock:
+        for loan_id, fine in multas_por_emprestimo:
+            emprestimo = _buscar_emprestimo(loan_id)
+            if emprestimo is not None:
+                emprestimo._fine = fine
+        _versao += 1
+
+def _indexar(emprestimo):
+    """
+    Insere um empréstimo em todos os índices.
+    """
+    global _versao
+    _versao += 1
+    loan_id = emprestimo.get_loan_id()
+    _indice_por_id[loan_id] = emprestimo
+    _indice_por_usuario.setdefault(emprestimo.get_user_id(), {})[loan_id] = emprestimo
+    _indice_por_livro.setdefault(emprestimo.get_book_id(), {})[loan_id] = emprestimo
+    _indice_por_status.setdefault(emprestimo.get_status(), {})[loan_id] = emprestimo
+    _contagem_status[emprestimo.get_status()] += 1
+    _emprestimos_por_livro[emprestimo.get_book_id()] += 1
+    _emprestimos_por_usuario[emprestimo.get_user_id()] += 1
+    _ranking_livros.incrementado(emprestimo.get_book_id())
+    _ranking_usuarios.incrementado(emprestimo.get_user_id())
+    if emprestimo.get_status() == "ACTIVE":
+        _ativos_por_usuario[emprestimo.get_user_id()] += 1
+        _agendar_vencimento(emprestimo)
+
+def _reindexar_status(emprestimo, status_anterior):
+    """
+    Move um empréstimo entre os buckets do índice de status.
+    """
+    global _versao
+    _versao += 1
+    loan_id = emprestimo.get_loan_id()
+    bucket = _indice_por_status.get(status_anterior)
+    if bucket is not None:
+        bucket.pop(loan_id, None)
+    _indice_por_status.setdefault(emprestimo.get_status(), {})[loan_id] = emprestimo
+    _contagem_status[status_anterior] -= 1
+    _contagem_status[emprestimo.get_status()] += 1
+    if status_anterior == "ACTIVE":
+        _ativos_por_usuario[emprestimo.get_user_id()] -= 1
+        _desagendar_vencimento(emprestimo)
+
+def _agendar_vencimento(emprestimo):
+    """
+    Coloca um empréstimo ativo no dia do seu vencimento.
+    """
+    dia = emprestimo._due_date // multas.DIA
+    bucket = _vencimentos.get(dia)
+    if bucket is None:
+        bucket = _vencimentos[dia] = {}
+        bisect.insort(_dias_vencimento, dia)
+    bucket[emprestimo.get_loan_id()] = emprestimo
+
+def _desagendar_vencimento(emprestimo):
+    """
+    Retira um empréstimo (devolvido) do dia do seu vencimento.
+    """
+    dia = emprestimo._due_date // multas.DIA
+    bucket = _vencimentos.get(dia)
+    if bucket is None:
+        return
+    bucket.pop(emprestimo.get_loan_id(), None)
+    if not bucket:
+        del _vencimentos[dia]
+        del _dias_vencimento[bisect.bisect_left(_dias_vencimento, dia)]
+
+def _sincronizar_indices():
+    """
+    Garante que os índices reflitam a lista global `emprestimos`.
+
+    Se a lista foi substituída (ou encolheu), os índices são reconstruídos;
+    se apenas cresceu, somente os novos itens são indexados. Em regime normal
+    não há nada a fazer e o custo é O(1).
+    """
+    global _lista_indexada, _total_indexado, _versao
+    if _lista_indexada is not emprestimos or _total_indexado > len(emprestimos):
+        _versao += 1
+        _indice_por_id.clear()
+        _indice_por_usuario.clear()
+        _indice_por_livro.clear()
+        _indice_por_status.clear()
+        _contagem_status.clear()
+        _ativos_por_usuario.clear()
+        _emprestimos_por_livro.clear()
+        _emprestimos_por_usuario.clear()
+        _ranking_livros.reconstruir()
+        _ranking_usuarios.reconstruir()
+        _vencimentos.clear()
+        del _dias_vencimento[:]
+        _lista_indexada = emprestimos
+        _total_indexado = 0
+    while _total_indexado < len(emprestimos):
+        _indexar(emprestimos[_total_indexado])
+        _total_indexado += 1
+
+def get_versao():
+    """
+    Retorna a versão atual dos dados de empréstimos.
+
+    O número só cresce: se duas leituras retornam o mesmo valor, nenhum
+    empréstimo foi criado ou alterado entre elas.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _versao
+
+def _buscar_emprestimo(loan_id):
+    """
+    Retorna o objeto Emprestimo com o ID informado ou None.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _indice_por_id.get(loan_id)
+
 def _calcular_due_date(data_emprestimo, tipo_usuario):
     """
     Calcula a data de devolução prevista com base no tipo de usuário.
@@ -67,9 +417,9 @@ def verificar_disponibilidade(book_id):
         return {"erro": "Livro não encontrado"}
     return livro
 
-def adicionar_emprestimo(user_id, book_id):
+def _emprestar(user_id, book_id, agora):
     """
-    Adiciona um novo empréstimo ao sistema.
+    Valida e cria um empréstimo. Deve ser chamada com `_lock` adquirido.
     """
     global next_loan_id
     
@@ -82,11 +432,12 @@ def adicionar_emprestimo(user_id, book_id):
     if not livro:
         return {"sucesso": False, "erro": "Livro não encontrado"}
         
-    if livro["status"] != "disponivel":
+    # Troca de status atômica: se outro atendente emprestou o mesmo livro
+    # ao mesmo tempo, apenas um dos dois consegue a transição.
+    if not mock_catalogo.update_status_livro(book_id, "emprestado", status_esperado="disponivel"):
         return {"sucesso": False, "erro": "Livro indisponível"}
 
     # Criação do empréstimo
-    agora = datetime.now()
     data_devolucao = _calcular_due_date(agora, usuario["tipo"])
     
     novo_emprestimo = Emprestimo(
@@ -98,22 +449,17 @@ def adicionar_emprestimo(user_id, book_id):
     )
     
     emprestimos.append(novo_emprestimo)
+    _sincronizar_indices()
     next_loan_id += 1
-    
-    # Atualiza status do livro
-    mock_catalogo.update_status_livro(book_id, "emprestado")
+    _notificar("emprestimo", _registro_emprestimo(novo_emprestimo))
     
     return {"sucesso": True, "loan": novo_emprestimo.to_dict()}
 
-def registrar_devolucao(loan_id):
+def _devolver(loan_id, agora):
     """
-    Registra a devolução de um livro.
+    Valida e registra uma devolução. Deve ser chamada com `_lock` adquirido.
     """
-    emprestimo = None
-    for emp in emprestimos:
-        if emp.get_loan_id() == loan_id:
-            emprestimo = emp
-            break
+    emprestimo = _indice_por_id.get(loan_id)
     
     if not emprestimo:
         return {"sucesso": False, "erro": "Empréstimo não encontrado"}
@@ -122,26 +468,376 @@ def registrar_devolucao(loan_id):
         return {"sucesso": False, "erro": "Empréstimo já devolvido"}
     
     # Atualiza o empréstimo
-    agora = datetime.now()
     emprestimo.set_return_date(agora)
     emprestimo.set_status("RETURNED")
+    emprestimo._fine = multas.politica.calcular(emprestimo._due_date, emprestimo._return_date)
+    _reindexar_status(emprestimo, "ACTIVE")
+    _notificar("devolucao", {"loanId": loan_id, "returnDate": emprestimo._return_date,
+                             "fine": emprestimo._fine})
     
     # Atualiza o status do livro
     mock_catalogo.update_status_livro(emprestimo.get_book_id(), "disponivel")
     
     return {"sucesso": True, "loan": emprestimo.to_dict()}
 
+def adicionar_emprestimo(user_id, book_id):
+    """
+    Adiciona um novo empréstimo ao sistema.
+    """
+    with _lock:
+        return _emprestar(user_id, book_id, datetime.now())
+
+def registrar_devolucao(loan_id):
+    """
+    Registra a devolução de um livro.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _devolver(loan_id, datetime.now())
+
+def _conflito_status(status, emprestado):
+    """
+    Mensagem de erro se `status` contradiz os empréstimos do livro
+    (`emprestado`: se ele tem empréstimo ativo), ou None.
+    """
+    if status == "disponivel" and emprestado:
+        return "livro com empréstimo ativo não pode ficar disponivel"
+    if status == "emprestado" and not emprestado:
+        return "livro sem empréstimo ativo não pode ficar emprestado"
+    return None
+
+def _livro_emprestado(book_id):
+    """
+    Indica se o livro tem empréstimo ativo. Deve ser chamada com `_lock`.
+    """
+    return any(emp.get_status() == "ACTIVE" for emp in _indice_por_livro.get(book_id, {}).values())
+
+def adicionar_livros(livros):
+    """
+    Adiciona ou atualiza vários livros no catálogo
+    (`mock_catalogo.adicionar_livros`), conferindo o status com os
+    empréstimos: um status informado que os contradiga é recusado, e sem
+    status um livro cadastrado mantém o atual. Assim uma reimportação do
+    catálogo não libera um livro emprestado.
+
+    Args:
+        livros: lista de (book_id, titulo, autor, status ou None)
+
+    Returns:
+        lista de (posição em `livros`, mensagem) dos livros recusados
+    """
+    with _lock:
+        _sincronizar_indices()
+        aceitos, recusados = [], []
+        for posicao, livro in enumerate(livros):
+            status = livro[3]
+            erro = _conflito_status(status, _livro_emprestado(livro[0])) if status is not None else None
+            if erro is None:
+                aceitos.append(livro)
+            else:
+                recusados.append((posicao, erro))
+        mock_catalogo.adicionar_livros(aceitos)
+    return recusados
+
+def registrar_emprestimos(pares):
+    """
+    Registra vários empréstimos de uma vez (ex.: início de semestre).
+
+    Todos os itens são validados e aplicados numa única passagem, sob um
+    único lock: nenhum outro empréstimo ou devolução se intercala no lote.
+
+    Args:
+        pares: iterável de (user_id, book_id)
+
+    Returns:
+        lista de resultados, na ordem dos pares, no mesmo formato de
+        `adicionar_emprestimo`
+    """
+    with _lock, mock_catalogo._lock:
+        agora = datetime.now()
+        return [_emprestar(user_id, book_id, agora) for user_id, book_id in pares]
+
+def registrar_devolucoes(loan_ids):
+    """
+    Registra várias devoluções de uma vez (ex.: fim de período).
+
+    Args:
+        loan_ids: iterável de IDs de empréstimo
+
+    Returns:
+        lista de resultados, na ordem dos IDs, no mesmo formato de
+        `registrar_devolucao`
+    """
+    with _lock, mock_catalogo._lock:
+        _sincronizar_indices()
+        agora = datetime.now()
+        return [_devolver(loan_id, agora) for loan_id in loan_ids]
+
 def get_emprestimos():
     """
     Retorna lista de todos os empréstimos.
     """
-    return [emp.to_dict() for emp in emprestimos]
+    with _lock:
+        return [emp.to_dict() for emp in emprestimos]
+
+def iterar_emprestimos(status=None, inicio=None, fim=None, lote=1000):
+    """
+    Percorre o histórico de empréstimos, em ordem de criação, sem montá-lo
+    inteiro (exportação).
+
+    A lista é lida em blocos de `lote` itens, cada um sob o lock, de modo que
+    empréstimos e devoluções não esperam pela exportação inteira.
+
+    Args:
+        status: "ACTIVE" ou "RETURNED"
+        inicio: datetime; apenas empréstimos feitos a partir dele
+        fim: datetime; apenas empréstimos feitos antes dele
+        lote: empréstimos lidos por vez
+
+    Yields:
+        dicts no formato de `Emprestimo.to_dict`
+    """
+    codigo = _CODIGO_STATUS.get(status) if status is not None else None
+    if status is not None and codigo is None:
+        return
+    de = _para_epoca(inicio)
+    ate = _para_epoca(fim)
+    posicao = 0
+    while True:
+        with _lock:
+            _sincronizar_indices()
+            bloco = emprestimos[posicao:posicao + lote]
+            selecionados = [
+                emp.to_dict() for emp in bloco
+                if (codigo is None or emp._status == codigo)
+                and (de is None or emp._loan_date >= de)
+                and (ate is None or emp._loan_date < ate)
+            ]
+        yield from selecionados
+        if len(bloco) < lote:
+            return
+        posicao += lote
+
+def listar_emprestimos(status=None, user_id=None, book_id=None, offset=0, limite=50):
+    """
+    Lista empréstimos paginados, opcionalmente filtrados.
+
+    Usa o índice mais seletivo entre os filtros informados, de modo que a
+    página custa O(offset + limite) e não O(histórico).
+
+    Args:
+        status: "ACTIVE" ou "RETURNED"
+        user_id: ID do usuário
+        book_id: ID do livro
+        offset: quantos empréstimos pular
+        limite: tamanho máximo da página
+
+    Returns:
+        dict com "emprestimos" (lista de dicts da página) e "total" (quantidade
+        de empréstimos que satisfazem os filtros)
+    """
+    with _lock:
+        _sincronizar_indices()
+        candidatos = []
+        if status is not None:
+            candidatos.append(_indice_por_status.get(status, {}))
+        if user_id is not None:
+            candidatos.append(_indice_por_usuario.get(user_id, {}))
+        if book_id is not None:
+            candidatos.append(_indice_por_livro.get(book_id, {}))
+
+        if not candidatos:
+            pagina = emprestimos[offset:offset + limite]
+            return {"emprestimos": [emp.to_dict() for emp in pagina], "total": len(emprestimos)}
+
+        base = min(candidatos, key=len)
+        if len(candidatos) == 1:
+            pagina = islice(base.values(), offset, offset + limite)
+            return {"emprestimos": [emp.to_dict() for emp in pagina], "total": len(base)}
+
+        outros = [c for c in candidatos if c is not base]
+        filtrados = [emp for loan_id, emp in base.items() if all(loan_id in c for c in outros)]
+        return {
+            "emprestimos": [emp.to_dict() for emp in filtrados[offset:offset + limite]],
+            "total": len(filtrados),
+        }
+
+def get_estatisticas():
+    """
+    Retorna os totais do painel de empréstimos em O(1).
+
+    Returns:
+        dict com "ativos", "devolvidos" e "total"
+    """
+    with _lock:
+        _sincronizar_indices()
+        return {
+            "ativos": _contagem_status["ACTIVE"],
+            "devolvidos": _contagem_status["RETURNED"],
+            "total": len(emprestimos),
+        }
+
+def _com_atraso(emprestimo, referencia):
+    """
+    `to_dict` de um empréstimo ativo com os dias de atraso e a multa
+    acumulada até `referencia` (calculada agora, não gravada).
+    """
+    dados = emprestimo.to_dict()
+    dados["diasAtraso"] = multas.dias_atraso(emprestimo._due_date, referencia)
+    dados["fine"] = multas.politica.calcular(emprestimo._due_date, referencia)
+    return dados
+
+def _ordenados(bucket):
+    return sorted(bucket.values(), key=lambda emp: (emp._due_date, emp._loan_id))
+
+def _atrasados(referencia):
+    """
+    Gera os empréstimos ativos vencidos antes de `referencia`, do vencimento
+    mais antigo para o mais recente. Deve ser chamada com `_lock` adquirido.
+    """
+    dia_referencia = referencia // multas.DIA
+    for dia in _dias_vencimento[:bisect.bisect_right(_dias_vencimento, dia_referencia)]:
+        for emprestimo in _ordenados(_vencimentos[dia]):
+            if emprestimo._due_date >= referencia:
+                return
+            yield emprestimo
+
+def proximos_vencimentos(k=10, agora=None):
+    """
+    Retorna os k empréstimos ativos que vencem primeiro a partir de `agora`
+    (ainda não atrasados), do vencimento mais próximo para o mais distante.
+
+    Busca binária no dia de `agora` e leitura apenas dos dias seguintes até
+    completar k: O(log d + k), d = dias com vencimentos.
+    """
+    referencia = _para_epoca(agora or datetime.now())
+    with _lock:
+        _sincronizar_indices()
+        resultado = []
+        inicio = bisect.bisect_left(_dias_vencimento, referencia // multas.DIA)
+        for posicao in range(inicio, len(_dias_vencimento)):
+            for emprestimo in _ordenados(_vencimentos[_dias_vencimento[posicao]]):
+                if emprestimo._due_date >= referencia:
+                    resultado.append(emprestimo.to_dict())
+                    if len(resultado) == k:
+                        return resultado
+        return resultado
+
+def listar_atrasados(agora=None, offset=0, limite=50):
+    """
+    Lista os empréstimos ativos atrasados em `agora` (padrão: o momento da
+    chamada), do vencimento mais antigo para o mais recente.
+
+    Cada item traz "diasAtraso" e, em "fine", a multa acumulada até `agora`
+    pela política vigente (`multas.politica`), calculada na consulta.
+
+    Returns:
+        dict com "emprestimos" (página) e "total" de atrasados
+    """
+    referencia = _para_epoca(agora or datetime.now())
+    with _lock:
+        _sincronizar_indices()
+        dia_referencia = referencia // multas.DIA
+        fim = bisect.bisect_left(_dias_vencimento, dia_referencia)
+        # Dias inteiros antes de hoje contam pelo tamanho; só o dia de hoje
+        # precisa ser conferido item a item
+        total = sum(len(_vencimentos[dia]) for dia in _dias_vencimento[:fim])
+        hoje = _vencimentos.get(dia_referencia, {})
+        total += sum(1 for emp in hoje.values() if emp._due_date < referencia)
+        pagina = islice(_atrasados(referencia), offset, offset + limite)
+        return {"emprestimos": [_com_atraso(emp, referencia) for emp in pagina], "total": total}
+
+def aplicar_multas(agora=None):
+    """
+    Grava em cada empréstimo ativo atrasado a multa acumulada até `agora`
+    (tarefa periódica; veja `multas.TarefaMultas`). Devoluções calculam a
+    multa final por conta própria.
+
+    Returns:
+        dict com "atrasados" (empréstimos examinados) e "atualizados"
+        (multas alteradas)
+    """
+    global _versao
+    referencia = _para_epoca(agora or datetime.now())
+    politica = multas.politica
+    with _lock:
+        _sincronizar_indices()
+        alterados = []
+        atrasados = 0
+        for emprestimo in _atrasados(referencia):
+            atrasados += 1
+            multa = politica.calcular(emprestimo._due_date, referencia)
+            if multa != emprestimo._fine:
+                emprestimo._fine = multa
+                alterados.append([emprestimo._loan_id, multa])
+        if alterados:
+            _versao += 1
+            _notificar("multas", {"multas": alterados})
+    return {"atrasados": atrasados, "atualizados": len(alterados)}
+
+def get_ativos_por_usuario(user_id):
+    """
+    Retorna quantos empréstimos ativos o usuário possui.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _ativos_por_usuario[user_id]
+
+def get_total_emprestimos_livro(book_id):
+    """
+    Retorna quantas vezes o livro já foi emprestado.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _emprestimos_por_livro[book_id]
+
+def get_livros_mais_emprestados(k=5):
+    """
+    Retorna [(book_id, total_de_emprestimos), ...] dos k livros mais
+    emprestados. Acima de TOP_K a resposta vem dos contadores completos.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _ranking_livros.top(k)
+
+def get_usuarios_mais_ativos(k=5):
+    """
+    Retorna [(user_id, total_de_emprestimos), ...] dos k usuários com mais
+    empréstimos. Acima de TOP_K a resposta vem dos contadores completos.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return _ranking_usuarios.top(k)
 
 def get_emprestimo_by_id(loan_id):
     """
     Busca um empréstimo específico pelo ID.
     """
-    for emp in emprestimos:
-        if emp.get_loan_id() == loan_id:
-            return emp.to_dict()
-    return None
\ No newline at end of file
+    emprestimo = _buscar_emprestimo(loan_id)
+    if emprestimo:
+        return emprestimo.to_dict()
+    return None
+
+def get_emprestimos_por_usuario(user_id):
+    """
+    Retorna os empréstimos de um usuário, em ordem de criação.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return [emp.to_dict() for emp in _indice_por_usuario.get(user_id, {}).values()]
+
+def get_emprestimos_por_livro(book_id):
+    """
+    Retorna os empréstimos de um livro, em ordem de criação.
+    """
+    with _lock:
+        _sincronizar_indices()
+        return [emp.to_dict() for emp in _indice_por_livro.get(book_id, {}).values()]
+
+def get_emprestimos_por_status(status):
+    """
+    Retorna os empréstimos com o status informado ("ACTIVE" ou "RETURNED").
+    """
+    with _lock:
+        _sincronizar_indices()
+        return [emp.to_dict() for emp in _indice_por_status.get(status, {}).values()]
@@ -0,0 +1,68 @@
+# modulo_relatorio.py
+"""Relatórios da biblioteca.
+
+Os números vêm dos agregados mantidos incrementalmente pelo repositório
+(rankings top-K e contagens por status), então nenhum relatório percorre o
+histórico de empréstimos ou o catálogo inteiro. Sem `repositorio`, usa os
+módulos em memória.
+"""
+
+from repositorio import RepositorioMemoria
+
+
+def livros_mais_emprestados(k=5, repositorio=None):
+    """
+    Retorna os k livros mais emprestados.
+
+    Returns:
+        lista de dicts com "bookId", "titulo" e "emprestimos"
+    """
+    repositorio = repositorio or RepositorioMemoria()
+    resultado = []
+    for book_id, total in repositorio.get_livros_mais_emprestados(k):
+        livro = repositorio.get_livro(book_id) or {}
+        resultado.append({"bookId": book_id, "titulo": livro.get("titulo"), "emprestimos": total})
+    return resultado
+
+
+def usuarios_mais_ativos(k=5, repositorio=None):
+    """
+    Retorna os k usuários com mais empréstimos.
+
+    Returns:
+        lista de dicts com "userId", "nome" e "emprestimos"
+    """
+    repositorio = repositorio or RepositorioMemoria()
+    resultado = []
+    for user_id, total in repositorio.get_usuarios_mais_ativos(k):
+        usuario = repositorio.get_usuario(user_id) or {}
+        resultado.append({"userId": user_id, "nome": usuario.get("nome"), "emprestimos": total})
+    return resultado
+
+
+def taxa_ocupacao(repositorio=None):
+    """
+    Retorna o percentual de livros do catálogo que estão emprestados.
+
+    Returns:
+        dict com "emprestados", "total" e "taxa" (0.0 a 100.0)
+    """
+    repositorio = repositorio or RepositorioMemoria()
+    contagem = repositorio.contar_livros_por_status()
+    total = sum(contagem.values())
+    emprestados = contagem.get("emprestado", 0)
+    taxa = round(100.0 * emprestados / total, 1) if total else 0.0
+    return {"emprestados": emprestados, "total": total, "taxa": taxa}
+
+
+def gerar_relatorios(k=5, repositorio=None):
+    """
+    Retorna todos os relatórios de uma vez (usado pela View).
+    """
+    repositorio = repositorio or RepositorioMemoria()
+    return {
+        "visao_geral": repositorio.get_estatisticas(),
+        "livros_mais_emprestados": livros_mais_emprestados(k, repositorio),
+        "usuarios_mais_ativos": usuarios_mais_ativos(k, repositorio),
+        "taxa_ocupacao": taxa_ocupacao(repositorio),
+    }
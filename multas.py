@@ -0,0 +1,115 @@
+"""Multas por atraso: política configurável e tarefa periódica.
+
+A multa de um empréstimo não é mantida em dia a dia: é calculada quando é
+preciso, a partir da data prevista de devolução e de uma data de referência:
+
+- na devolução, com a data da devolução (fica gravada no empréstimo);
+- nas consultas de atrasados, "em T", sem alterar nada;
+- pela tarefa periódica (`TarefaMultas`), que grava nos empréstimos ativos
+  atrasados a multa acumulada até o momento (`aplicar_multas` do
+  repositório), para relatórios e exportações.
+
+Datas em microssegundos desde a época, como guardadas pelos empréstimos.
+"""
+
+import math
+import threading
+import time
+import traceback
+
+DIA = 86_400_000_000  # em microssegundos
+
+VALOR_DIARIO_PADRAO = 1.0
+INTERVALO_PADRAO = 3600.0
+
+
+class PoliticaMultas:
+    """
+    Valor por dia de atraso (dia iniciado conta inteiro), dias de carência
+    não cobrados e teto opcional por empréstimo.
+    """
+
+    def __init__(self, valor_diario=VALOR_DIARIO_PADRAO, carencia_dias=0, teto=None):
+        if valor_diario < 0 or carencia_dias < 0 or (teto is not None and teto < 0):
+            raise ValueError("valor_diario, carencia_dias e teto não podem ser negativos")
+        self.valor_diario = valor_diario
+        self.carencia_dias = carencia_dias
+        self.teto = teto
+
+    def __repr__(self):
+        return (f"PoliticaMultas(valor_diario={self.valor_diario!r}, "
+                f"carencia_dias={self.carencia_dias!r}, teto={self.teto!r})")
+
+    def calcular(self, vencimento, referencia):
+        """Multa de um empréstimo que vence em `vencimento`, em `referencia`."""
+        cobrados = dias_atraso(vencimento, referencia) - self.carencia_dias
+        if cobrados <= 0:
+            return 0.0
+        valor = round(cobrados * self.valor_diario, 2)
+        return min(valor, self.teto) if self.teto is not None else valor
+
+
+def dias_atraso(vencimento, referencia):
+    """Dias (iniciados) entre `vencimento` e `referencia`; 0 se em dia."""
+    if referencia <= vencimento:
+        return 0
+    return math.ceil((referencia - vencimento) / DIA)
+
+
+# Política usada pelos repositórios (troque com `definir_politica`)
+politica = PoliticaMultas()
+
+
+def definir_politica(nova):
+    """Passa a usar `nova` (PoliticaMultas) nas próximas multas calculadas."""
+    global politica
+    politica = nova
+
+
+class TarefaMultas:
+    """
+    Executa `aplicar()` a cada `intervalo` segundos numa thread de fundo.
+
+    Args:
+        aplicar: função sem argumentos (ex.: `controller.aplicar_multas`)
+        intervalo: segundos entre execuções
+    """
+
+    def __init__(self, aplicar, intervalo=INTERVALO_PADRAO):
+        if intervalo <= 0:
+            raise ValueError("intervalo deve ser positivo")
+        self.aplicar = aplicar
+        self.intervalo = intervalo
+        self.execucoes = 0
+        self.ultimo_resultado = None
+        self.ultima_duracao = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def executar(self):
+        """Uma execução (também chamada pela thread)."""
+        inicio = time.perf_counter()
+        self.ultimo_resultado = self.aplicar()
+        self.ultima_duracao = time.perf_counter() - inicio
+        self.execucoes += 1
+        return self.ultimo_resultado
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.executar()
+            except Exception:
+                # Uma falha (ex.: banco ocupado) não derruba a tarefa
+                traceback.print_exc()
+
+    def iniciar(self):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="multas", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,211 @@
+"""Perfilamento opcional dos caminhos quentes do model e da view.
+
+Desligado (o padrão), nenhum método é tocado: o custo é zero. `ativar()`
+troca os métodos alvo (Controller, renderizações da BibliotecaView,
+`Emprestimo.to_dict`) por versões medidas, e `desativar()` devolve os
+originais, com o servidor rodando.
+
+Com o perfilamento ativo, apenas as requisições amostradas (fração `taxa`,
+ou as que enviam o cabeçalho `X-Perfil: 1`) são medidas; nas demais o método
+medido apenas confere uma variável da thread e chama o original. Fora de uma
+requisição, `amostra(rotulo)` mede explicitamente um trecho.
+
+Para cada função registra chamadas, tempo total (inclusive chamadas internas
+medidas), tempo próprio e máximo; e, por pilha de chamadas, o tempo próprio
+no formato "folded" (`rota;funcao;funcao 1234`, em microssegundos), aceito
+por flamegraph.pl, speedscope e inferno.
+"""
+
+import functools
+import importlib
+import inspect
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+CABECALHO_AMOSTRA = "X-Perfil"
+
+# (módulo, classe, filtro de nomes de métodos)
+ALVOS = (
+    ("controler", "Controller", lambda nome: not nome.startswith("_") and nome not in ("run", "usar_repositorio")),
+    ("View_and_Interface.view", "BibliotecaView",
+     lambda nome: nome.startswith(("render_", "processar_")) or nome in ("send_pagina", "send_html", "send_html_stream")),
+    ("modulo_emprestimo", "Emprestimo", lambda nome: nome == "to_dict"),
+)
+
+_local = threading.local()
+
+
+class _Amostra:
+    """Medições de uma requisição (ou trecho) numa única thread."""
+
+    __slots__ = ("rotulo", "pilha", "filhos", "registros", "inicio")
+
+    def __init__(self, rotulo):
+        self.rotulo = rotulo
+        self.pilha = [rotulo]
+        self.filhos = [0.0]
+        self.registros = []  # (pilha, nome, total, próprio)
+        self.inicio = time.perf_counter()
+
+    def medir(self, nome, funcao, args, kwargs):
+        self.pilha.append(nome)
+        self.filhos.append(0.0)
+        inicio = time.perf_counter()
+        try:
+            return funcao(*args, **kwargs)
+        finally:
+            total = time.perf_counter() - inicio
+            filhos = self.filhos.pop()
+            self.registros.append((tuple(self.pilha), nome, total, total - filhos))
+            self.pilha.pop()
+            self.filhos[-1] += total
+
+
+class Perfilador:
+    """Agrega as amostras e instala/remove os métodos medidos."""
+
+    def __init__(self, alvos=ALVOS):
+        self.alvos = alvos
+        self.taxa = 0.0
+        self.ativo = False
+        self._lock = threading.Lock()
+        self._originais = {}     # (classe, nome) -> função original
+        self._funcoes = {}       # nome -> [chamadas, total, próprio, máximo]
+        self._pilhas = {}        # pilha -> tempo próprio
+        self.amostras = 0
+
+    # ---- liga/desliga ----
+
+    def _metodos_alvo(self):
+        for modulo, classe, filtro in self.alvos:
+            dono = getattr(importlib.import_module(modulo), classe)
+            for nome, valor in list(vars(dono).items()):
+                if inspect.isfunction(valor) and filtro(nome):
+                    yield dono, nome, valor
+
+    def ativar(self, taxa=1.0):
+        """Instala os métodos medidos e amostra a fração `taxa` das requisições."""
+        if not 0.0 <= taxa <= 1.0:
+            raise ValueError("taxa deve estar entre 0 e 1")
+        with self._lock:
+            self.taxa = taxa
+            if self.ativo:
+                return
+            for dono, nome, funcao in self._metodos_alvo():
+                self._originais[(dono, nome)] = funcao
+                setattr(dono, nome, _medido(f"{dono.__name__}.{nome}", funcao))
+            self.ativo = True
+
+    def desativar(self):
+        """Restaura os métodos originais (os dados coletados são mantidos)."""
+        with self._lock:
+            for (dono, nome), funcao in self._originais.items():
+                setattr(dono, nome, funcao)
+            self._originais.clear()
+            self.ativo = False
+
+    def limpar(self):
+        with self._lock:
+            self._funcoes.clear()
+            self._pilhas.clear()
+            self.amostras = 0
+
+    # ---- amostras ----
+
+    def deve_amostrar(self, forcar=False):
+        return self.ativo and (forcar or random.random() < self.taxa)
+
+    def iniciar(self, rotulo):
+        """Começa a medir a thread atual (uma requisição)."""
+        _local.amostra = _Amostra(rotulo)
+
+    def finalizar(self, rotulo=None):
+        """Termina a amostra da thread atual e a agrega (`rotulo` a renomeia)."""
+        amostra = getattr(_local, "amostra", None)
+        if amostra is None:
+            return
+        _local.amostra = None
+        raiz = rotulo or amostra.rotulo
+        # Tempo da requisição fora dos métodos medidos (parse, envio, rotas)
+        fora = time.perf_counter() - amostra.inicio - amostra.filhos[0]
+        with self._lock:
+            self.amostras += 1
+            for pilha, nome, total, proprio in amostra.registros:
+                estatistica = self._funcoes.get(nome)
+                if estatistica is None:
+                    estatistica = self._funcoes[nome] = [0, 0.0, 0.0, 0.0]
+                estatistica[0] += 1
+                estatistica[1] += total
+                estatistica[2] += proprio
+                estatistica[3] = max(estatistica[3], total)
+                chave = (raiz,) + pilha[1:]
+                self._pilhas[chave] = self._pilhas.get(chave, 0.0) + proprio
+            self._pilhas[(raiz,)] = self._pilhas.get((raiz,), 0.0) + fora
+
+    @contextmanager
+    def amostra(self, rotulo):
+        """Mede o bloco (fora de requisições), se o perfilamento estiver ativo."""
+        if not self.ativo:
+            yield
+            return
+        self.iniciar(rotulo)
+        try:
+            yield
+        finally:
+            self.finalizar()
+
+    # ---- relatórios ----
+
+    def estatisticas(self):
+        """
+        Returns:
+            lista de dicts (funcao, chamadas, total_ms, proprio_ms, medio_ms,
+            max_ms), do maior tempo próprio para o menor
+        """
+        with self._lock:
+            itens = [(nome, list(valores)) for nome, valores in self._funcoes.items()]
+        linhas = [
+            {
+                "funcao": nome,
+                "chamadas": chamadas,
+                "total_ms": total * 1000,
+                "proprio_ms": proprio * 1000,
+                "medio_ms": total * 1000 / chamadas,
+                "max_ms": maximo * 1000,
+            }
+            for nome, (chamadas, total, proprio, maximo) in itens
+        ]
+        linhas.sort(key=lambda linha: linha["proprio_ms"], reverse=True)
+        return linhas
+
+    def resumo(self):
+        """Tabela de texto com as estatísticas por função."""
+        cabecalho = f"{'funcao':<48} {'chamadas':>9} {'total ms':>11} {'proprio ms':>11} {'medio ms':>9} {'max ms':>9}"
+        linhas = [f"perfilamento {'ativo' if self.ativo else 'inativo'} (taxa {self.taxa:g}, "
+                  f"{self.amostras} amostras)", cabecalho, "-" * len(cabecalho)]
+        for e in self.estatisticas():
+            linhas.append(f"{e['funcao']:<48} {e['chamadas']:>9} {e['total_ms']:>11.2f} "
+                          f"{e['proprio_ms']:>11.2f} {e['medio_ms']:>9.3f} {e['max_ms']:>9.3f}")
+        return "\n".join(linhas) + "\n"
+
+    def pilhas(self):
+        """Pilhas no formato folded: uma linha "a;b;c microssegundos" por pilha."""
+        with self._lock:
+            itens = sorted(self._pilhas.items())
+        return "".join(f"{';'.join(pilha)} {round(proprio * 1e6)}\n" for pilha, proprio in itens)
+
+
+def _medido(nome, funcao):
+    """Versão medida de `funcao`: sem amostra na thread, só a chama."""
+    @functools.wraps(funcao)
+    def medido(*args, **kwargs):
+        amostra = getattr(_local, "amostra", None)
+        if amostra is None:
+            return funcao(*args, **kwargs)
+        return amostra.medir(nome, funcao, args, kwargs)
+    return medido
+
+
+perfilador = Perfilador()
@@ -0,0 +1,406 @@
+# persistencia.py
+"""Persistência do estado da biblioteca em journal (write-ahead log) + snapshots.
+
+Todo o estado vive em memória (`modulo_emprestimo.emprestimos`,
+`mock_catalogo._catalogo_db`, `mock_usuarios._usuarios_db`). Com a
+persistência ativa, cada alteração vira uma linha JSON acrescentada ao
+arquivo `journal.log`:
+
+    [seq, tipo, dados]
+
+onde `tipo` é "emprestimo", "devolucao", "multas", "status_livro", "livro" ou
+"usuario".
+
+- A escrita apenas acrescenta ao buffer do arquivo; uma thread de fundo faz
+  flush + fsync em lote a cada `intervalo_fsync` segundos (group commit), de
+  modo que `adicionar_emprestimo` não espera pelo disco. Em caso de queda,
+  perdem-se no máximo os eventos desse intervalo.
+- A cada `eventos_por_snapshot` eventos o estado inteiro é gravado em
+  `snapshot.json` e o journal é reiniciado, mantendo o tempo de recuperação
+  limitado independentemente do tamanho do histórico.
+- Na inicialização, `ativar` carrega o snapshot e reaplica apenas os eventos
+  posteriores a ele.
+- Um único processo por diretório: `ativar` trava `.lock` (flock exclusivo)
+  enquanto a persistência estiver ativa. Outro processo que tente usar o
+  mesmo diretório (um segundo servidor, ou `importador.py --dados` com o
+  servidor no ar) recebe `DiretorioEmUso` em vez de intercalar números de
+  sequência ou ter o journal renomeado por baixo dele numa compactação.
+"""
+
+import json
+import os
+import threading
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+import modulo_emprestimo
+import mock_catalogo
+import mock_usuarios
+
+ARQUIVO_JOURNAL = "journal.log"
+ARQUIVO_JOURNAL_ANTIGO = "journal.log.old"
+ARQUIVO_SNAPSHOT = "snapshot.json"
+ARQUIVO_TRAVA = ".lock"
+
+INTERVALO_FSYNC_PADRAO = 0.05
+# Registros codificados por chamada a json.dumps ao gravar o snapshot: a
+# codificação roda em C sem soltar o GIL, então um estado grande de uma vez
+# pararia as outras threads (empréstimos, requisições) até o fim
+REGISTROS_POR_BLOCO = 1000
+EVENTOS_POR_SNAPSHOT_PADRAO = 100000
+
+
+class DiretorioEmUso(RuntimeError):
+    """Outro processo está com a persistência ativa no mesmo diretório."""
+
+
+def _gravar_atomico(caminho, partes):
+    """Grava um arquivo (texto em partes) de forma atômica (temporário + rename)."""
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        for parte in partes:
+            f.write(parte)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _referencias_estado():
+    """
+    Referências baratas ao estado atual: a lista de empréstimos e quantos
+    itens dela entram (só cresce por append) e cópias rasas de catálogo e
+    usuários. Deve ser chamada com as travas de empréstimos, catálogo e
+    usuários.
+    """
+    return (
+        modulo_emprestimo.next_loan_id,
+        modulo_emprestimo.emprestimos,
+        len(modulo_emprestimo.emprestimos),
+        dict(mock_catalogo._catalogo_db),
+        dict(mock_usuarios._usuarios_db),
+    )
+
+
+def _serializar_estado(referencias):
+    """
+    Monta o estado serializável a partir de `_referencias_estado`, fora das
+    travas. Alterações feitas depois das referências (devoluções, multas,
+    status de livros) podem aparecer no resultado; seus eventos vêm depois
+    do snapshot no journal e reaplicá-los dá o mesmo estado.
+    """
+    next_loan_id, emprestimos, total, livros, usuarios = referencias
+    return {
+        "next_loan_id": next_loan_id,
+        "emprestimos": [modulo_emprestimo._registro_emprestimo(e) for e in islice(emprestimos, total)],
+        "livros": [dict(livro) for livro in livros.values()],
+        "usuarios": [dict(usuario) for usuario in usuarios.values()],
+    }
+
+
+def _partes_snapshot(seq, estado):
+    """
+    Gera o JSON de {"seq", "estado"} em partes, com as listas codificadas
+    em blocos de REGISTROS_POR_BLOCO registros.
+    """
+    yield '{"seq":%d,"estado":{"next_loan_id":%d' % (seq, estado["next_loan_id"])
+    for chave in ("emprestimos", "livros", "usuarios"):
+        registros = estado[chave]
+        yield ',"%s":[' % chave
+        for inicio in range(0, len(registros), REGISTROS_POR_BLOCO):
+            bloco = json.dumps(registros[inicio:inicio + REGISTROS_POR_BLOCO],
+                               separators=(",", ":"), ensure_ascii=False)
+            yield ("," if inicio else "") + bloco[1:-1]
+        yield "]"
+    yield "}}"
+
+
+def capturar_estado():
+    """
+    Retorna uma cópia serializável do estado atual dos três módulos.
+    """
+    with modulo_emprestimo._lock, mock_catalogo._lock, mock_usuarios._lock:
+        referencias = _referencias_estado()
+    return _serializar_estado(referencias)
+
+
+def carregar_estado(estado):
+    """
+    Substitui o estado em memória pelo conteúdo de um snapshot.
+    """
+    with modulo_emprestimo._lock, mock_catalogo._lock, mock_usuarios._lock:
+        mock_usuarios._usuarios_db = {u["userId"]: u for u in estado["usuarios"]}
+        mock_catalogo._catalogo_db = {l["bookId"]: l for l in estado["livros"]}
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        for registro in estado["emprestimos"]:
+            modulo_emprestimo._restaurar_emprestimo(registro)
+        modulo_emprestimo.next_loan_id = max(modulo_emprestimo.next_loan_id, estado["next_loan_id"])
+
+
+def aplicar_evento(tipo, dados):
+    """
+    Reaplica um evento do journal ao estado em memória.
+    """
+    if tipo == "emprestimo":
+        modulo_emprestimo._restaurar_emprestimo(dados)
+        if dados["status"] == "ACTIVE":
+            mock_catalogo.update_status_livro(dados["bookId"], "emprestado")
+    elif tipo == "devolucao":
+        if modulo_emprestimo._restaurar_devolucao(dados["loanId"], dados["returnDate"], dados.get("fine", 0.0)):
+            emprestimo = modulo_emprestimo._buscar_emprestimo(dados["loanId"])
+            mock_catalogo.update_status_livro(emprestimo.get_book_id(), "disponivel")
+    elif tipo == "multas":
+        modulo_emprestimo._restaurar_multas(dados["multas"])
+    elif tipo == "status_livro":
+        mock_catalogo.update_status_livro(dados["bookId"], dados["status"])
+    elif tipo == "livro":
+        mock_catalogo.adicionar_livro(dados["bookId"], dados["titulo"], dados.get("autor"), dados["status"])
+    elif tipo == "usuario":
+        mock_usuarios.adicionar_usuario(dados["userId"], dados["nome"], dados["tipo"], dados["email"])
+
+
+def _ler_eventos(caminho):
+    """
+    Lê os eventos de um arquivo de journal. Uma última linha incompleta
+    (queda no meio da escrita) é ignorada.
+    """
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r", encoding="utf-8") as f:
+        for linha in f:
+            if not linha.endswith("\n"):
+                return
+            try:
+                yield json.loads(linha)
+            except ValueError:
+                return
+
+
+def _truncar_linha_incompleta(caminho):
+    """
+    Remove uma última linha sem "\\n" (escrita interrompida), para que novos
+    eventos não sejam acrescentados colados a ela.
+    """
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "r+b") as f:
+        tamanho = f.seek(0, os.SEEK_END)
+        fim = tamanho
+        while fim > 0:
+            inicio = max(0, fim - 65536)
+            f.seek(inicio)
+            bloco = f.read(fim - inicio)
+            posicao = bloco.rfind(b"\n")
+            if posicao != -1:
+                fim = inicio + posicao + 1
+                break
+            fim = inicio
+        if fim != tamanho:
+            f.truncate(fim)
+
+
+class Journal:
+    """Journal de eventos com fsync em lote e snapshots periódicos."""
+
+    def __init__(self, diretorio, intervalo_fsync=INTERVALO_FSYNC_PADRAO,
+                 eventos_por_snapshot=EVENTOS_POR_SNAPSHOT_PADRAO):
+        self.diretorio = diretorio
+        self.intervalo_fsync = intervalo_fsync
+        self.eventos_por_snapshot = eventos_por_snapshot
+        self.seq = 0
+        self._eventos_desde_snapshot = 0
+        self._arquivo = None
+        self._lock = threading.Lock()
+        self._lock_snapshot = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._trava = None
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def travar(self):
+        """
+        Trava o diretório para este processo (liberado em `fechar`).
+
+        Raises:
+            DiretorioEmUso: outro processo já travou o diretório
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        trava = open(self._caminho(ARQUIVO_TRAVA), "a+", encoding="utf-8")
+        if fcntl is not None:
+            try:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                trava.seek(0)
+                dono = trava.read().strip() or "?"
+                trava.close()
+                raise DiretorioEmUso(
+                    f"{self.diretorio} está em uso por outro processo (pid {dono}); "
+                    "pare-o antes de usar o mesmo diretório"
+                )
+        trava.seek(0)
+        trava.truncate()
+        trava.write(str(os.getpid()))
+        trava.flush()
+        self._trava = trava
+
+    def destravar(self):
+        """Libera a trava do diretório (fechar o arquivo solta o flock)."""
+        if self._trava is not None:
+            self._trava.close()
+            self._trava = None
+
+    def restaurar(self):
+        """
+        Carrega o snapshot e reaplica os eventos posteriores a ele.
+
+        Returns:
+            quantidade de eventos reaplicados
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        caminho_snapshot = self._caminho(ARQUIVO_SNAPSHOT)
+        if os.path.exists(caminho_snapshot):
+            with open(caminho_snapshot, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            carregar_estado(snapshot["estado"])
+            self.seq = snapshot["seq"]
+
+        aplicados = 0
+        for nome in (ARQUIVO_JOURNAL_ANTIGO, ARQUIVO_JOURNAL):
+            for seq, tipo, dados in _ler_eventos(self._caminho(nome)):
+                if seq <= self.seq:
+                    continue
+                aplicar_evento(tipo, dados)
+                self.seq = seq
+                aplicados += 1
+        self._eventos_desde_snapshot = aplicados
+        return aplicados
+
+    def abrir(self):
+        """Abre o journal para escrita e inicia a thread de fsync."""
+        os.makedirs(self.diretorio, exist_ok=True)
+        _truncar_linha_incompleta(self._caminho(ARQUIVO_JOURNAL))
+        self._arquivo = open(self._caminho(ARQUIVO_JOURNAL), "a", encoding="utf-8")
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="journal-fsync", daemon=True)
+        self._thread.start()
+
+    def registrar(self, tipo, dados):
+        """Acrescenta um evento ao journal (sem esperar pelo disco)."""
+        with self._lock:
+            self.seq += 1
+            linha = json.dumps([self.seq, tipo, dados], separators=(",", ":"), ensure_ascii=False)
+            self._arquivo.write(linha + "\n")
+            self._eventos_desde_snapshot += 1
+
+    def sincronizar(self):
+        """Grava no disco (flush + fsync) os eventos acumulados."""
+        with self._lock:
+            if self._arquivo is None:
+                return
+            self._arquivo.flush()
+            descritor = self._arquivo.fileno()
+        os.fsync(descritor)
+
+    def compactar(self):
+        """
+        Grava um snapshot do estado atual e descarta o journal anterior a ele.
+        """
+        with self._lock_snapshot:
+            # Marca o ponto do snapshot e troca de arquivo de journal no mesmo
+            # instante: eventos a partir daqui vão para o novo journal. Sob as
+            # travas dos módulos só se tomam referências (O(1) para os
+            # empréstimos); a conversão e o fsync ficam de fora, para não
+            # atrasar empréstimos e devoluções.
+            with modulo_emprestimo._lock, mock_catalogo._lock, mock_usuarios._lock:
+                referencias = _referencias_estado()
+                with self._lock:
+                    seq = self.seq
+                    antigo = self._arquivo
+                    antigo.flush()
+                    os.replace(self._caminho(ARQUIVO_JOURNAL), self._caminho(ARQUIVO_JOURNAL_ANTIGO))
+                    self._arquivo = open(self._caminho(ARQUIVO_JOURNAL), "a", encoding="utf-8")
+                    self._eventos_desde_snapshot = 0
+
+            os.fsync(antigo.fileno())
+            antigo.close()
+            self._gravar_snapshot(seq, _serializar_estado(referencias))
+            os.remove(self._caminho(ARQUIVO_JOURNAL_ANTIGO))
+
+    def _gravar_snapshot(self, seq, estado):
+        _gravar_atomico(self._caminho(ARQUIVO_SNAPSHOT), _partes_snapshot(seq, estado))
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo_fsync):
+            self.sincronizar()
+            if self._eventos_desde_snapshot >= self.eventos_por_snapshot:
+                self.compactar()
+
+    def fechar(self):
+        """Para a thread de fundo e grava os eventos pendentes."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sincronizar()
+        with self._lock:
+            if self._arquivo is not None:
+                self._arquivo.close()
+                self._arquivo = None
+        self.destravar()
+
+
+# Journal ativo (None quando a persistência está desligada)
+_journal = None
+
+
+def ativar(diretorio, **opcoes):
+    """
+    Restaura o estado salvo em `diretorio` e passa a registrar as alterações.
+
+    Args:
+        diretorio: pasta do journal e do snapshot (criada se não existir)
+        **opcoes: `intervalo_fsync` e `eventos_por_snapshot` do Journal
+
+    Returns:
+        o Journal ativo
+
+    Raises:
+        DiretorioEmUso: outro processo usa o mesmo diretório
+    """
+    global _journal
+    if _journal is not None:
+        raise RuntimeError("Persistência já está ativa")
+    journal = Journal(diretorio, **opcoes)
+    journal.travar()
+    try:
+        journal.restaurar()
+        if os.path.exists(journal._caminho(ARQUIVO_JOURNAL_ANTIGO)):
+            # Uma compactação anterior foi interrompida: o estado recuperado já
+            # inclui o journal antigo, então basta gravar o snapshot que faltou.
+            journal._gravar_snapshot(journal.seq, capturar_estado())
+            os.remove(journal._caminho(ARQUIVO_JOURNAL_ANTIGO))
+        journal.abrir()
+    except BaseException:
+        journal.destravar()
+        raise
+    for modulo in (modulo_emprestimo, mock_catalogo, mock_usuarios):
+        modulo.registrar_ouvinte(journal.registrar)
+    _journal = journal
+    return journal
+
+
+def desativar():
+    """Para de registrar alterações e fecha o journal."""
+    global _journal
+    if _journal is None:
+        return
+    for modulo in (modulo_emprestimo, mock_catalogo, mock_usuarios):
+        modulo.remover_ouvinte(_journal.registrar)
+    _journal.fechar()
+    _journal = None
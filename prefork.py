@@ -0,0 +1,133 @@
+"""Implantação prefork: vários processos atendendo o mesmo socket.
+
+Um processo Python executa bytecode em um núcleo por vez (GIL), por mais
+threads que tenha. Aqui o processo mestre abre o socket de escuta e cria N
+processos filhos com `fork`; cada filho herda o socket e roda seu próprio
+servidor (threads ou asyncio) sobre ele, e o kernel entrega cada nova
+conexão a um dos filhos que a aceitar.
+
+O estado compartilhado precisa viver fora dos processos: os filhos usam o
+backend SQLite (`repositorio_sqlite`), cuja troca condicional de status do
+livro numa transação `BEGIN IMMEDIATE` garante que um livro emprestado num
+processo fica indisponível para todos os outros no mesmo instante. Os caches
+de página de cada filho são invalidados pela versão guardada no banco.
+
+O mestre apenas supervisiona: recria filhos que morrerem e, em SIGINT ou
+SIGTERM, repassa SIGTERM a todos e espera que terminem graciosamente.
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+
+BACKLOG = 1024
+_SINAIS = {signal.SIGINT, signal.SIGTERM}
+# Um filho que morre antes disso é recriado com atraso, para não entrar em
+# laço caso falhe logo ao iniciar
+VIDA_MINIMA = 1.0
+# De quanto em quanto tempo um filho confere se o mestre ainda existe
+INTERVALO_VIGIA = 1.0
+
+
+def abrir_socket(host="", porta=8000):
+    """
+    Abre o socket de escuta compartilhado pelos filhos.
+
+    Fica não bloqueante: quando vários filhos acordam para a mesma conexão,
+    os que perdem a corrida recebem BlockingIOError em vez de travar no
+    accept().
+    """
+    sock = socket.create_server((host, porta), backlog=BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+def _vigiar_mestre(pid_mestre):
+    """Encerra o filho (SIGTERM para si mesmo) se o mestre morrer."""
+    while os.getppid() == pid_mestre:
+        time.sleep(INTERVALO_VIGIA)
+    os.kill(os.getpid(), signal.SIGTERM)
+
+
+def _executar_filho(trabalho, sock, indice, pid_mestre):
+    """Roda `trabalho(sock, indice)` no filho e termina o processo."""
+    codigo = 0
+    try:
+        # Ctrl+C chega a todo o grupo de processos: no filho, SIGINT e
+        # SIGTERM viram KeyboardInterrupt (o `trabalho` pode trocá-los)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, _SINAIS)
+        threading.Thread(target=_vigiar_mestre, args=(pid_mestre,), daemon=True).start()
+        trabalho(sock, indice)
+    except KeyboardInterrupt:
+        pass
+    except BaseException:
+        traceback.print_exc()
+        codigo = 1
+    finally:
+        # Sem voltar ao código do mestre (nem rodar seus atexit)
+        os._exit(codigo)
+
+
+def rodar(trabalho, sock, processos):
+    """
+    Cria `processos` filhos rodando `trabalho(sock, indice)` e os supervisiona
+    até SIGINT/SIGTERM.
+
+    `trabalho` deve atender conexões de `sock` até receber SIGTERM (ou
+    KeyboardInterrupt) e então retornar.
+
+    Returns:
+        quando todos os filhos terminaram
+    """
+    if processos < 1:
+        raise ValueError("processos deve ser >= 1")
+    filhos = {}  # pid -> (indice, instante de início)
+    pid_mestre = os.getpid()
+    parar = False
+
+    def criar(indice):
+        # Sinais bloqueados durante o fork: o filho não pode executar o
+        # tratador do mestre antes de instalar os seus
+        signal.pthread_sigmask(signal.SIG_BLOCK, _SINAIS)
+        try:
+            pid = os.fork()
+            if pid == 0:
+                _executar_filho(trabalho, sock, indice, pid_mestre)
+            filhos[pid] = (indice, time.monotonic())
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, _SINAIS)
+
+    def encerrar(sinal, frame):
+        nonlocal parar
+        parar = True
+        for pid in list(filhos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    anteriores = {s: signal.signal(s, encerrar) for s in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for indice in range(processos):
+            criar(indice)
+        while filhos:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            indice, inicio = filhos.pop(pid, (None, None))
+            if parar or indice is None:
+                continue
+            if time.monotonic() - inicio < VIDA_MINIMA:
+                time.sleep(VIDA_MINIMA)
+            if not parar:
+                criar(indice)
+    finally:
+        for sinal, tratador in anteriores.items():
+            signal.signal(sinal, tratador)
+        sock.close()
@@ -0,0 +1,123 @@
+# repositorio.py
+"""Backends de armazenamento da biblioteca.
+
+Um repositório expõe, como métodos, as mesmas funções (mesmos nomes,
+parâmetros e retornos) dos módulos de dados:
+
+- usuários: get_usuario, usuario_existe, adicionar_usuario,
+  adicionar_usuarios, listar_usuarios
+- catálogo: get_livro, livro_existe, update_status_livro, adicionar_livro,
+  adicionar_livros,
+  listar_livros, listar_livros_disponiveis, listar_livros_por_status,
+  contar_livros_por_status, buscar_livros
+- empréstimos: verificar_disponibilidade, adicionar_emprestimo,
+  registrar_devolucao, registrar_emprestimos, registrar_devolucoes,
+  get_emprestimos, iterar_emprestimos, get_emprestimo_by_id,
+  listar_emprestimos, get_estatisticas, get_livros_mais_emprestados,
+  get_usuarios_mais_ativos
+- vencimentos e multas: proximos_vencimentos, listar_atrasados,
+  aplicar_multas
+- as gravações em lote (adicionar_usuarios, adicionar_livros) retornam a
+  lista de (posição, erro) dos registros recusados; um livro é recusado se
+  o status informado contradiz os empréstimos (sem status, mantém o atual)
+- versão: get_versao (texto que muda sempre que qualquer dado muda; usado
+  pela View em ETags e no cache de páginas)
+
+`RepositorioMemoria` (padrão) delega para `mock_usuarios`, `mock_catalogo` e
+`modulo_emprestimo`; `repositorio_sqlite.RepositorioSQLite` guarda tudo num
+arquivo SQLite. O Controller conversa apenas com o repositório escolhido.
+"""
+
+import os
+
+import modulo_emprestimo
+import mock_catalogo
+import mock_usuarios
+
+BACKENDS = ("memoria", "sqlite")
+
+# Identifica esta execução do processo: as versões em memória recomeçam do
+# zero a cada início, então a instância entra na versão para que um ETag
+# antigo nunca confira com dados de outra execução.
+_INSTANCIA = os.urandom(4).hex()
+
+# Função do contrato -> módulo em memória que a implementa
+_FUNCOES_MEMORIA = {
+    "get_usuario": mock_usuarios,
+    "usuario_existe": mock_usuarios,
+    "adicionar_usuario": mock_usuarios,
+    "adicionar_usuarios": mock_usuarios,
+    "listar_usuarios": mock_usuarios,
+    "get_livro": mock_catalogo,
+    "livro_existe": mock_catalogo,
+    "update_status_livro": mock_catalogo,
+    "adicionar_livro": mock_catalogo,
+    "adicionar_livros": modulo_emprestimo,
+    "listar_livros": mock_catalogo,
+    "listar_livros_disponiveis": mock_catalogo,
+    "listar_livros_por_status": mock_catalogo,
+    "contar_livros_por_status": mock_catalogo,
+    "buscar_livros": mock_catalogo,
+    "verificar_disponibilidade": modulo_emprestimo,
+    "adicionar_emprestimo": modulo_emprestimo,
+    "registrar_devolucao": modulo_emprestimo,
+    "registrar_emprestimos": modulo_emprestimo,
+    "registrar_devolucoes": modulo_emprestimo,
+    "get_emprestimos": modulo_emprestimo,
+    "iterar_emprestimos": modulo_emprestimo,
+    "get_emprestimo_by_id": modulo_emprestimo,
+    "listar_emprestimos": modulo_emprestimo,
+    "get_estatisticas": modulo_emprestimo,
+    "get_livros_mais_emprestados": modulo_emprestimo,
+    "get_usuarios_mais_ativos": modulo_emprestimo,
+    "proximos_vencimentos": modulo_emprestimo,
+    "listar_atrasados": modulo_emprestimo,
+    "aplicar_multas": modulo_emprestimo,
+}
+
+
+class RepositorioMemoria:
+    """Repositório padrão: delega para os módulos em memória."""
+
+    nome = "memoria"
+
+    def __getattr__(self, nome):
+        modulo = _FUNCOES_MEMORIA.get(nome)
+        if modulo is None:
+            raise AttributeError(nome)
+        # Resolvido a cada acesso para acompanhar substituições dos módulos
+        return getattr(modulo, nome)
+
+    def get_versao(self):
+        """Combina as versões de empréstimos, catálogo e usuários."""
+        return "%s.%d.%d.%d" % (
+            _INSTANCIA,
+            modulo_emprestimo.get_versao(),
+            mock_catalogo.get_versao(),
+            mock_usuarios.get_versao(),
+        )
+
+    def fechar(self):
+        """Nada a liberar: o estado vive nos módulos."""
+
+
+def criar_repositorio(backend="memoria", caminho=None, **opcoes):
+    """
+    Cria o repositório do backend informado.
+
+    Args:
+        backend: "memoria" ou "sqlite"
+        caminho: arquivo do banco (obrigatório para "sqlite")
+        **opcoes: repassadas ao construtor do backend
+
+    Raises:
+        ValueError: backend desconhecido ou caminho ausente
+    """
+    if backend == "memoria":
+        return RepositorioMemoria()
+    if backend == "sqlite":
+        if not caminho:
+            raise ValueError("O backend sqlite exige o caminho do banco")
+        from repositorio_sqlite import RepositorioSQLite
+        return RepositorioSQLite(caminho, **opcoes)
+    raise ValueError(f"Backend desconhecido: {backend}")
@@ -0,0 +1,655 @@
+# repositorio_sqlite.py
+"""Repositório da biblioteca em SQLite.
+
+Implementa o mesmo contrato de `repositorio.RepositorioMemoria` (mesmos nomes
+de funções, parâmetros, retornos e mensagens de erro) sobre um arquivo
+SQLite, para que os dados não precisem caber na memória do processo e
+possam ser compartilhados entre processos.
+
+- Pool de conexões (uma conexão por thread em uso, reaproveitadas).
+- Modo WAL: leitores não bloqueiam o escritor.
+- SQL constante por operação, reaproveitado pelo cache de statements
+  preparados de cada conexão.
+- Índices por userId, bookId e status; contadores e rankings mantidos por
+  triggers, de modo que estatísticas e relatórios não fazem COUNT(*) sobre o
+  histórico.
+- Busca por título e autor num índice FTS5 mantido por triggers.
+- Atrasados e próximos vencimentos num índice parcial por dueDate que
+  contém apenas os empréstimos ativos.
+- Operações em lote (`registrar_emprestimos`, `registrar_devolucoes`)
+  validam todos os itens com poucas consultas `IN (...)` e aplicam tudo numa
+  única transação.
+- Empréstimo e devolução em transações `BEGIN IMMEDIATE`, com troca de
+  status do livro condicional (`... AND status = 'disponivel'`): dois
+  empréstimos simultâneos do mesmo livro nunca são aceitos, mesmo vindos de
+  processos diferentes.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import busca
+import modulo_emprestimo
+import multas
+import mock_catalogo
+import mock_usuarios
+
+TAMANHO_POOL_PADRAO = 8
+# Máximo de parâmetros por consulta `IN (...)` nas operações em lote
+TAMANHO_LOTE_IN = 500
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    userId INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    email TEXT,
+    total_emprestimos INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS livros (
+    bookId INTEGER PRIMARY KEY,
+    titulo TEXT NOT NULL,
+    autor TEXT,
+    status TEXT NOT NULL DEFAULT 'disponivel',
+    total_emprestimos INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS emprestimos (
+    loanId INTEGER PRIMARY KEY AUTOINCREMENT,
+    userId INTEGER NOT NULL,
+    bookId INTEGER NOT NULL,
+    loanDate INTEGER NOT NULL,
+    dueDate INTEGER NOT NULL,
+    returnDate INTEGER,
+    status TEXT NOT NULL,
+    fine REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS contadores (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_emprestimos_usuario ON emprestimos(userId, loanId);
+CREATE INDEX IF NOT EXISTS idx_emprestimos_livro ON emprestimos(bookId, loanId);
+CREATE INDEX IF NOT EXISTS idx_emprestimos_status ON emprestimos(status, loanId);
+CREATE INDEX IF NOT EXISTS idx_emprestimos_vencimento ON emprestimos(dueDate, loanId) WHERE status = 'ACTIVE';
+CREATE INDEX IF NOT EXISTS idx_livros_status ON livros(status, bookId);
+CREATE INDEX IF NOT EXISTS idx_livros_ranking ON livros(total_emprestimos DESC, bookId);
+CREATE INDEX IF NOT EXISTS idx_usuarios_ranking ON usuarios(total_emprestimos DESC, userId);
+
+CREATE TRIGGER IF NOT EXISTS trg_emprestimo_inserido AFTER INSERT ON emprestimos BEGIN
+    INSERT INTO contadores VALUES ('emprestimos', 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+    INSERT INTO contadores VALUES ('emprestimos:' || NEW.status, 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+    UPDATE livros SET total_emprestimos = total_emprestimos + 1 WHERE bookId = NEW.bookId;
+    UPDATE usuarios SET total_emprestimos = total_emprestimos + 1 WHERE userId = NEW.userId;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_emprestimo_status AFTER UPDATE OF status ON emprestimos
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE contadores SET valor = valor - 1 WHERE chave = 'emprestimos:' || OLD.status;
+    INSERT INTO contadores VALUES ('emprestimos:' || NEW.status, 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_livro_inserido AFTER INSERT ON livros BEGIN
+    INSERT INTO contadores VALUES ('livros:' || NEW.status, 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_livro_status AFTER UPDATE OF status ON livros
+WHEN OLD.status <> NEW.status BEGIN
+    UPDATE contadores SET valor = valor - 1 WHERE chave = 'livros:' || OLD.status;
+    INSERT INTO contadores VALUES ('livros:' || NEW.status, 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_livro_removido AFTER DELETE ON livros BEGIN
+    UPDATE contadores SET valor = valor - 1 WHERE chave = 'livros:' || OLD.status;
+END;
+"""
+
+# Contador 'versao': incrementado a cada escrita em qualquer tabela de dados,
+# inclusive por outros processos que usem o mesmo arquivo. 'instancia' é
+# sorteado na criação do banco, para que versões de um arquivo recriado não
+# se confundam com as do anterior.
+_ESQUEMA += """
+INSERT OR IGNORE INTO contadores VALUES ('instancia', abs(random() % 4294967296));
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_versao_{tabela}_{evento.lower()} AFTER {evento} ON {tabela} BEGIN
+    INSERT INTO contadores VALUES ('versao', 1)
+        ON CONFLICT(chave) DO UPDATE SET valor = valor + 1;
+END;"""
+    for tabela in ("usuarios", "livros", "emprestimos")
+    for evento in ("INSERT", "UPDATE", "DELETE")
+)
+
+# Busca por título e autor: índice FTS5 sobre a tabela livros (sem copiar o
+# texto), sem acentos nem diferença de maiúsculas, com índices de prefixo
+# de 2 e 3 letras para o autocompletar. Mantido por triggers; bancos criados
+# antes do índice são indexados uma vez, na abertura.
+_ESQUEMA += """
+CREATE VIRTUAL TABLE IF NOT EXISTS livros_busca USING fts5(
+    titulo, autor, content='livros', content_rowid='bookId',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS trg_busca_livro_inserido AFTER INSERT ON livros BEGIN
+    INSERT INTO livros_busca(rowid, titulo, autor) VALUES (NEW.bookId, NEW.titulo, NEW.autor);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_busca_livro_alterado AFTER UPDATE OF titulo, autor ON livros BEGIN
+    INSERT INTO livros_busca(livros_busca, rowid, titulo, autor) VALUES ('delete', OLD.bookId, OLD.titulo, OLD.autor);
+    INSERT INTO livros_busca(rowid, titulo, autor) VALUES (NEW.bookId, NEW.titulo, NEW.autor);
+END;
+CREATE TRIGGER IF NOT EXISTS trg_busca_livro_removido AFTER DELETE ON livros BEGIN
+    INSERT INTO livros_busca(livros_busca, rowid, titulo, autor) VALUES ('delete', OLD.bookId, OLD.titulo, OLD.autor);
+END;
+INSERT INTO livros_busca(livros_busca)
+    SELECT 'rebuild' WHERE NOT EXISTS (SELECT 1 FROM contadores WHERE chave = 'indice_busca');
+INSERT OR IGNORE INTO contadores VALUES ('indice_busca', 1);
+"""
+
+_SQL_USUARIO = "SELECT userId, nome, tipo, email FROM usuarios WHERE userId = ?"
+_SQL_USUARIOS = "SELECT userId, nome, tipo, email FROM usuarios ORDER BY userId"
+_SQL_UPSERT_USUARIO = (
+    "INSERT INTO usuarios (userId, nome, tipo, email) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(userId) DO UPDATE SET nome = excluded.nome, tipo = excluded.tipo, email = excluded.email"
+)
+_SQL_LIVRO = "SELECT bookId, titulo, autor, status FROM livros WHERE bookId = ?"
+_SQL_LIVROS = "SELECT bookId, titulo, autor, status FROM livros ORDER BY bookId"
+_SQL_LIVROS_POR_STATUS = "SELECT bookId, titulo, autor, status FROM livros WHERE status = ? ORDER BY bookId"
+# Sem status (NULL), um livro cadastrado mantém o atual e um novo fica disponível
+_SQL_UPSERT_LIVRO = (
+    "INSERT INTO livros (bookId, titulo, autor, status) VALUES (?1, ?2, ?3, COALESCE(?4, 'disponivel')) "
+    "ON CONFLICT(bookId) DO UPDATE SET titulo = excluded.titulo, autor = excluded.autor, "
+    "status = COALESCE(?4, status)"
+)
+# Mesmos pesos do índice em memória: título 2, autor 1 (bm25 menor = melhor)
+_SQL_BUSCAR_LIVROS = (
+    "SELECT l.bookId, l.titulo, l.autor, l.status FROM livros_busca "
+    "JOIN livros l ON l.bookId = livros_busca.rowid "
+    "WHERE livros_busca MATCH ? ORDER BY bm25(livros_busca, 2.0, 1.0), l.bookId LIMIT ?"
+)
+_SQL_PAGINA_LIVROS_POR_STATUS = (
+    "SELECT bookId, titulo, autor, status FROM livros WHERE status = ? ORDER BY bookId LIMIT ? OFFSET ?"
+)
+_SQL_BUSCAR_LIVROS_POR_STATUS = (
+    "SELECT l.bookId, l.titulo, l.autor, l.status FROM livros_busca "
+    "JOIN livros l ON l.bookId = livros_busca.rowid "
+    "WHERE livros_busca MATCH ? AND l.status = ? "
+    "ORDER BY bm25(livros_busca, 2.0, 1.0), l.bookId LIMIT ? OFFSET ?"
+)
+_SQL_CONTAR_BUSCA_POR_STATUS = (
+    "SELECT COUNT(*) FROM livros_busca JOIN livros l ON l.bookId = livros_busca.rowid "
+    "WHERE livros_busca MATCH ? AND l.status = ?"
+)
+_SQL_STATUS_LIVRO = "UPDATE livros SET status = ? WHERE bookId = ?"
+_SQL_STATUS_LIVRO_CONDICIONAL = "UPDATE livros SET status = ? WHERE bookId = ? AND status = ?"
+_SQL_CONTADORES = "SELECT chave, valor FROM contadores WHERE chave >= ? AND chave < ?"
+_SQL_VERSAO = "SELECT chave, valor FROM contadores WHERE chave IN ('instancia', 'versao')"
+
+_COLUNAS_EMPRESTIMO = "loanId, userId, bookId, loanDate, dueDate, returnDate, status, fine"
+_SQL_EMPRESTIMO = f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE loanId = ?"
+_SQL_EMPRESTIMOS = f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos ORDER BY loanId"
+_SQL_INSERIR_EMPRESTIMO = (
+    "INSERT INTO emprestimos (userId, bookId, loanDate, dueDate, status) VALUES (?, ?, ?, ?, 'ACTIVE')"
+)
+_SQL_DEVOLVER = "UPDATE emprestimos SET status = 'RETURNED', returnDate = ?, fine = ? WHERE loanId = ?"
+_SQL_ATRASADOS = (
+    f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE status = 'ACTIVE' AND dueDate < ? "
+    "ORDER BY dueDate, loanId LIMIT ? OFFSET ?"
+)
+_SQL_CONTAR_ATRASADOS = "SELECT COUNT(*) AS total FROM emprestimos WHERE status = 'ACTIVE' AND dueDate < ?"
+_SQL_PROXIMOS_VENCIMENTOS = (
+    f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE status = 'ACTIVE' AND dueDate >= ? "
+    "ORDER BY dueDate, loanId LIMIT ?"
+)
+_SQL_MULTAS_ATRASADOS = (
+    "SELECT loanId, dueDate, fine FROM emprestimos WHERE status = 'ACTIVE' AND dueDate < ?"
+)
+_SQL_MULTA = "UPDATE emprestimos SET fine = ? WHERE loanId = ?"
+_SQL_RANKING_LIVROS = (
+    "SELECT bookId, total_emprestimos FROM livros WHERE total_emprestimos > 0 "
+    "ORDER BY total_emprestimos DESC, bookId LIMIT ?"
+)
+_SQL_RANKING_USUARIOS = (
+    "SELECT userId, total_emprestimos FROM usuarios WHERE total_emprestimos > 0 "
+    "ORDER BY total_emprestimos DESC, userId LIMIT ?"
+)
+
+
+def _para_dict_emprestimo(linha):
+    """Converte uma linha da tabela emprestimos no dict de `Emprestimo.to_dict`."""
+    return modulo_emprestimo._emprestimo_de_registro(dict(linha)).to_dict()
+
+
+def _expressao_busca(consulta):
+    """
+    Expressão MATCH do FTS5 para `consulta`: termos entre aspas (sem
+    operadores do FTS5), o último como prefixo. None se não houver termos.
+    """
+    lista = busca.termos(consulta)
+    if not lista:
+        return None
+    return " ".join(f'"{termo}"' for termo in lista) + "*"
+
+
+def _buscar_em_lote(conexao, sql_base, ids):
+    """
+    Executa `sql_base` (terminado em "IN") para todos os `ids`, em blocos de
+    TAMANHO_LOTE_IN, e retorna as linhas encontradas.
+    """
+    ids = list(dict.fromkeys(ids))
+    linhas = []
+    for inicio in range(0, len(ids), TAMANHO_LOTE_IN):
+        bloco = ids[inicio:inicio + TAMANHO_LOTE_IN]
+        marcadores = ",".join("?" * len(bloco))
+        linhas.extend(conexao.execute(f"{sql_base} ({marcadores})", bloco))
+    return linhas
+
+
+class _PoolConexoes:
+    """Pool simples de conexões SQLite, seguro para threads e para fork."""
+
+    def __init__(self, caminho, tamanho):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self._iniciar()
+
+    def _iniciar(self):
+        self._pid = os.getpid()
+        self._livres = queue.LifoQueue()
+        self._todas = []
+        self._lock = threading.Lock()
+
+    def _nova_conexao(self):
+        conexao = sqlite3.connect(
+            self.caminho,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        conexao.row_factory = sqlite3.Row
+        conexao.execute("PRAGMA journal_mode=WAL")
+        conexao.execute("PRAGMA synchronous=NORMAL")
+        return conexao
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool durante o bloco `with`."""
+        if self._pid != os.getpid():
+            # Processo filho (fork): conexões do pai não podem ser reusadas,
+            # nem fechadas aqui (o fechamento mexeria nos arquivos do pai);
+            # ficam apenas referenciadas.
+            self._herdadas = self._todas
+            self._iniciar()
+        try:
+            conexao = self._livres.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                criar = len(self._todas) < self.tamanho
+                if criar:
+                    conexao = self._nova_conexao()
+                    self._todas.append(conexao)
+            if not criar:
+                conexao = self._livres.get()
+        try:
+            yield conexao
+        finally:
+            self._livres.put(conexao)
+
+    def fechar(self):
+        with self._lock:
+            for conexao in self._todas:
+                conexao.close()
+            self._todas = []
+            self._livres = queue.LifoQueue()
+
+
+class RepositorioSQLite:
+    """Repositório da biblioteca guardado num arquivo SQLite."""
+
+    nome = "sqlite"
+
+    def __init__(self, caminho, tamanho_pool=TAMANHO_POOL_PADRAO):
+        self.caminho = caminho
+        self._pool = _PoolConexoes(caminho, tamanho_pool)
+        with self._pool.conexao() as conexao:
+            conexao.executescript(_ESQUEMA)
+
+    # ========== INFRAESTRUTURA ==========
+
+    @contextmanager
+    def _transacao(self):
+        """Executa o bloco numa transação de escrita (BEGIN IMMEDIATE)."""
+        with self._pool.conexao() as conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            try:
+                yield conexao
+            except BaseException:
+                conexao.execute("ROLLBACK")
+                raise
+            conexao.execute("COMMIT")
+
+    def _consultar_um(self, sql, parametros=()):
+        with self._pool.conexao() as conexao:
+            linha = conexao.execute(sql, parametros).fetchone()
+        return dict(linha) if linha else None
+
+    def _consultar(self, sql, parametros=()):
+        with self._pool.conexao() as conexao:
+            return [dict(linha) for linha in conexao.execute(sql, parametros)]
+
+    def _contadores(self, prefixo):
+        """Retorna {sufixo: valor} dos contadores cuja chave começa com `prefixo`."""
+        linhas = self._consultar(_SQL_CONTADORES, (prefixo, prefixo + "￿"))
+        return {linha["chave"][len(prefixo):]: linha["valor"] for linha in linhas}
+
+    def importar_mocks(self):
+        """
+        Copia usuários e livros dos mocks em memória se o banco estiver vazio
+        (primeira execução).
+        """
+        with self._transacao() as conexao:
+            if conexao.execute("SELECT 1 FROM usuarios LIMIT 1").fetchone():
+                return False
+            conexao.executemany(_SQL_UPSERT_USUARIO, [
+                (u["userId"], u["nome"], u["tipo"], u["email"]) for u in mock_usuarios.listar_usuarios()
+            ])
+            conexao.executemany(_SQL_UPSERT_LIVRO, [
+                (l["bookId"], l["titulo"], l.get("autor"), l["status"]) for l in mock_catalogo.listar_livros()
+            ])
+        return True
+
+    def fechar(self):
+        """Fecha todas as conexões do pool."""
+        self._pool.fechar()
+
+    def get_versao(self):
+        valores = {linha["chave"]: linha["valor"] for linha in self._consultar(_SQL_VERSAO)}
+        return "%x.%d" % (valores.get("instancia", 0), valores.get("versao", 0))
+
+    # ========== USUARIOS ==========
+
+    def get_usuario(self, user_id):
+        return self._consultar_um(_SQL_USUARIO, (user_id,))
+
+    def usuario_existe(self, user_id):
+        return self.get_usuario(user_id) is not None
+
+    def adicionar_usuario(self, user_id, nome, tipo, email):
+        with self._transacao() as conexao:
+            conexao.execute(_SQL_UPSERT_USUARIO, (user_id, nome, tipo, email))
+
+    def adicionar_usuarios(self, usuarios):
+        with self._transacao() as conexao:
+            conexao.executemany(_SQL_UPSERT_USUARIO, usuarios)
+        return []
+
+    def listar_usuarios(self):
+        return self._consultar(_SQL_USUARIOS)
+
+    # ========== CATALOGO ==========
+
+    def get_livro(self, book_id):
+        return self._consultar_um(_SQL_LIVRO, (book_id,))
+
+    def livro_existe(self, book_id):
+        return self.get_livro(book_id) is not None
+
+    def update_status_livro(self, book_id, novo_status, status_esperado=None):
+        with self._transacao() as conexao:
+            if status_esperado is None:
+                cursor = conexao.execute(_SQL_STATUS_LIVRO, (novo_status, book_id))
+            else:
+                cursor = conexao.execute(_SQL_STATUS_LIVRO_CONDICIONAL, (novo_status, book_id, status_esperado))
+            return cursor.rowcount == 1
+
+    def adicionar_livro(self, book_id, titulo, autor, status="disponivel"):
+        with self._transacao() as conexao:
+            conexao.execute(_SQL_UPSERT_LIVRO, (book_id, titulo, autor, status))
+
+    def adicionar_livros(self, livros):
+        livros = list(livros)
+        with self._transacao() as conexao:
+            # Status informado conferido com os empréstimos ativos na mesma
+            # transação (veja `modulo_emprestimo.adicionar_livros`)
+            emprestados = {linha["bookId"] for linha in _buscar_em_lote(
+                conexao, "SELECT DISTINCT bookId FROM emprestimos WHERE status = 'ACTIVE' AND bookId IN",
+                [livro[0] for livro in livros if livro[3] is not None])}
+            aceitos, recusados = [], []
+            for posicao, livro in enumerate(livros):
+                erro = modulo_emprestimo._conflito_status(livro[3], livro[0] in emprestados)
+                if erro is None:
+                    aceitos.append(livro)
+                else:
+                    recusados.append((posicao, erro))
+            conexao.executemany(_SQL_UPSERT_LIVRO, aceitos)
+        return recusados
+
+    def listar_livros(self):
+        return self._consultar(_SQL_LIVROS)
+
+    def listar_livros_disponiveis(self):
+        return self._consultar(_SQL_LIVROS_POR_STATUS, ("disponivel",))
+
+    def buscar_livros(self, consulta, limite=20):
+        expressao = _expressao_busca(consulta)
+        if expressao is None or limite <= 0:
+            return []
+        return self._consultar(_SQL_BUSCAR_LIVROS, (expressao, limite))
+
+    def listar_livros_por_status(self, status, consulta=None, offset=0, limite=50):
+        if consulta is None:
+            return {
+                "livros": self._consultar(_SQL_PAGINA_LIVROS_POR_STATUS, (status, limite, offset)),
+                "total": self._contadores("livros:").get(status, 0),
+            }
+        expressao = _expressao_busca(consulta)
+        if expressao is None:
+            return {"livros": [], "total": 0}
+        with self._pool.conexao() as conexao:
+            total = conexao.execute(_SQL_CONTAR_BUSCA_POR_STATUS, (expressao, status)).fetchone()[0]
+            linhas = conexao.execute(_SQL_BUSCAR_LIVROS_POR_STATUS, (expressao, status, limite, offset))
+            return {"livros": [dict(linha) for linha in linhas], "total": total}
+
+    def contar_livros_por_status(self):
+        return {status: n for status, n in self._contadores("livros:").items() if n}
+
+    # ========== EMPRESTIMOS ==========
+
+    def verificar_disponibilidade(self, book_id):
+        livro = self.get_livro(book_id)
+        if not livro:
+            return {"erro": "Livro não encontrado"}
+        return livro
+
+    def adicionar_emprestimo(self, user_id, book_id):
+        with self._transacao() as conexao:
+            usuario = conexao.execute(_SQL_USUARIO, (user_id,)).fetchone()
+            if not usuario:
+                return {"sucesso": False, "erro": "Usuário não encontrado"}
+            if not conexao.execute(_SQL_LIVRO, (book_id,)).fetchone():
+                return {"sucesso": False, "erro": "Livro não encontrado"}
+            cursor = conexao.execute(_SQL_STATUS_LIVRO_CONDICIONAL, ("emprestado", book_id, "disponivel"))
+            if cursor.rowcount != 1:
+                return {"sucesso": False, "erro": "Livro indisponível"}
+
+            agora = datetime.now()
+            data_devolucao = modulo_emprestimo._calcular_due_date(agora, usuario["tipo"])
+            cursor = conexao.execute(_SQL_INSERIR_EMPRESTIMO, (
+                user_id, book_id,
+                modulo_emprestimo._para_epoca(agora), modulo_emprestimo._para_epoca(data_devolucao),
+            ))
+            linha = conexao.execute(_SQL_EMPRESTIMO, (cursor.lastrowid,)).fetchone()
+        return {"sucesso": True, "loan": _para_dict_emprestimo(linha)}
+
+    def registrar_devolucao(self, loan_id):
+        with self._transacao() as conexao:
+            linha = conexao.execute(_SQL_EMPRESTIMO, (loan_id,)).fetchone()
+            if not linha:
+                return {"sucesso": False, "erro": "Empréstimo não encontrado"}
+            if linha["status"] != "ACTIVE":
+                return {"sucesso": False, "erro": "Empréstimo já devolvido"}
+            return_date = modulo_emprestimo._para_epoca(datetime.now())
+            multa = multas.politica.calcular(linha["dueDate"], return_date)
+            conexao.execute(_SQL_DEVOLVER, (return_date, multa, loan_id))
+            conexao.execute(_SQL_STATUS_LIVRO, ("disponivel", linha["bookId"]))
+            linha = conexao.execute(_SQL_EMPRESTIMO, (loan_id,)).fetchone()
+        return {"sucesso": True, "loan": _para_dict_emprestimo(linha)}
+
+    def registrar_emprestimos(self, pares):
+        pares = list(pares)
+        with self._transacao() as conexao:
+            # Validação em uma passagem: usuários e livros do lote são lidos
+            # de uma vez e o status dos livros é acompanhado localmente.
+            usuarios = {linha["userId"]: linha["tipo"] for linha in _buscar_em_lote(
+                conexao, "SELECT userId, tipo FROM usuarios WHERE userId IN", [u for u, _ in pares])}
+            status_livros = {linha["bookId"]: linha["status"] for linha in _buscar_em_lote(
+                conexao, "SELECT bookId, status FROM livros WHERE bookId IN", [b for _, b in pares])}
+
+            agora = datetime.now()
+            loan_date = modulo_emprestimo._para_epoca(agora)
+            resultados = []
+            for user_id, book_id in pares:
+                if user_id not in usuarios:
+                    resultados.append({"sucesso": False, "erro": "Usuário não encontrado"})
+                elif book_id not in status_livros:
+                    resultados.append({"sucesso": False, "erro": "Livro não encontrado"})
+                elif status_livros[book_id] != "disponivel":
+                    resultados.append({"sucesso": False, "erro": "Livro indisponível"})
+                else:
+                    status_livros[book_id] = "emprestado"
+                    due_date = modulo_emprestimo._para_epoca(
+                        modulo_emprestimo._calcular_due_date(agora, usuarios[user_id]))
+                    cursor = conexao.execute(_SQL_INSERIR_EMPRESTIMO, (user_id, book_id, loan_date, due_date))
+                    resultados.append({"sucesso": True, "loanId": cursor.lastrowid})
+
+            emprestados = [(b,) for b, status in status_livros.items() if status == "emprestado"]
+            conexao.executemany("UPDATE livros SET status = 'emprestado' WHERE bookId = ?", emprestados)
+            novos = {linha["loanId"]: linha for linha in _buscar_em_lote(
+                conexao, f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE loanId IN",
+                [r["loanId"] for r in resultados if r["sucesso"]])}
+        for resultado in resultados:
+            if resultado["sucesso"]:
+                resultado["loan"] = _para_dict_emprestimo(novos[resultado.pop("loanId")])
+        return resultados
+
+    def registrar_devolucoes(self, loan_ids):
+        loan_ids = list(loan_ids)
+        with self._transacao() as conexao:
+            existentes = {linha["loanId"]: dict(linha) for linha in _buscar_em_lote(
+                conexao, f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE loanId IN", loan_ids)}
+            return_date = modulo_emprestimo._para_epoca(datetime.now())
+            resultados = []
+            devolvidos = []
+            for loan_id in loan_ids:
+                registro = existentes.get(loan_id)
+                if registro is None:
+                    resultados.append({"sucesso": False, "erro": "Empréstimo não encontrado"})
+                elif registro["status"] != "ACTIVE":
+                    resultados.append({"sucesso": False, "erro": "Empréstimo já devolvido"})
+                else:
+                    registro["status"] = "RETURNED"
+                    registro["returnDate"] = return_date
+                    registro["fine"] = multas.politica.calcular(registro["dueDate"], return_date)
+                    devolvidos.append(registro)
+                    resultados.append({"sucesso": True, "loan": _para_dict_emprestimo(registro)})
+            conexao.executemany(_SQL_DEVOLVER, [(return_date, r["fine"], r["loanId"]) for r in devolvidos])
+            conexao.executemany(_SQL_STATUS_LIVRO, [("disponivel", r["bookId"]) for r in devolvidos])
+        return resultados
+
+    def get_emprestimos(self):
+        with self._pool.conexao() as conexao:
+            return [_para_dict_emprestimo(linha) for linha in conexao.execute(_SQL_EMPRESTIMOS)]
+
+    def iterar_emprestimos(self, status=None, inicio=None, fim=None, lote=1000):
+        # Um SELECT curto por bloco, continuando do último loanId lido: a
+        # conexão volta ao pool e nenhuma transação de leitura fica aberta
+        # enquanto o consumidor (um cliente HTTP lento) processa o bloco
+        condicoes = []
+        parametros = []
+        for condicao, valor in (("status = ?", status),
+                                ("loanDate >= ?", modulo_emprestimo._para_epoca(inicio)),
+                                ("loanDate < ?", modulo_emprestimo._para_epoca(fim))):
+            if valor is not None:
+                condicoes.append(" AND " + condicao)
+                parametros.append(valor)
+        sql = (f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos WHERE loanId > ?"
+               f"{''.join(condicoes)} ORDER BY loanId LIMIT ?")
+        ultimo = 0
+        while True:
+            with self._pool.conexao() as conexao:
+                linhas = conexao.execute(sql, [ultimo] + parametros + [lote]).fetchall()
+            yield from (_para_dict_emprestimo(linha) for linha in linhas)
+            if len(linhas) < lote:
+                return
+            ultimo = linhas[-1]["loanId"]
+
+    def get_emprestimo_by_id(self, loan_id):
+        with self._pool.conexao() as conexao:
+            linha = conexao.execute(_SQL_EMPRESTIMO, (loan_id,)).fetchone()
+        return _para_dict_emprestimo(linha) if linha else None
+
+    def listar_emprestimos(self, status=None, user_id=None, book_id=None, offset=0, limite=50):
+        condicoes = []
+        parametros = []
+        for coluna, valor in (("status", status), ("userId", user_id), ("bookId", book_id)):
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(valor)
+        where = " WHERE " + " AND ".join(condicoes) if condicoes else ""
+        if not condicoes:
+            total = self.get_estatisticas()["total"]
+        elif len(condicoes) == 1 and status is not None:
+            total = self.get_estatisticas()["ativos" if status == "ACTIVE" else "devolvidos"]
+        else:
+            total = self._consultar("SELECT COUNT(*) AS total FROM emprestimos" + where, parametros)[0]["total"]
+        with self._pool.conexao() as conexao:
+            linhas = conexao.execute(
+                f"SELECT {_COLUNAS_EMPRESTIMO} FROM emprestimos{where} ORDER BY loanId LIMIT ? OFFSET ?",
+                parametros + [limite, offset],
+            )
+            pagina = [_para_dict_emprestimo(linha) for linha in linhas]
+        return {"emprestimos": pagina, "total": total}
+
+    def get_estatisticas(self):
+        contadores = self._contadores("emprestimos")
+        return {
+            "ativos": contadores.get(":ACTIVE", 0),
+            "devolvidos": contadores.get(":RETURNED", 0),
+            "total": contadores.get("", 0),
+        }
+
+    def proximos_vencimentos(self, k=10, agora=None):
+        referencia = modulo_emprestimo._para_epoca(agora or datetime.now())
+        return [_para_dict_emprestimo(l) for l in self._consultar(_SQL_PROXIMOS_VENCIMENTOS, (referencia, k))]
+
+    def listar_atrasados(self, agora=None, offset=0, limite=50):
+        referencia = modulo_emprestimo._para_epoca(agora or datetime.now())
+        with self._pool.conexao() as conexao:
+            total = conexao.execute(_SQL_CONTAR_ATRASADOS, (referencia,)).fetchone()["total"]
+            linhas = conexao.execute(_SQL_ATRASADOS, (referencia, limite, offset)).fetchall()
+        pagina = [modulo_emprestimo._com_atraso(modulo_emprestimo._emprestimo_de_registro(dict(linha)), referencia)
+                  for linha in linhas]
+        return {"emprestimos": pagina, "total": total}
+
+    def aplicar_multas(self, agora=None):
+        referencia = modulo_emprestimo._para_epoca(agora or datetime.now())
+        politica = multas.politica
+        with self._transacao() as conexao:
+            linhas = conexao.execute(_SQL_MULTAS_ATRASADOS, (referencia,)).fetchall()
+            alterados = []
+            for linha in linhas:
+                multa = politica.calcular(linha["dueDate"], referencia)
+                if multa != linha["fine"]:
+                    alterados.append((multa, linha["loanId"]))
+            conexao.executemany(_SQL_MULTA, alterados)
+        return {"atrasados": len(linhas), "atualizados": len(alterados)}
+
+    def get_livros_mais_emprestados(self, k=5):
+        return [(l["bookId"], l["total_emprestimos"]) for l in self._consultar(_SQL_RANKING_LIVROS, (k,))]
+
+    def get_usuarios_mais_ativos(self, k=5):
+        return [(u["userId"], u["total_emprestimos"]) for u in self._consultar(_SQL_RANKING_USUARIOS, (k,))]
@@ -0,0 +1,188 @@
+"""Servidores HTTP do serviço de biblioteca.
+
+O `HTTPServer` padrão atende uma requisição por vez: uma requisição lenta
+bloqueia todos os balcões. `ServidorPool` atende cada conexão numa thread de
+um pool de tamanho fixo, limitando o número de requisições simultâneas.
+
+`ManipuladorPersistente` é a base dos handlers: fala HTTP/1.1 e mantém a
+conexão aberta entre requisições (keep-alive), poupando o handshake TCP a
+cada clique. Como cada conexão ocupa uma thread do pool enquanto está aberta,
+uma conexão ociosa é fechada após `tempo_ocioso` segundos, ou assim que
+houver conexões na fila esperando por uma thread, ou o servidor for
+encerrado. Após `max_requisicoes` a resposta leva `Connection: close`.
+"""
+
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+WORKERS_PADRAO = 8
+TEMPO_OCIOSO_PADRAO = 15.0
+MAX_REQUISICOES_PADRAO = 100
+# Maior corpo de requisição aceito (formulários e JSON da API); acima disso 413
+LIMITE_CORPO = 1 << 20
+# De quanto em quanto tempo uma conexão ociosa confere a fila do servidor
+_INTERVALO_OCIOSO = 0.1
+
+
+class ManipuladorPersistente(BaseHTTPRequestHandler):
+    """
+    Handler HTTP/1.1 com conexões persistentes.
+
+    Toda resposta precisa delimitar o corpo com Content-Length ou
+    Transfer-Encoding: chunked. Os limites vêm do servidor (veja
+    `criar_servidor`); os atributos de classe são os padrões.
+    """
+
+    protocol_version = "HTTP/1.1"
+    tempo_ocioso = TEMPO_OCIOSO_PADRAO
+    max_requisicoes = MAX_REQUISICOES_PADRAO
+    limite_corpo = LIMITE_CORPO
+    # Limite para receber uma requisição já iniciada (cliente lento)
+    timeout = TEMPO_OCIOSO_PADRAO
+    # Cabeçalhos e corpo saem em escritas separadas: com o algoritmo de
+    # Nagle, a segunda espera o ACK atrasado do cliente (~40 ms por resposta
+    # numa conexão persistente)
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        self.tempo_ocioso = getattr(self.server, "tempo_ocioso", self.tempo_ocioso)
+        self.max_requisicoes = getattr(self.server, "max_requisicoes", self.max_requisicoes)
+        self.timeout = self.tempo_ocioso
+        super().setup()
+        self.requisicoes_atendidas = 0
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._aguardar_requisicao():
+            self.handle_one_request()
+
+    def parse_request(self):
+        if not super().parse_request():
+            return False
+        self.requisicoes_atendidas += 1
+        if self.request_version != "HTTP/1.1":
+            # HTTP/1.0 não tem chunked nem keep-alive implícito
+            self.close_connection = True
+        return True
+
+    def ler_corpo(self):
+        """
+        Lê o corpo delimitado por Content-Length. Se ele não pode ser lido,
+        responde o erro e retorna None: chunked (411), Content-Length
+        inválido (400) ou maior que `limite_corpo` (413, sem ler o corpo).
+        """
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            # Sem Content-Length não dá para saber onde o corpo termina
+            self.send_error(411)
+            return None
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            tamanho = -1
+        if tamanho < 0:
+            self.send_error(400, "Content-Length inválido")
+            return None
+        if tamanho > self.limite_corpo:
+            # O corpo fica sem ler: send_error fecha a conexão
+            self.send_error(413)
+            return None
+        return self.rfile.read(tamanho)
+
+    def send_response(self, code, message=None):
+        super().send_response(code, message)
+        if self.requisicoes_atendidas >= self.max_requisicoes and not self.close_connection:
+            self.send_header("Connection", "close")
+
+    def _aguardar_requisicao(self):
+        """Espera a próxima requisição da conexão; False se ela deve ser fechada."""
+        if self._dados_no_buffer():
+            return True
+        limite = time.monotonic() + self.tempo_ocioso
+        while time.monotonic() < limite:
+            if getattr(self.server, "encerrando", False) or getattr(self.server, "pendentes", 0):
+                return False
+            prontos, _, _ = select.select([self.connection], [], [], _INTERVALO_OCIOSO)
+            if prontos:
+                return True
+        return False
+
+    def _dados_no_buffer(self):
+        """True se bytes da próxima requisição já estão no buffer de leitura."""
+        self.connection.settimeout(0)
+        try:
+            return bool(self.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+
+class ServidorPool(HTTPServer):
+    """HTTPServer que delega cada conexão a um pool de threads."""
+
+    def __init__(self, endereco, handler, workers=WORKERS_PADRAO,
+                 tempo_ocioso=TEMPO_OCIOSO_PADRAO, max_requisicoes=MAX_REQUISICOES_PADRAO, sock=None):
+        if workers < 1:
+            raise ValueError("workers deve ser >= 1")
+        if sock is None:
+            super().__init__(endereco, handler)
+        else:
+            # Socket já aberto e em escuta (herdado do mestre no prefork)
+            super().__init__(sock.getsockname(), handler, bind_and_activate=False)
+            self.socket.close()
+            self.socket = sock
+        self.workers = workers
+        self.tempo_ocioso = tempo_ocioso
+        self.max_requisicoes = max_requisicoes
+        # Conexões aceitas que ainda esperam uma thread livre
+        self.pendentes = 0
+        self.encerrando = False
+        self._lock_pendentes = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="biblioteca")
+
+    def process_request(self, request, client_address):
+        """Enfileira a conexão no pool em vez de atendê-la na thread do loop."""
+        with self._lock_pendentes:
+            self.pendentes += 1
+        self._pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        with self._lock_pendentes:
+            self.pendentes -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Fecha o socket e aguarda as requisições em andamento."""
+        self.encerrando = True
+        super().server_close()
+        self._pool.shutdown(wait=True)
+
+
+def criar_servidor(handler, host="localhost", porta=8000, workers=WORKERS_PADRAO,
+                   tempo_ocioso=TEMPO_OCIOSO_PADRAO, max_requisicoes=MAX_REQUISICOES_PADRAO, sock=None):
+    """
+    Cria o servidor HTTP da biblioteca.
+
+    Args:
+        handler: classe de tratamento das requisições (ex.: BibliotecaView)
+        host: endereço de escuta
+        porta: porta de escuta
+        workers: número de threads; 1 equivale ao servidor sequencial
+        tempo_ocioso: segundos que uma conexão keep-alive pode ficar ociosa
+        max_requisicoes: requisições atendidas por conexão antes de fechá-la
+        sock: socket já em escuta a usar no lugar de host/porta (prefork)
+
+    Returns:
+        instância de ServidorPool pronta para `serve_forever()`
+    """
+    return ServidorPool((host, porta), handler, workers=workers, tempo_ocioso=tempo_ocioso,
+                        max_requisicoes=max_requisicoes, sock=sock)
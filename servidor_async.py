@@ -0,0 +1,235 @@
+"""Servidor HTTP assíncrono (asyncio) do serviço de biblioteca.
+
+No `ServidorPool` cada conexão aberta ocupa uma thread, inclusive enquanto o
+cliente está ocioso ou enviando a requisição devagar. Aqui as conexões vivem
+num único event loop: ler a requisição e enviar a resposta não bloqueiam
+ninguém, e milhares de quiosques conectados custam apenas memória.
+
+Somente o processamento de uma requisição completa (model + renderização)
+vai para um executor de threads de tamanho fixo, reaproveitando sem
+mudanças o mesmo handler do modo com threads (`BibliotecaView`): o handler
+lê a requisição já recebida de um buffer e escreve a resposta num adaptador
+que a repassa ao loop, preservando o envio em partes.
+
+O encerramento é gracioso: para de aceitar conexões, fecha as ociosas,
+espera as requisições em andamento (até `tempo_encerramento`) e só então
+retorna, para que o chamador possa fechar journal e banco.
+"""
+
+import asyncio
+import io
+import signal
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from servidor import WORKERS_PADRAO, TEMPO_OCIOSO_PADRAO, MAX_REQUISICOES_PADRAO, LIMITE_CORPO
+
+TEMPO_ENCERRAMENTO_PADRAO = 10.0
+# Tamanho máximo da linha de requisição + cabeçalhos
+LIMITE_CABECALHOS = 65536
+# Bytes escritos pelo handler entre esperas pelo envio (respostas em fluxo)
+LIMITE_PENDENTE = 1 << 20
+# Resposta a um Content-Length acima de LIMITE_CORPO (o corpo não é lido)
+_RESPOSTA_413 = (b"HTTP/1.1 413 Payload Too Large\r\nContent-Length: 0\r\n"
+                 b"Connection: close\r\n\r\n")
+
+
+def _tamanho_corpo(cabecalhos):
+    """Content-Length declarado nos cabeçalhos (0 se ausente ou inválido)."""
+    for linha in cabecalhos.split(b"\r\n")[1:]:
+        nome, _, valor = linha.partition(b":")
+        if nome.strip().lower() == b"content-length":
+            try:
+                return max(0, int(valor.strip()))
+            except ValueError:
+                return 0
+    return 0
+
+
+def _espera_100_continue(cabecalhos):
+    for linha in cabecalhos.split(b"\r\n")[1:]:
+        nome, _, valor = linha.partition(b":")
+        if nome.strip().lower() == b"expect":
+            return valor.strip().lower() == b"100-continue"
+    return False
+
+
+class _SaidaAssincrona:
+    """
+    `wfile` do handler: repassa cada escrita, em ordem, ao event loop.
+
+    A cada LIMITE_PENDENTE bytes a thread do handler espera o transporte
+    esvaziar (`drain`): uma resposta em fluxo maior que a memória (exportação)
+    avança no ritmo do cliente em vez de se acumular no buffer.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+        self._pendente = 0
+
+    def write(self, dados):
+        self._loop.call_soon_threadsafe(self._writer.write, bytes(dados))
+        self._pendente += len(dados)
+        if self._pendente >= LIMITE_PENDENTE:
+            self._pendente = 0
+            asyncio.run_coroutine_threadsafe(self._writer.drain(), self._loop).result()
+        return len(dados)
+
+    def flush(self):
+        pass
+
+
+class ServidorAssincrono:
+    """
+    Atende as rotas de um handler `http.server` num event loop asyncio.
+
+    Args:
+        handler: classe do handler (ex.: BibliotecaView)
+        host, porta: endereço de escuta (porta 0 escolhe uma livre)
+        workers: threads do executor que processam as requisições
+        tempo_ocioso: segundos de espera pela próxima requisição
+        max_requisicoes: requisições por conexão antes de fechá-la
+        sock: socket já em escuta a usar no lugar de host/porta (prefork)
+    """
+
+    def __init__(self, handler, host="localhost", porta=8000, workers=WORKERS_PADRAO,
+                 tempo_ocioso=TEMPO_OCIOSO_PADRAO, max_requisicoes=MAX_REQUISICOES_PADRAO, sock=None):
+        if workers < 1:
+            raise ValueError("workers deve ser >= 1")
+        self.handler = handler
+        self.host = host
+        self.porta = porta
+        self.workers = workers
+        self.tempo_ocioso = tempo_ocioso
+        self.max_requisicoes = max_requisicoes
+        self.sock = sock
+        self.encerrando = False
+        self.server_address = None
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="biblioteca-async")
+        self._servidor = None
+        self._loop = None
+        # Conexões abertas: tarefa -> True se está processando uma requisição
+        self._conexoes = {}
+
+    async def iniciar(self):
+        """Passa a aceitar conexões."""
+        self._loop = asyncio.get_running_loop()
+        if self.sock is not None:
+            self._servidor = await asyncio.start_server(
+                self._atender_conexao, sock=self.sock, limit=LIMITE_CABECALHOS
+            )
+        else:
+            self._servidor = await asyncio.start_server(
+                self._atender_conexao, self.host, self.porta, limit=LIMITE_CABECALHOS
+            )
+        self.server_address = self._servidor.sockets[0].getsockname()[:2]
+
+    async def _atender_conexao(self, reader, writer):
+        tarefa = asyncio.current_task()
+        self._conexoes[tarefa] = False
+        endereco = writer.get_extra_info("peername")
+        atendidas = 0
+        try:
+            while not self.encerrando:
+                try:
+                    cabecalhos = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.tempo_ocioso)
+                    tamanho = _tamanho_corpo(cabecalhos)
+                    if tamanho > LIMITE_CORPO:
+                        writer.write(_RESPOSTA_413)
+                        break
+                    if _espera_100_continue(cabecalhos):
+                        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                    corpo = await asyncio.wait_for(reader.readexactly(tamanho), self.tempo_ocioso) if tamanho else b""
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        asyncio.TimeoutError, ConnectionError):
+                    break
+                atendidas += 1
+                self._conexoes[tarefa] = True
+                try:
+                    fechar = await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._processar, cabecalhos + corpo, endereco, writer, atendidas
+                    )
+                    await writer.drain()
+                finally:
+                    self._conexoes[tarefa] = False
+                if fechar:
+                    break
+        except (asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            self._conexoes.pop(tarefa, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    def _processar(self, requisicao, endereco, writer, atendidas):
+        """
+        Executa o handler sobre uma requisição já recebida (na thread do
+        executor). Retorna True se a conexão deve ser fechada.
+        """
+        handler = self.handler.__new__(self.handler)
+        handler.server = self
+        handler.request = None
+        handler.client_address = endereco
+        handler.rfile = io.BytesIO(requisicao)
+        handler.wfile = _SaidaAssincrona(self._loop, writer)
+        handler.tempo_ocioso = self.tempo_ocioso
+        handler.max_requisicoes = self.max_requisicoes
+        handler.requisicoes_atendidas = atendidas - 1
+        # O "100 Continue" já foi enviado pelo loop antes de ler o corpo
+        handler.handle_expect_100 = lambda: True
+        handler.close_connection = True
+        try:
+            handler.handle_one_request()
+        except Exception:
+            traceback.print_exc()
+            return True
+        return handler.close_connection or self.encerrando
+
+    async def servir(self, parar):
+        """Atende até que o evento `parar` seja sinalizado e então encerra."""
+        if self._servidor is None:
+            await self.iniciar()
+        await parar.wait()
+        await self.encerrar()
+
+    async def encerrar(self, tempo_encerramento=TEMPO_ENCERRAMENTO_PADRAO):
+        """
+        Encerramento gracioso: fecha o socket de escuta e as conexões
+        ociosas, aguarda as requisições em andamento e libera o executor.
+        """
+        self.encerrando = True
+        if self._servidor is not None:
+            self._servidor.close()
+        for tarefa, ocupada in list(self._conexoes.items()):
+            if not ocupada:
+                tarefa.cancel()
+        pendentes = list(self._conexoes)
+        if pendentes:
+            _, atrasadas = await asyncio.wait(pendentes, timeout=tempo_encerramento)
+            for tarefa in atrasadas:
+                tarefa.cancel()
+        if self._servidor is not None:
+            await self._servidor.wait_closed()
+        # Sem bloquear o loop enquanto as últimas requisições terminam
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+
+def rodar(handler, host="", porta=8000, workers=WORKERS_PADRAO,
+          tempo_ocioso=TEMPO_OCIOSO_PADRAO, max_requisicoes=MAX_REQUISICOES_PADRAO, sock=None):
+    """
+    Roda o servidor assíncrono até SIGINT/SIGTERM e retorna após o
+    encerramento gracioso.
+    """
+    async def principal():
+        parar = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sinal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sinal, parar.set)
+        servidor = ServidorAssincrono(handler, host, porta, workers, tempo_ocioso, max_requisicoes, sock)
+        await servidor.servir(parar)
+
+    asyncio.run(principal())
@@ -0,0 +1,78 @@
+# test_busca.py
+import unittest
+
+import busca
+from busca import IndiceTextual
+
+
+class TestNormalizacao(unittest.TestCase):
+    def test_termos_sem_acentos_e_minusculos(self):
+        self.assertEqual(busca.termos("Introdução à Programação"), ["introducao", "a", "programacao"])
+        self.assertEqual(busca.termos("ÁLGEBRA_linear, 2ª ed."), ["algebra", "linear", "2a", "ed"])
+        self.assertEqual(busca.termos(None), [])
+
+
+class TestIndiceTextual(unittest.TestCase):
+    def setUp(self):
+        self.indice = IndiceTextual()
+        self.indice.adicionar(1, "Programação em Python", "Luciano Ramalho")
+        self.indice.adicionar(2, "Engenharia de Software", "Sommerville")
+        self.indice.adicionar(3, "Python Fluente", "Ramalho")
+
+    def ids(self, consulta, limite=20):
+        return [doc_id for doc_id, _ in self.indice.buscar(consulta, limite)]
+
+    def test_ultimo_termo_e_prefixo(self):
+        self.assertEqual(self.ids("engenharia de soft"), [2])
+        self.assertEqual(self.ids("engen de software"), [])
+        self.assertEqual(sorted(self.ids("pyt")), [1, 3])
+
+    def test_termo_exato_vale_mais_que_prefixo(self):
+        self.indice.adicionar(4, "Python", "Guido")
+        self.indice.adicionar(5, "Pythonic", "Guido")
+        self.assertEqual(self.ids("python", limite=2)[0], 4)
+        self.assertEqual(self.ids("guido python"), [4, 5])
+
+    def test_titulo_curto_e_titulo_pesam_mais(self):
+        # "python" no título curto (3) antes do título mais longo (1)
+        self.assertEqual(self.ids("python"), [3, 1])
+        # "ramalho" só no autor; sozinho (3) vale mais que com nome (1)
+        self.assertEqual(self.ids("ramalho"), [3, 1])
+
+    def test_reindexar_e_remover(self):
+        self.indice.adicionar(1, "Cálculo", "Stewart")
+        self.assertEqual(self.ids("python"), [3])
+        self.assertEqual(self.ids("calculo"), [1])
+        self.indice.remover(3)
+        self.indice.remover(99)
+        self.assertEqual(self.ids("python"), [])
+        self.assertEqual(len(self.indice), 2)
+        self.assertNotIn("fluente", self.indice._vocabulario)
+
+    def test_cache_descartado_quando_o_indice_muda(self):
+        self.assertEqual(self.ids("python"), [3, 1])
+        self.indice.adicionar(4, "Python", "Guido")
+        self.assertEqual(self.ids("python"), [4, 3, 1])
+
+    def test_construir_em_lote_equivale_a_adicionar(self):
+        outro = IndiceTextual()
+        outro.construir([(1, "Programação em Python", "Luciano Ramalho"),
+                         (2, "Engenharia de Software", "Sommerville"),
+                         (3, "Python Fluente", "Ramalho")])
+        for consulta in ("python", "ramalho", "p", "de so"):
+            self.assertEqual(outro.buscar(consulta), self.indice.buscar(consulta))
+
+    def test_limite_de_expansao_do_prefixo(self):
+        original = busca.MAX_EXPANSAO
+        busca.MAX_EXPANSAO = 2
+        try:
+            indice = IndiceTextual()
+            for i in range(5):
+                indice.adicionar(i, f"termo{i}")
+            self.assertEqual(sorted(d for d, _ in indice.buscar("termo")), [0, 1])
+        finally:
+            busca.MAX_EXPANSAO = original
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,20 @@
 # test_emprestimos.py
+import sys
 import unittest
+import threading
+from collections import Counter
 from datetime import datetime, timedelta
 import modulo_emprestimo
 import mock_usuarios
 import mock_catalogo
 import controler
+import modulo_relatorio
+import repositorio
+from test_repositorio import RepositorioDeTeste, BACKENDS_DE_TESTE
 
 class TestEmprestimos(unittest.TestCase):
+    """Modelo em memória (modulo_emprestimo), testado diretamente."""
+
     def setUp(self):
         """Executado ANTES de CADA teste."""
         # Reseta o estado global do módulo
@@ -46,14 +54,240 @@ class TestEmprestimos(unittest.TestCase):
         self.assertEqual(emprestimo.get_book_id(), 1)
         self.assertEqual(emprestimo.get_status(), "ACTIVE")
 
+    def test_unit_emprestimo_compacto_preserva_datas(self):
+        """Testa que a representação compacta devolve as mesmas datas"""
+        agora = datetime(2025, 10, 1, 10, 30, 15, 123456)
+        emprestimo = modulo_emprestimo.Emprestimo(
+            user_id=1, book_id=1, loan_id=1, loan_date=agora, due_date=agora + timedelta(days=14)
+        )
+        self.assertFalse(hasattr(emprestimo, "__dict__"))
+        self.assertEqual(emprestimo.get_loan_date(), agora)
+        emprestimo.set_return_date(agora + timedelta(days=3))
+        emprestimo.set_status("RETURNED")
+        dados = emprestimo.to_dict()
+        self.assertEqual(dados["loanDate"], "2025-10-01T10:30:15.123456")
+        self.assertEqual(dados["returnDate"], "2025-10-04T10:30:15.123456")
+        self.assertEqual(dados["status"], "RETURNED")
+
+    # ================================================
+    # TESTES DE CONTRATO (MODELO)
+    # ================================================
+    def test_contrato_calcular_due_date_aluno(self):
+        data_base = datetime(2025, 10, 1, 10, 0, 0)
+        data_esperada = data_base + timedelta(days=14)
+        resultado = modulo_emprestimo._calcular_due_date(data_base, "aluno")
+        self.assertEqual(resultado, data_esperada)
+
+    def test_contrato_calcular_due_date_professor(self):
+        data_base = datetime(2025, 10, 1, 10, 0, 0)
+        data_esperada = data_base + timedelta(days=30)
+        resultado = modulo_emprestimo._calcular_due_date(data_base, "professor")
+        self.assertEqual(resultado, data_esperada)
+
+    def test_contrato_registrar_emprestimo_atualiza_catalogo(self):
+        status_antes = mock_catalogo.get_livro(3)["status"]
+        self.assertEqual(status_antes, "disponivel")
+        # Testa diretamente o modelo (contrato)
+        modulo_emprestimo.adicionar_emprestimo(user_id=1, book_id=3)
+        status_depois = mock_catalogo.get_livro(3)["status"]
+        self.assertEqual(status_depois, "emprestado")
+
+    def test_contrato_registrar_devolucao_atualiza_catalogo(self):
+        # Insere manualmente um empréstimo no modelo e garante que a devolução
+        # atualize o catálogo.
+        emp = modulo_emprestimo.Emprestimo(
+            user_id=1,
+            book_id=2,
+            loan_id=102,
+            loan_date=datetime.now(),
+            due_date=datetime.now() + timedelta(days=14)
+        )
+        modulo_emprestimo.emprestimos.append(emp)
+        modulo_emprestimo.next_loan_id = max(modulo_emprestimo.next_loan_id, 103)
+        # garante que o catálogo esteja consistente com o empréstimo
+        mock_catalogo.update_status_livro(2, "emprestado")
+        self.assertEqual(mock_catalogo.get_livro(2)["status"], "emprestado")
+        modulo_emprestimo.registrar_devolucao(loan_id=102)
+        self.assertEqual(mock_catalogo.get_livro(2)["status"], "disponivel")
+
+    def test_contrato_formato_datas_iso_8601(self):
+        # Gera um empréstimo via modelo e verifica o formato das datas retornadas
+        modulo_emprestimo.adicionar_emprestimo(user_id=1, book_id=1)
+        db = modulo_emprestimo.get_emprestimos()
+        loan = db[0]
+        try:
+            datetime.fromisoformat(loan["loanDate"])
+            datetime.fromisoformat(loan["dueDate"])
+        except ValueError:
+            self.fail("Datas não estão em formato ISO 8601 válido")
+        self.assertIsNone(loan["returnDate"])
+
+    # ================================================
+    # TESTES DOS ÍNDICES
+    # ================================================
+    def test_indices_secundarios_acompanham_devolucao(self):
+        res = self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        self.controller.registrar_emprestimo(user_id=1, book_id=3)
+        self.controller.registrar_devolucao(res["loan"]["loanId"])
+
+        self.assertEqual(len(modulo_emprestimo.get_emprestimos_por_usuario(1)), 2)
+        self.assertEqual(len(modulo_emprestimo.get_emprestimos_por_livro(1)), 1)
+        ativos = modulo_emprestimo.get_emprestimos_por_status("ACTIVE")
+        devolvidos = modulo_emprestimo.get_emprestimos_por_status("RETURNED")
+        self.assertEqual([e["bookId"] for e in ativos], [3])
+        self.assertEqual([e["bookId"] for e in devolvidos], [1])
+
+    def test_indices_reconstruidos_quando_lista_substituida(self):
+        self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        modulo_emprestimo.emprestimos = []
+        self.assertIsNone(modulo_emprestimo.get_emprestimo_by_id(1))
+        self.assertEqual(modulo_emprestimo.get_emprestimos_por_usuario(1), [])
+
+    def _emprestimo_vencendo(self, loan_id, vencimento, status="ACTIVE"):
+        emprestimo = modulo_emprestimo.Emprestimo(
+            1, 1, loan_id, vencimento - timedelta(days=14), vencimento, status=status
+        )
+        modulo_emprestimo.emprestimos.append(emprestimo)
+
+    def test_atrasados_e_proximos_vencimentos(self):
+        base = datetime(2024, 3, 10, 12, 0)
+        self._emprestimo_vencendo(1, base + timedelta(days=2))
+        self._emprestimo_vencendo(2, base - timedelta(days=3))
+        self._emprestimo_vencendo(3, base - timedelta(hours=1))
+        self._emprestimo_vencendo(4, base + timedelta(hours=1))
+        self._emprestimo_vencendo(5, base - timedelta(days=5), status="RETURNED")
+        self._emprestimo_vencendo(6, base + timedelta(days=1))
+
+        atrasados = modulo_emprestimo.listar_atrasados(base)
+        self.assertEqual(atrasados["total"], 2)
+        self.assertEqual([e["loanId"] for e in atrasados["emprestimos"]], [2, 3])
+        self.assertEqual([e["diasAtraso"] for e in atrasados["emprestimos"]], [3, 1])
+        self.assertEqual(modulo_emprestimo.listar_atrasados(base, offset=1, limite=5)["emprestimos"][0]["loanId"], 3)
+        self.assertEqual(modulo_emprestimo.listar_atrasados(base + timedelta(days=30))["total"], 5)
+        self.assertEqual(modulo_emprestimo.listar_atrasados(base - timedelta(days=30))["total"], 0)
+
+        proximos = modulo_emprestimo.proximos_vencimentos(k=2, agora=base)
+        self.assertEqual([e["loanId"] for e in proximos], [4, 6])
+        self.assertEqual(len(modulo_emprestimo.proximos_vencimentos(k=10, agora=base)), 3)
+
+    def test_contadores_acompanham_emprestimos_e_devolucoes(self):
+        res = self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        self.controller.registrar_emprestimo(user_id=1, book_id=3)
+        self.controller.registrar_devolucao(res["loan"]["loanId"])
+        self.controller.registrar_emprestimo(user_id=2, book_id=1)
+
+        self.assertEqual(self.controller.get_estatisticas(), {"ativos": 2, "devolvidos": 1, "total": 3})
+        self.assertEqual(modulo_emprestimo.get_ativos_por_usuario(1), 1)
+        self.assertEqual(modulo_emprestimo.get_ativos_por_usuario(2), 1)
+        self.assertEqual(modulo_emprestimo.get_total_emprestimos_livro(1), 2)
+        self.assertEqual(modulo_emprestimo.get_total_emprestimos_livro(2), 0)
+
+    def test_contadores_zerados_quando_lista_substituida(self):
+        self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        modulo_emprestimo.emprestimos = []
+        self.assertEqual(self.controller.get_estatisticas(), {"ativos": 0, "devolvidos": 0, "total": 0})
+        self.assertEqual(modulo_emprestimo.get_ativos_por_usuario(1), 0)
+
+    def test_versoes_crescem_a_cada_alteracao(self):
+        versoes = [modulo_emprestimo.get_versao(), mock_catalogo.get_versao()]
+        self.assertEqual(versoes, [modulo_emprestimo.get_versao(), mock_catalogo.get_versao()])
+
+        res = self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        self.assertGreater(modulo_emprestimo.get_versao(), versoes[0])
+        self.assertGreater(mock_catalogo.get_versao(), versoes[1])
+
+        versao = modulo_emprestimo.get_versao()
+        self.controller.registrar_devolucao(res["loan"]["loanId"])
+        self.assertGreater(modulo_emprestimo.get_versao(), versao)
+
+        versao = modulo_emprestimo.get_versao()
+        modulo_emprestimo.emprestimos = []
+        self.assertGreater(modulo_emprestimo.get_versao(), versao)
+
+    # ================================================
+    # TESTES DE RELATÓRIOS
+    # ================================================
+    def test_ranking_top_k_substitui_menor(self):
+        contador = Counter()
+        ranking = modulo_emprestimo.RankingTopK(contador, k=2)
+        for chave in ["a", "b", "c", "c", "c", "b"]:
+            contador[chave] += 1
+            ranking.incrementado(chave)
+        self.assertEqual(ranking.top(), [("c", 3), ("b", 2)])
+        self.assertEqual(ranking.top(5), [("c", 3), ("b", 2), ("a", 1)])
+
+    def test_ranking_top_k_empate_fica_com_menor_chave(self):
+        contador = Counter()
+        ranking = modulo_emprestimo.RankingTopK(contador, k=2)
+        for chave in [5, 6, 1]:
+            contador[chave] += 1
+            ranking.incrementado(chave)
+        self.assertEqual(ranking.top(), [(1, 1), (5, 1)])
+        self.assertEqual(ranking.top(2), ranking.top(3)[:2])
+
+    # ================================================
+    # TESTES DE CONCORRÊNCIA
+    # ================================================
+    def test_concorrencia_leituras_durante_emprestimos(self):
+        for book_id in range(10, 210):
+            mock_catalogo.adicionar_livro(book_id, f"Livro {book_id}", "Autor")
+        erros = []
+        terminou = threading.Event()
+
+        def emprestar(book_ids):
+            for book_id in book_ids:
+                res = modulo_emprestimo.adicionar_emprestimo(user_id=1, book_id=book_id)
+                if book_id % 2:
+                    modulo_emprestimo.registrar_devolucao(res["loan"]["loanId"])
+
+        def ler():
+            try:
+                while not terminou.is_set():
+                    modulo_emprestimo.listar_emprestimos(status="ACTIVE", limite=1000)
+                    modulo_emprestimo.listar_emprestimos(status="RETURNED", user_id=1, limite=1000)
+                    modulo_emprestimo.get_estatisticas()
+            except Exception as e:
+                erros.append(e)
+
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            leitores = [threading.Thread(target=ler) for _ in range(3)]
+            escritores = [threading.Thread(target=emprestar, args=(range(10 + i, 210, 4),)) for i in range(4)]
+            for t in leitores + escritores:
+                t.start()
+            for t in escritores:
+                t.join()
+            terminou.set()
+            for t in leitores:
+                t.join()
+        finally:
+            sys.setswitchinterval(intervalo)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(modulo_emprestimo.get_estatisticas(), {"ativos": 100, "devolvidos": 100, "total": 200})
+        self.assertEqual(modulo_emprestimo.get_ativos_por_usuario(1), 100)
+        self.assertEqual(len(modulo_emprestimo.listar_emprestimos(status="ACTIVE", limite=1000)["emprestimos"]), 100)
+
+
+class CenariosEmprestimo(RepositorioDeTeste):
+    """
+    Empréstimos pelo Controller, executados contra cada backend de
+    repositorio.BACKENDS (veja as classes geradas no fim do arquivo).
+    """
+
+    # ================================================
+    # TESTES UNITÁRIOS
+    # ================================================
     # --- Testes de verificar_disponibilidade ---
     def test_unit_verificar_disponibilidade_disponivel(self):
         resultado = self.controller.verificar_disponibilidade(1)
-        self.assertEqual(resultado, {"bookId": 1, "titulo": "Engenharia de Software", "status": "disponivel"})
+        self.assertEqual(resultado, {"bookId": 1, "titulo": "Engenharia de Software", "autor": "Sommerville",
+                                     "status": "disponivel"})
 
     def test_unit_verificar_disponibilidade_emprestado(self):
         resultado = self.controller.verificar_disponibilidade(2)
-        self.assertEqual(resultado, {"bookId": 2, "titulo": "Banco de Dados", "status": "emprestado"})
+        self.assertEqual(resultado, {"bookId": 2, "titulo": "Banco de Dados", "autor": "Date", "status": "emprestado"})
 
     def test_unit_verificar_disponibilidade_inexistente(self):
         resultado = self.controller.verificar_disponibilidade(999)
@@ -64,7 +298,7 @@ class TestEmprestimos(unittest.TestCase):
         res = self.controller.registrar_emprestimo(user_id=999, book_id=1)
         self.assertFalse(res["sucesso"])
         self.assertEqual(res["erro"], "Usuário não encontrado")
-        
+
     def test_unit_registrar_emprestimo_livro_inexistente(self):
         res = self.controller.registrar_emprestimo(user_id=1, book_id=999)
         self.assertFalse(res["sucesso"])
@@ -78,7 +312,7 @@ class TestEmprestimos(unittest.TestCase):
     # --- Teste de registrar_emprestimo (Sucesso) ---
     def test_unit_registrar_emprestimo_sucesso(self):
         # Verifica o estado inicial do livro
-        livro_antes = mock_catalogo.get_livro(3)  # Usa o livro 3 que sabemos que está disponível
+        livro_antes = self.repositorio.get_livro(3)  # Usa o livro 3 que sabemos que está disponível
         self.assertEqual(livro_antes["status"], "disponivel")
         
         # Tenta registrar o empréstimo
@@ -99,7 +333,7 @@ class TestEmprestimos(unittest.TestCase):
         self.assertEqual(emprestimos[0]["status"], "ACTIVE")
         
         # Verifica se o status do livro foi atualizado
-        livro_depois = mock_catalogo.get_livro(3)
+        livro_depois = self.repositorio.get_livro(3)
         self.assertEqual(livro_depois["status"], "emprestado")
 
     # --- Testes de registrar_devolucao ---
@@ -188,57 +422,128 @@ class TestEmprestimos(unittest.TestCase):
         self.assertEqual(res3["erro"], "Livro não encontrado")
 
     # ================================================
-    # TESTES DE CONTRATO (MODELO)
+    # TESTES DE CONSULTAS
     # ================================================
-    def test_contrato_calcular_due_date_aluno(self):
-        data_base = datetime(2025, 10, 1, 10, 0, 0)
-        data_esperada = data_base + timedelta(days=14)
-        resultado = modulo_emprestimo._calcular_due_date(data_base, "aluno")
-        self.assertEqual(resultado, data_esperada)
+    def test_indice_busca_por_id(self):
+        self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        res = self.controller.registrar_emprestimo(user_id=2, book_id=3)
+        loan = self.controller.get_emprestimo_by_id(res["loan"]["loanId"])
+        self.assertEqual(loan["bookId"], 3)
+        self.assertIsNone(self.controller.get_emprestimo_by_id(999))
 
-    def test_contrato_calcular_due_date_professor(self):
-        data_base = datetime(2025, 10, 1, 10, 0, 0)
-        data_esperada = data_base + timedelta(days=30)
-        resultado = modulo_emprestimo._calcular_due_date(data_base, "professor")
-        self.assertEqual(resultado, data_esperada)
+    def test_devolucao_tira_dos_atrasados_e_cobra_multa(self):
+        res = self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        loan_id = res["loan"]["loanId"]
+        vencimento = datetime.fromisoformat(res["loan"]["dueDate"])
+        depois = vencimento + timedelta(days=4)
+        self.assertEqual(self.controller.listar_atrasados(depois)["emprestimos"][0]["fine"], 4.0)
+        self.assertEqual(self.controller.get_emprestimo_by_id(loan_id)["fine"], 0.0)
 
-    def test_contrato_registrar_emprestimo_atualiza_catalogo(self):
-        status_antes = mock_catalogo.get_livro(3)["status"]
-        self.assertEqual(status_antes, "disponivel")
-        # Testa diretamente o modelo (contrato)
-        modulo_emprestimo.adicionar_emprestimo(user_id=1, book_id=3)
-        status_depois = mock_catalogo.get_livro(3)["status"]
-        self.assertEqual(status_depois, "emprestado")
+        self.assertEqual(self.controller.aplicar_multas(depois), {"atrasados": 1, "atualizados": 1})
+        self.assertEqual(self.controller.get_emprestimo_by_id(loan_id)["fine"], 4.0)
+        self.assertEqual(self.controller.aplicar_multas(depois), {"atrasados": 1, "atualizados": 0})
 
-    def test_contrato_registrar_devolucao_atualiza_catalogo(self):
-        # Insere manualmente um empréstimo no modelo e garante que a devolução
-        # atualize o catálogo.
-        emp = modulo_emprestimo.Emprestimo(
-            user_id=1,
-            book_id=2,
-            loan_id=102,
-            loan_date=datetime.now(),
-            due_date=datetime.now() + timedelta(days=14)
-        )
-        modulo_emprestimo.emprestimos.append(emp)
-        modulo_emprestimo.next_loan_id = max(modulo_emprestimo.next_loan_id, 103)
-        # garante que o catálogo esteja consistente com o empréstimo
-        mock_catalogo.update_status_livro(2, "emprestado")
-        self.assertEqual(mock_catalogo.get_livro(2)["status"], "emprestado")
-        modulo_emprestimo.registrar_devolucao(loan_id=102)
-        self.assertEqual(mock_catalogo.get_livro(2)["status"], "disponivel")
+        devolvido = self.controller.registrar_devolucao(loan_id)["loan"]
+        self.assertEqual(devolvido["fine"], 0.0)  # devolvido antes do vencimento
+        self.assertEqual(self.controller.listar_atrasados(depois)["total"], 0)
+        self.assertEqual(self.controller.proximos_vencimentos(agora=vencimento - timedelta(days=1)), [])
 
-    def test_contrato_formato_datas_iso_8601(self):
-        # Gera um empréstimo via modelo e verifica o formato das datas retornadas
-        modulo_emprestimo.adicionar_emprestimo(user_id=1, book_id=1)
-        db = modulo_emprestimo.get_emprestimos()
-        loan = db[0]
-        try:
-            datetime.fromisoformat(loan["loanDate"])
-            datetime.fromisoformat(loan["dueDate"])
-        except ValueError:
-            self.fail("Datas não estão em formato ISO 8601 válido")
-        self.assertIsNone(loan["returnDate"])
+    def test_listar_emprestimos_paginado_e_filtrado(self):
+        for book_id in range(10, 15):
+            self.repositorio.adicionar_livro(book_id, f"Livro {book_id}", "Autor")
+            self.controller.registrar_emprestimo(user_id=1 + book_id % 2, book_id=book_id)
+        self.controller.registrar_devolucao(1)
+
+        pagina = self.controller.listar_emprestimos(offset=1, limite=2)
+        self.assertEqual(pagina["total"], 5)
+        self.assertEqual([e["loanId"] for e in pagina["emprestimos"]], [2, 3])
+
+        ativos_usuario_1 = self.controller.listar_emprestimos(status="ACTIVE", user_id=1)
+        self.assertEqual(ativos_usuario_1["total"], 2)
+        self.assertEqual([e["bookId"] for e in ativos_usuario_1["emprestimos"]], [12, 14])
+
+        por_livro = self.controller.listar_emprestimos(book_id=10)
+        self.assertEqual(por_livro["total"], 1)
+        self.assertEqual(por_livro["emprestimos"][0]["status"], "RETURNED")
+
+    # ================================================
+    # TESTES DE RELATÓRIOS
+    # ================================================
+    def test_relatorio_livros_e_usuarios_mais_ativos(self):
+        for _ in range(3):
+            res = self.controller.registrar_emprestimo(user_id=2, book_id=3)
+            self.controller.registrar_devolucao(res["loan"]["loanId"])
+        self.controller.registrar_emprestimo(user_id=1, book_id=1)
+
+        livros = modulo_relatorio.livros_mais_emprestados(2, self.repositorio)
+        self.assertEqual([(l["bookId"], l["emprestimos"]) for l in livros], [(3, 3), (1, 1)])
+        self.assertEqual(livros[0]["titulo"], "IA Moderna")
+        usuarios = modulo_relatorio.usuarios_mais_ativos(1, self.repositorio)
+        self.assertEqual(usuarios, [{"userId": 2, "nome": "Bruno Costa", "emprestimos": 3}])
+
+    def test_mais_emprestados_acima_de_top_k(self):
+        k = modulo_emprestimo.TOP_K + 2
+        for book_id in range(10, 10 + k):
+            self.repositorio.adicionar_livro(book_id, f"Livro {book_id}", "Autor")
+            res = self.controller.registrar_emprestimo(user_id=1, book_id=book_id)
+            self.controller.registrar_devolucao(res["loan"]["loanId"])
+        self.controller.registrar_emprestimo(user_id=1, book_id=9 + k)
+
+        livros = self.repositorio.get_livros_mais_emprestados(k)
+        self.assertEqual(len(livros), k)
+        self.assertEqual(livros[0], (9 + k, 2))
+        self.assertEqual(livros[1:], [(book_id, 1) for book_id in range(10, 9 + k)])
+
+    def test_relatorio_taxa_ocupacao(self):
+        # No setUp, 1 de 3 livros já está emprestado
+        self.assertEqual(modulo_relatorio.taxa_ocupacao(self.repositorio), {"emprestados": 1, "total": 3, "taxa": 33.3})
+        self.controller.registrar_emprestimo(user_id=1, book_id=1)
+        self.assertEqual(modulo_relatorio.taxa_ocupacao(self.repositorio)["emprestados"], 2)
+
+    # ================================================
+    # TESTES DE CONCORRÊNCIA
+    # ================================================
+    def test_concorrencia_mesmo_livro_apenas_um_sucesso(self):
+        resultados = []
+        barreira = threading.Barrier(8)
+
+        def emprestar(user_id):
+            barreira.wait()
+            resultados.append(self.controller.registrar_emprestimo(user_id=user_id, book_id=1))
+
+        threads = [threading.Thread(target=emprestar, args=(1 + i % 2,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        sucessos = [r for r in resultados if r["sucesso"]]
+        self.assertEqual(len(sucessos), 1)
+        self.assertEqual(self.controller.get_estatisticas()["total"], 1)
+
+    def test_concorrencia_loan_ids_unicos(self):
+        for book_id in range(10, 60):
+            self.repositorio.adicionar_livro(book_id, f"Livro {book_id}", "Autor")
+
+        def emprestar(book_ids):
+            for book_id in book_ids:
+                self.controller.registrar_emprestimo(user_id=1, book_id=book_id)
+
+        threads = [threading.Thread(target=emprestar, args=(range(10 + i, 60, 5),)) for i in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        ids = [e["loanId"] for e in self.controller.get_emprestimos()]
+        self.assertEqual(len(ids), 50)
+        self.assertEqual(len(set(ids)), 50)
+
+
+# Uma classe de teste por backend: TestEmprestimosMemoria, TestEmprestimosSqlite...
+for _backend in repositorio.BACKENDS:
+    _nome = f"TestEmprestimos{_backend.capitalize()}"
+    globals()[_nome] = type(_nome, (CenariosEmprestimo, BACKENDS_DE_TESTE[_backend], unittest.TestCase), {})
 
 
 if __name__ == '__main__':
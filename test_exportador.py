@@ -0,0 +1,99 @@
+# test_exportador.py
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+import modulo_emprestimo
+import mock_catalogo
+import mock_usuarios
+import exportador
+import persistencia
+
+EMPRESTIMOS = [
+    modulo_emprestimo.Emprestimo(1, 10, 1, datetime(2024, 3, 1, 9, 30), datetime(2024, 3, 15, 9, 30),
+                                 "RETURNED", datetime(2024, 3, 10, 14, 0)).to_dict(),
+    modulo_emprestimo.Emprestimo(2, 11, 2, datetime(2024, 3, 2), datetime(2024, 4, 1)).to_dict(),
+    modulo_emprestimo.Emprestimo(1, 12, 3, datetime(2024, 4, 5), datetime(2024, 4, 19)).to_dict(),
+]
+
+
+class TestExportador(unittest.TestCase):
+    def test_csv_em_partes(self):
+        partes = list(exportador.exportar(iter(EMPRESTIMOS), "csv", tamanho_lote=2))
+        # Cabeçalho e um bloco por lote
+        self.assertEqual(len(partes), 3)
+        linhas = list(csv.DictReader(io.StringIO(b"".join(partes).decode("utf-8"))))
+        self.assertEqual([int(l["loanId"]) for l in linhas], [1, 2, 3])
+        self.assertEqual(linhas[0]["returnDate"], "2024-03-10T14:00:00")
+        self.assertEqual(linhas[1]["returnDate"], "")
+        self.assertEqual(list(linhas[0]), list(exportador.COLUNAS))
+
+    def test_jsonl_igual_a_api(self):
+        corpo = b"".join(exportador.exportar(EMPRESTIMOS, "jsonl"))
+        self.assertEqual([json.loads(l) for l in corpo.splitlines()], EMPRESTIMOS)
+        self.assertEqual(list(exportador.exportar([], "jsonl")), [])
+
+    @unittest.skipUnless(exportador.pyarrow is not None, "pyarrow não instalado")
+    def test_arrow_colunar(self):
+        corpo = b"".join(exportador.exportar(EMPRESTIMOS, "arrow", tamanho_lote=2))
+        tabela = exportador.pyarrow.ipc.open_stream(corpo).read_all()
+        self.assertEqual(tabela.column("loanId").to_pylist(), [1, 2, 3])
+        self.assertEqual(tabela.column("loanDate").to_pylist()[0], datetime(2024, 3, 1, 9, 30))
+        self.assertIsNone(tabela.column("returnDate").to_pylist()[1])
+
+    def test_formato_indisponivel(self):
+        with self.assertRaises(ValueError):
+            exportador.exportar(EMPRESTIMOS, "xml")
+        if exportador.pyarrow is None:
+            self.assertNotIn("arrow", exportador.formatos_disponiveis())
+
+    def test_intervalo(self):
+        self.assertEqual(exportador.intervalo(), (None, None))
+        self.assertEqual(exportador.intervalo("2024-03-01", "2024-03-31"),
+                         (datetime(2024, 3, 1), datetime(2024, 4, 1)))
+        self.assertEqual(exportador.intervalo(ate="2024-03-31T12:00:00")[1],
+                         datetime(2024, 3, 31, 12, 0, 0, 1))
+        for de, ate in (("ontem", None), ("2024-04-01", "2024-03-01")):
+            with self.assertRaises(ValueError):
+                exportador.intervalo(de, ate)
+
+
+class TestLinhaDeComando(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.originais = (modulo_emprestimo.emprestimos, modulo_emprestimo.next_loan_id,
+                          mock_catalogo._catalogo_db, mock_usuarios._usuarios_db)
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        mock_catalogo._catalogo_db = {i: {"bookId": i, "titulo": f"Livro {i}", "autor": "A", "status": "disponivel"}
+                                      for i in range(1, 4)}
+        mock_usuarios._usuarios_db = {1: {"userId": 1, "nome": "Ana", "tipo": "aluno", "email": "ana@escola.com"}}
+
+    def tearDown(self):
+        (modulo_emprestimo.emprestimos, modulo_emprestimo.next_loan_id,
+         mock_catalogo._catalogo_db, mock_usuarios._usuarios_db) = self.originais
+        self.dir.cleanup()
+
+    def test_exporta_o_historico_do_journal(self):
+        dados = os.path.join(self.dir.name, "dados")
+        persistencia.ativar(dados)
+        try:
+            ids = [r["loan"]["loanId"] for r in modulo_emprestimo.registrar_emprestimos([(1, 1), (1, 2), (1, 3)])]
+            modulo_emprestimo.registrar_devolucao(ids[0])
+        finally:
+            persistencia.desativar()
+        modulo_emprestimo.emprestimos = []
+
+        saida = os.path.join(self.dir.name, "ativos.csv")
+        self.assertEqual(exportador.main(["csv", saida, "--dados", dados, "--status", "ACTIVE", "--lote", "1"]), 0)
+        with open(saida, encoding="utf-8") as f:
+            self.assertEqual([int(l["loanId"]) for l in csv.DictReader(f)], ids[1:])
+        # Só leitura: o journal não ganha eventos
+        self.assertIsNone(persistencia._journal)
+
+
+if __name__ == '__main__':
+    unittest.main()
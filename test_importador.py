@@ -0,0 +1,155 @@
+# test_importador.py
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import mock_catalogo
+import mock_usuarios
+import modulo_emprestimo
+import importador
+import persistencia
+from repositorio_sqlite import RepositorioSQLite
+
+LIVROS_CSV = '''bookId,titulo,autor,status
+1,Dom Casmurro,Machado de Assis,
+2,"Memórias Póstumas
+de Brás Cubas","Machado, de Assis",
+abc,Sem id,X,
+3,,Autor,
+4,Grande Sertão,Rosa,perdido
+
+5,Extra,A,disponivel,coluna
+6,"Aspas ""duplas""",,
+'''
+
+USUARIOS_JSONL = '''{"userId": 10, "nome": "Ana", "tipo": "aluno", "email": "ana@escola.com"}
+{"userId": 11, "nome": "Bia", "tipo": "visitante", "email": "bia@escola.com"}
+nao e json
+[1, 2]
+
+{"userId": "12", "nome": "Caio", "tipo": "professor", "email": "caio@escola.com"}
+{"userId": 13, "nome": "Duda", "tipo": "aluno", "email": "sem-arroba"}
+'''
+
+ERROS_LIVROS = [
+    {"linha": 5, "erro": "bookId deve ser um inteiro positivo"},
+    {"linha": 6, "erro": "titulo é obrigatório"},
+    {"linha": 7, "erro": "status deve ser disponivel ou emprestado"},
+    {"linha": 9, "erro": "esperadas 4 colunas, encontradas 5"},
+]
+
+
+class TestImportador(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.originais = mock_catalogo._catalogo_db, mock_usuarios._usuarios_db
+        mock_catalogo._catalogo_db = {}
+        mock_usuarios._usuarios_db = {}
+
+    def tearDown(self):
+        mock_catalogo._catalogo_db, mock_usuarios._usuarios_db = self.originais
+        self.dir.cleanup()
+
+    def arquivo(self, nome, conteudo):
+        caminho = os.path.join(self.dir.name, nome)
+        with open(caminho, "w", encoding="utf-8") as f:
+            f.write(conteudo)
+        return caminho
+
+    def test_csv_com_erros_por_linha(self):
+        caminho = self.arquivo("livros.csv", LIVROS_CSV)
+        progresso = []
+        relatorio = importador.importar(caminho, "livros", tamanho_lote=3,
+                                        progresso=lambda r: progresso.append(r.registros))
+        self.assertEqual((relatorio.registros, relatorio.importados, relatorio.erros), (7, 3, 4))
+        self.assertEqual(relatorio.primeiros_erros, ERROS_LIVROS)
+        self.assertEqual(progresso, [3, 6, 7])
+        self.assertGreater(relatorio.to_dict()["registros_por_segundo"], 0)
+
+        self.assertEqual(mock_catalogo.get_livro(2)["titulo"], "Memórias Póstumas\nde Brás Cubas")
+        self.assertEqual(mock_catalogo.get_livro(2)["autor"], "Machado, de Assis")
+        self.assertEqual(mock_catalogo.get_livro(6)["titulo"], 'Aspas "duplas"')
+        self.assertIsNone(mock_catalogo.get_livro(6)["autor"])
+        self.assertEqual(mock_catalogo.contar_livros_por_status(), {"disponivel": 3})
+        self.assertEqual([l["bookId"] for l in mock_catalogo.buscar_livros("bras cubas")], [2])
+
+    def test_jsonl_de_usuarios_e_arquivo_de_erros(self):
+        caminho = self.arquivo("usuarios.jsonl", USUARIOS_JSONL)
+        saida = io.StringIO()
+        relatorio = importador.importar(caminho, "usuarios", saida_erros=saida)
+        self.assertEqual(sorted(mock_usuarios._usuarios_db), [10, 12])
+        self.assertEqual([json.loads(l)["linha"] for l in saida.getvalue().splitlines()], [2, 3, 4, 7])
+        self.assertEqual(relatorio.erros, 4)
+
+    def test_processos_paralelos_dao_o_mesmo_resultado(self):
+        caminho = self.arquivo("livros.csv", LIVROS_CSV)
+        relatorio = importador.importar(caminho, "livros", tamanho_lote=2, processos=2)
+        self.assertEqual(relatorio.primeiros_erros, ERROS_LIVROS)
+        self.assertEqual(sorted(mock_catalogo._catalogo_db), [1, 2, 6])
+
+    def test_reimportacao_nao_libera_livro_emprestado(self):
+        emprestimos = modulo_emprestimo.emprestimos
+        self.addCleanup(setattr, modulo_emprestimo, "emprestimos", emprestimos)
+        modulo_emprestimo.emprestimos = []
+        mock_usuarios.adicionar_usuario(1, "Ana", "aluno", "ana@escola.com")
+        mock_usuarios.adicionar_usuario(2, "Bia", "aluno", "bia@escola.com")
+        importador.importar(self.arquivo("livros.csv", "bookId,titulo,autor\n1,Dom Casmurro,Machado\n2,Iracema,Alencar\n"), "livros")
+        self.assertTrue(modulo_emprestimo.adicionar_emprestimo(1, 1)["sucesso"])
+
+        relatorio = importador.importar(self.arquivo("livros.csv", "bookId,titulo,autor\n1,Dom Casmurro (2a ed.),Machado\n"), "livros")
+        self.assertEqual((relatorio.importados, relatorio.erros), (1, 0))
+        self.assertEqual(mock_catalogo.get_livro(1)["titulo"], "Dom Casmurro (2a ed.)")
+        self.assertEqual(mock_catalogo.get_livro(1)["status"], "emprestado")
+        self.assertEqual(modulo_emprestimo.adicionar_emprestimo(2, 1)["erro"], "Livro indisponível")
+
+        relatorio = importador.importar(self.arquivo("livros.jsonl", "\n".join([
+            '{"bookId": 1, "titulo": "Dom Casmurro", "status": "disponivel"}',
+            '{"bookId": 2, "titulo": "Iracema", "status": "emprestado"}',
+            '{"bookId": 3, "titulo": "Novo", "status": "disponivel"}',
+        ])), "livros")
+        self.assertEqual(relatorio.primeiros_erros, [
+            {"linha": 1, "erro": "livro com empréstimo ativo não pode ficar disponivel"},
+            {"linha": 2, "erro": "livro sem empréstimo ativo não pode ficar emprestado"},
+        ])
+        self.assertEqual(relatorio.importados, 1)
+        self.assertEqual(mock_catalogo.contar_livros_por_status(), {"emprestado": 1, "disponivel": 2})
+
+    def test_erros_do_arquivo_inteiro(self):
+        with self.assertRaises(ValueError):
+            importador.importar(self.arquivo("livros.csv", "bookId,autor\n1,X\n"), "livros")
+        with self.assertRaises(ValueError):
+            importador.importar(self.arquivo("livros.txt", ""), "livros")
+        with self.assertRaises(ValueError):
+            importador.importar(self.arquivo("livros.csv", LIVROS_CSV), "autores")
+
+    def test_importar_no_sqlite(self):
+        repo = RepositorioSQLite(os.path.join(self.dir.name, "b.db"))
+        try:
+            relatorio = importador.importar(self.arquivo("livros.csv", LIVROS_CSV), "livros", repo)
+            self.assertEqual(relatorio.importados, 3)
+            self.assertEqual(repo.contar_livros_por_status(), {"disponivel": 3})
+            self.assertEqual([l["bookId"] for l in repo.buscar_livros("casmurro")], [1])
+        finally:
+            repo.fechar()
+        self.assertEqual(mock_catalogo._catalogo_db, {})
+
+    def test_linha_de_comando_grava_no_journal(self):
+        caminho = self.arquivo("usuarios.jsonl", USUARIOS_JSONL)
+        dados = os.path.join(self.dir.name, "dados")
+        with contextlib.redirect_stdout(io.StringIO()) as saida, contextlib.redirect_stderr(io.StringIO()):
+            codigo = importador.main(["usuarios", caminho, "--dados", dados])
+        self.assertEqual(codigo, 1)
+        self.assertEqual(json.loads(saida.getvalue())["importados"], 2)
+
+        mock_usuarios._usuarios_db = {}
+        try:
+            persistencia.ativar(dados)
+            self.assertEqual(sorted(mock_usuarios._usuarios_db), [10, 12])
+        finally:
+            persistencia.desativar()
+
+
+if __name__ == '__main__':
+    unittest.main()
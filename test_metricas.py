@@ -0,0 +1,96 @@
+# test_metricas.py
+import io
+import threading
+import unittest
+import metricas
+
+
+class TestHistograma(unittest.TestCase):
+    def test_buckets_e_quantis(self):
+        h = metricas.Histograma((0.1, 0.2, 0.4))
+        for valor in (0.05, 0.1, 0.15, 0.3, 5.0):
+            h.observar(valor)
+        self.assertEqual(h.contagens, [2, 1, 1, 1])
+        self.assertEqual(h.total, 5)
+        self.assertAlmostEqual(h.soma, 5.6)
+        self.assertAlmostEqual(h.quantil(0.4), 0.1)
+        self.assertAlmostEqual(h.quantil(0.5), 0.15)
+        self.assertEqual(h.quantil(1.0), 0.4)
+        self.assertIsNone(metricas.Histograma().quantil(0.5))
+
+
+class TestMetricas(unittest.TestCase):
+    def setUp(self):
+        self.metricas = metricas.Metricas(limites=(0.01, 0.1))
+
+    def test_exportacao_prometheus(self):
+        self.metricas.observar_requisicao("/emprestimos", "GET", 200, 0.005)
+        self.metricas.observar_requisicao("/emprestimos", "GET", 200, 0.05)
+        self.metricas.observar_requisicao("/emprestimos/devolver/<int:loan_id>", "GET", 400, 0.001)
+        self.metricas.incrementar("emprestimos_criados", 3)
+        self.metricas.registrar_medidor("livros_catalogo", "Livros", lambda: 7)
+        texto = self.metricas.exportar()
+        linhas = texto.splitlines()
+        nome = "biblioteca_requisicao_duracao_segundos"
+        self.assertIn(f'{nome}_bucket{{rota="/emprestimos",metodo="GET",le="0.01"}} 1', linhas)
+        self.assertIn(f'{nome}_bucket{{rota="/emprestimos",metodo="GET",le="0.1"}} 2', linhas)
+        self.assertIn(f'{nome}_bucket{{rota="/emprestimos",metodo="GET",le="+Inf"}} 2', linhas)
+        self.assertIn(f'{nome}_count{{rota="/emprestimos",metodo="GET"}} 2', linhas)
+        self.assertIn('biblioteca_requisicoes_total{rota="/emprestimos",metodo="GET",status="200"} 2', linhas)
+        self.assertIn('biblioteca_erros_total{rota="/emprestimos/devolver/<int:loan_id>",metodo="GET",status="400"} 1',
+                      linhas)
+        self.assertNotIn('biblioteca_erros_total{rota="/emprestimos",metodo="GET",status="200"} 2', linhas)
+        self.assertIn("biblioteca_emprestimos_criados_total 3", linhas)
+        self.assertIn("biblioteca_devolucoes_processadas_total 0", linhas)
+        self.assertIn("biblioteca_livros_catalogo 7", linhas)
+        self.assertIn("# TYPE biblioteca_livros_catalogo gauge", linhas)
+
+    def test_rotulos_escapados(self):
+        self.metricas.observar_requisicao('/a"b\\', "GET", 200, 0.001)
+        self.assertIn('rota="/a\\"b\\\\"', self.metricas.exportar())
+
+    def test_observacoes_concorrentes(self):
+        def observar():
+            for _ in range(1000):
+                self.metricas.observar_requisicao("/x", "GET", 200, 0.001)
+        threads = [threading.Thread(target=observar) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.metricas.latencia("/x", "GET").total, 4000)
+
+
+class TestLogAssincrono(unittest.TestCase):
+    def test_escreve_em_lote_na_ordem(self):
+        saida = io.StringIO()
+        log = metricas.LogAssincrono(saida, tamanho_lote=1000, intervalo=60)
+        for i in range(5):
+            log.registrar(f"linha {i}")
+        self.assertEqual(saida.getvalue(), "")
+        log.esvaziar()
+        self.assertEqual(saida.getvalue().splitlines(), [f"linha {i}" for i in range(5)])
+
+    def test_thread_escreve_ao_completar_lote(self):
+        saida = io.StringIO()
+        log = metricas.LogAssincrono(saida, tamanho_lote=3, intervalo=60)
+        for i in range(3):
+            log.registrar(f"linha {i}")
+        for _ in range(100):
+            if saida.getvalue():
+                break
+            threading.Event().wait(0.02)
+        self.assertEqual(saida.getvalue().splitlines(), ["linha 0", "linha 1", "linha 2"])
+
+    def test_descarta_com_fila_cheia(self):
+        saida = io.StringIO()
+        log = metricas.LogAssincrono(saida, tamanho_lote=100, intervalo=60, max_fila=2)
+        for i in range(5):
+            log.registrar(f"linha {i}")
+        log.esvaziar()
+        self.assertEqual(saida.getvalue().splitlines(), ["linha 0", "linha 1"])
+        self.assertEqual(log.descartadas, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# test_multas.py
+import unittest
+import multas
+
+DIA = multas.DIA
+
+
+class TestPoliticaMultas(unittest.TestCase):
+    def test_dias_iniciados_contam_inteiros(self):
+        self.assertEqual(multas.dias_atraso(10 * DIA, 10 * DIA), 0)
+        self.assertEqual(multas.dias_atraso(10 * DIA, 9 * DIA), 0)
+        self.assertEqual(multas.dias_atraso(10 * DIA, 10 * DIA + 1), 1)
+        self.assertEqual(multas.dias_atraso(10 * DIA, 13 * DIA), 3)
+
+    def test_valor_diario_carencia_e_teto(self):
+        politica = multas.PoliticaMultas(valor_diario=0.5, carencia_dias=2, teto=3.0)
+        self.assertEqual(politica.calcular(0, 2 * DIA), 0.0)
+        self.assertEqual(politica.calcular(0, 3 * DIA), 0.5)
+        self.assertEqual(politica.calcular(0, 6 * DIA), 2.0)
+        self.assertEqual(politica.calcular(0, 100 * DIA), 3.0)
+        self.assertEqual(multas.PoliticaMultas(0.1).calcular(0, 3 * DIA), 0.3)
+
+    def test_valores_negativos_rejeitados(self):
+        with self.assertRaises(ValueError):
+            multas.PoliticaMultas(-1)
+        with self.assertRaises(ValueError):
+            multas.PoliticaMultas(carencia_dias=-1)
+        with self.assertRaises(ValueError):
+            multas.PoliticaMultas(teto=-1)
+
+
+class TestTarefaMultas(unittest.TestCase):
+    def test_executar_guarda_resultado(self):
+        tarefa = multas.TarefaMultas(lambda: {"atrasados": 2, "atualizados": 1}, intervalo=60)
+        self.assertEqual(tarefa.executar(), {"atrasados": 2, "atualizados": 1})
+        self.assertEqual(tarefa.execucoes, 1)
+        self.assertIsNotNone(tarefa.ultima_duracao)
+
+    def test_thread_executa_periodicamente(self):
+        chamadas = []
+        tarefa = multas.TarefaMultas(lambda: chamadas.append(1), intervalo=0.01).iniciar()
+        try:
+            for _ in range(200):
+                if len(chamadas) >= 2:
+                    break
+                tarefa._parar.wait(0.01)
+        finally:
+            tarefa.parar()
+        self.assertGreaterEqual(len(chamadas), 2)
+        total = len(chamadas)
+        tarefa._parar.wait(0.05)
+        self.assertEqual(len(chamadas), total)
+
+    def test_intervalo_invalido(self):
+        with self.assertRaises(ValueError):
+            multas.TarefaMultas(lambda: None, intervalo=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+# test_perfil.py
+import unittest
+import modulo_emprestimo
+import mock_catalogo
+import perfil
+from controler import Controller, controller
+
+
+class TestPerfil(unittest.TestCase):
+    def setUp(self):
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        mock_catalogo._catalogo_db = {
+            i: {"bookId": i, "titulo": f"Livro {i}", "autor": "Autor", "status": "disponivel"}
+            for i in range(1, 4)
+        }
+        self.perfilador = perfil.Perfilador()
+
+    def tearDown(self):
+        self.perfilador.desativar()
+        modulo_emprestimo.emprestimos = []
+
+    def test_desligado_nao_altera_metodos(self):
+        original = Controller.registrar_emprestimo
+        self.perfilador.ativar()
+        self.assertIsNot(Controller.registrar_emprestimo, original)
+        self.perfilador.desativar()
+        self.assertIs(Controller.registrar_emprestimo, original)
+
+    def test_sem_amostra_nada_e_registrado(self):
+        self.perfilador.ativar(taxa=0.0)
+        controller.registrar_emprestimo(1, 1)
+        self.assertEqual(self.perfilador.estatisticas(), [])
+        self.assertFalse(self.perfilador.deve_amostrar())
+        self.assertTrue(self.perfilador.deve_amostrar(forcar=True))
+
+    def test_pilhas_e_estatisticas(self):
+        self.perfilador.ativar()
+        with self.perfilador.amostra("teste"):
+            controller.registrar_emprestimo(1, 1)
+            controller.listar_emprestimos()
+            controller.listar_emprestimos()
+        estatisticas = {e["funcao"]: e for e in self.perfilador.estatisticas()}
+        self.assertEqual(estatisticas["Controller.listar_emprestimos"]["chamadas"], 2)
+        self.assertEqual(estatisticas["Controller.registrar_emprestimo"]["chamadas"], 1)
+        # to_dict chamado dentro de listar_emprestimos aparece aninhado
+        self.assertIn("Emprestimo.to_dict", estatisticas)
+        for e in estatisticas.values():
+            self.assertLessEqual(e["proprio_ms"], e["total_ms"] + 1e-9)
+
+        pilhas = dict(linha.rsplit(" ", 1) for linha in self.perfilador.pilhas().splitlines())
+        self.assertIn("teste", pilhas)
+        self.assertIn("teste;Controller.listar_emprestimos", pilhas)
+        self.assertIn("teste;Controller.listar_emprestimos;Emprestimo.to_dict", pilhas)
+        self.assertTrue(all(valor.isdigit() for valor in pilhas.values()))
+        self.assertEqual(self.perfilador.amostras, 1)
+
+    def test_taxa_invalida(self):
+        with self.assertRaises(ValueError):
+            self.perfilador.ativar(taxa=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+# test_persistencia.py
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta
+import modulo_emprestimo
+import mock_usuarios
+import mock_catalogo
+import persistencia
+
+
+class _DaquiA16DiasEMeio(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(days=16, hours=12)
+
+
+class TestPersistencia(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self._resetar_estado()
+
+    def tearDown(self):
+        persistencia.desativar()
+        self.dir.cleanup()
+        modulo_emprestimo.emprestimos = []
+
+    def _resetar_estado(self):
+        """Simula o reinício do processo: estado em memória volta ao inicial."""
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        mock_catalogo._catalogo_db = {
+            1: {"bookId": 1, "titulo": "Engenharia de Software", "autor": "Sommerville", "status": "disponivel"},
+            2: {"bookId": 2, "titulo": "Banco de Dados", "autor": "Date", "status": "disponivel"},
+        }
+        mock_usuarios._usuarios_db = {
+            1: {"userId": 1, "nome": "Ana Silva", "tipo": "aluno", "email": "ana@escola.com"},
+        }
+
+    def _reiniciar(self, **opcoes):
+        persistencia.desativar()
+        self._resetar_estado()
+        return persistencia.ativar(self.dir.name, **opcoes)
+
+    def test_estado_recuperado_apos_reinicio(self):
+        persistencia.ativar(self.dir.name)
+        mock_usuarios.adicionar_usuario(7, "Davi", "professor", "davi@escola.com")
+        mock_catalogo.adicionar_livro(9, "Redes", "Tanenbaum")
+        res = modulo_emprestimo.adicionar_emprestimo(7, 9)
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        modulo_emprestimo.registrar_devolucao(res["loan"]["loanId"])
+
+        self._reiniciar()
+
+        self.assertEqual(mock_usuarios.get_usuario(7)["nome"], "Davi")
+        self.assertEqual(mock_catalogo.get_livro(9)["status"], "disponivel")
+        self.assertEqual(mock_catalogo.get_livro(1)["status"], "emprestado")
+        self.assertEqual(modulo_emprestimo.get_emprestimo_by_id(1), res["loan"] | {
+            "status": "RETURNED", "returnDate": modulo_emprestimo.get_emprestimo_by_id(1)["returnDate"]
+        })
+        self.assertEqual(modulo_emprestimo.get_estatisticas(), {"ativos": 1, "devolvidos": 1, "total": 2})
+        novo = modulo_emprestimo.adicionar_emprestimo(1, 2)
+        self.assertEqual(novo["loan"]["loanId"], 3)
+
+    def test_multas_recuperadas_apos_reinicio(self):
+        persistencia.ativar(self.dir.name)
+        loan = modulo_emprestimo.adicionar_emprestimo(1, 1)["loan"]
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        vencimento = datetime.fromisoformat(loan["dueDate"])
+        modulo_emprestimo.aplicar_multas(vencimento + timedelta(days=2))
+        modulo_emprestimo.registrar_devolucao(loan["loanId"])
+
+        self._reiniciar()
+
+        self.assertEqual(modulo_emprestimo.get_emprestimo_by_id(1)["fine"], 0.0)
+        self.assertEqual(modulo_emprestimo.get_emprestimo_by_id(2)["fine"], 2.0)
+        self.assertEqual(modulo_emprestimo.listar_atrasados(vencimento + timedelta(days=1))["total"], 1)
+
+    @unittest.skipIf(persistencia.fcntl is None, "sem flock nesta plataforma")
+    def test_diretorio_travado_para_outros_processos(self):
+        persistencia.ativar(self.dir.name)
+        with self.assertRaises(persistencia.DiretorioEmUso):
+            persistencia.Journal(self.dir.name).travar()
+
+        raiz = os.path.dirname(os.path.abspath(__file__))
+        arquivo = os.path.join(self.dir.name, "usuarios.jsonl")
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write('{"userId": 5, "nome": "Eva", "tipo": "aluno", "email": "eva@escola.com"}\n')
+        processo = subprocess.run(
+            [sys.executable, os.path.join(raiz, "importador.py"), "usuarios", arquivo, "--dados", self.dir.name],
+            capture_output=True, text=True, cwd=raiz, timeout=60)
+        self.assertEqual(processo.returncode, 2)
+        self.assertIn(f"em uso por outro processo (pid {os.getpid()})", processo.stderr)
+
+        persistencia.desativar()
+        journal = persistencia.Journal(self.dir.name)
+        journal.travar()
+        journal.destravar()
+
+    def test_snapshot_compacta_journal(self):
+        journal = persistencia.ativar(self.dir.name)
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        journal.compactar()
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, persistencia.ARQUIVO_SNAPSHOT)))
+        journal2 = self._reiniciar()
+        self.assertEqual(len(modulo_emprestimo.emprestimos), 2)
+        self.assertEqual(mock_catalogo.get_livro(2)["status"], "emprestado")
+        self.assertEqual(journal2.seq, journal.seq)
+
+    def test_snapshot_serializado_depois_de_alteracoes(self):
+        # compactar só toma referências sob a trava e serializa depois: o
+        # snapshot pode trazer uma devolução (até pela metade) cujo evento
+        # ficou depois dele no journal
+        journal = persistencia.ativar(self.dir.name)
+        loan_id = modulo_emprestimo.adicionar_emprestimo(1, 1)["loan"]["loanId"]
+        with modulo_emprestimo._lock, mock_catalogo._lock, mock_usuarios._lock:
+            referencias = persistencia._referencias_estado()
+            seq = journal.seq
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        with unittest.mock.patch.object(modulo_emprestimo, "datetime", _DaquiA16DiasEMeio):
+            modulo_emprestimo.registrar_devolucao(loan_id)  # aluno: 14 dias; 3 dias (iniciados) de atraso
+        estado = persistencia._serializar_estado(referencias)
+        self.assertEqual(len(estado["emprestimos"]), 1)
+        estado["emprestimos"][0]["fine"] = 0.0  # lido entre o status e a multa
+        journal._gravar_snapshot(seq, estado)
+        esperado = modulo_emprestimo.get_emprestimos()
+        self.assertEqual(esperado[0]["fine"], 3.0)
+
+        self._reiniciar()
+        self.assertEqual(modulo_emprestimo.get_emprestimos(), esperado)
+        self.assertEqual(modulo_emprestimo.get_estatisticas(), {"ativos": 1, "devolvidos": 1, "total": 2})
+        self.assertEqual(mock_catalogo.contar_livros_por_status(), {"disponivel": 1, "emprestado": 1})
+
+    def test_usuario_adicionado_durante_compactacao(self):
+        # Um usuário gravado logo depois da cópia do snapshot tem de esperar a
+        # troca de journal; senão seu evento iria para o journal descartado
+        journal = persistencia.ativar(self.dir.name)
+        referencias_originais = persistencia._referencias_estado
+        threads = []
+
+        def referencias_com_escrita():
+            referencias = referencias_originais()
+            t = threading.Thread(target=mock_usuarios.adicionar_usuario,
+                                 args=(9, "Nina", "aluno", "nina@escola.com"))
+            t.start()
+            t.join(0.2)
+            threads.append(t)
+            return referencias
+
+        with unittest.mock.patch.object(persistencia, "_referencias_estado", referencias_com_escrita):
+            journal.compactar()
+        threads[0].join()
+
+        self._reiniciar()
+        self.assertEqual(mock_usuarios.get_usuario(9)["nome"], "Nina")
+
+    def test_linha_incompleta_ignorada(self):
+        persistencia.ativar(self.dir.name)
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        persistencia.desativar()
+        with open(os.path.join(self.dir.name, persistencia.ARQUIVO_JOURNAL), "a", encoding="utf-8") as f:
+            f.write('[99,"emprestimo",{"loanId"')
+
+        self._reiniciar()
+        self.assertEqual(len(modulo_emprestimo.emprestimos), 1)
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        self._reiniciar()
+        self.assertEqual(len(modulo_emprestimo.emprestimos), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
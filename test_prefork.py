@@ -0,0 +1,121 @@
+# test_prefork.py
+import contextlib
+import http.client
+import io
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+import main
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "prefork exige fork()")
+class TestPrefork(unittest.TestCase):
+    """Sobe main.py com vários processos e backend SQLite."""
+
+    modo = "threads"
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.porta = porta_livre()
+        self.processo = subprocess.Popen(
+            [sys.executable, os.path.join(RAIZ, "main.py"), "--porta", str(self.porta),
+             "--backend", "sqlite", "--banco", os.path.join(self.dir.name, "b.db"),
+             "--processos", "3", "--modo", self.modo, "--workers", "2"],
+            cwd=self.dir.name, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        limite = time.monotonic() + 10
+        while True:
+            try:
+                self.requisitar("GET", "/api/estatisticas")
+                break
+            except OSError:
+                if time.monotonic() > limite:
+                    raise
+                time.sleep(0.1)
+
+    def tearDown(self):
+        if self.processo.poll() is None:
+            self.processo.terminate()
+            try:
+                self.processo.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.processo.kill()
+                self.processo.wait()
+        self.dir.cleanup()
+
+    def requisitar(self, metodo, caminho, dados=None):
+        conexao = http.client.HTTPConnection("localhost", self.porta, timeout=5)
+        corpo = json.dumps(dados) if dados is not None else None
+        conexao.request(metodo, caminho, body=corpo)
+        resposta = conexao.getresponse()
+        texto = resposta.read()
+        conexao.close()
+        return resposta.status, json.loads(texto)
+
+    def test_mesmo_livro_emprestado_uma_vez_entre_processos(self):
+        status = []
+        def emprestar(user_id):
+            status.append(self.requisitar("POST", "/api/emprestimos", {"userId": user_id, "bookId": 1})[0])
+        threads = [threading.Thread(target=emprestar, args=(1 + i % 3,)) for i in range(12)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(sorted(status), [201] + [409] * 11)
+        # Todos os processos enxergam o livro emprestado
+        for _ in range(10):
+            self.assertEqual(self.requisitar("GET", "/api/livros/1")[1]["status"], "emprestado")
+        self.assertEqual(self.requisitar("GET", "/api/estatisticas")[1]["ativos"], 1)
+
+    def test_filhos_encerram_se_o_mestre_morre(self):
+        self.processo.kill()
+        self.processo.wait()
+        limite = time.monotonic() + 10
+        while True:
+            try:
+                self.requisitar("GET", "/api/estatisticas")
+            except OSError:
+                break
+            self.assertLess(time.monotonic(), limite)
+            time.sleep(0.2)
+
+    def test_sigterm_encerra_todos_os_processos(self):
+        self.processo.send_signal(signal.SIGTERM)
+        self.assertEqual(self.processo.wait(timeout=15), 0)
+        with self.assertRaises(OSError):
+            self.requisitar("GET", "/api/estatisticas")
+
+
+class TestPreforkAssincrono(TestPrefork):
+    modo = "asyncio"
+
+
+class TestArgumentos(unittest.TestCase):
+    def test_workers_e_processos_devem_ser_positivos(self):
+        for argumentos in (["--workers", "0"], ["--workers", "-2"], ["--processos", "0"]):
+            with self.subTest(argumentos=argumentos), \
+                    contextlib.redirect_stderr(io.StringIO()) as erro, \
+                    self.assertRaises(SystemExit) as saida:
+                main.main(argumentos)
+            self.assertEqual(saida.exception.code, 2)
+            self.assertIn("deve ser positivo", erro.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,325 @@
+# test_repositorio.py
+"""Cenários do Controller executados contra cada backend de armazenamento."""
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+import modulo_emprestimo
+import mock_usuarios
+import mock_catalogo
+import controler
+from repositorio import RepositorioMemoria, criar_repositorio
+from repositorio_sqlite import RepositorioSQLite
+
+USUARIOS = [
+    (1, "Ana Silva", "aluno", "ana@escola.com"),
+    (2, "Bruno Costa", "professor", "bruno@escola.com"),
+]
+LIVROS = [
+    (1, "Engenharia de Software", "Sommerville", "disponivel"),
+    (2, "Banco de Dados", "Date", "emprestado"),
+    (3, "IA Moderna", "Russell", "disponivel"),
+]
+
+
+class RepositorioDeTeste:
+    """
+    Cria o repositório (`criar_repositorio`, definido por um dos mixins de
+    BACKENDS_DE_TESTE) com USUARIOS e LIVROS e um Controller sobre ele.
+    """
+
+    def setUp(self):
+        self.repositorio = self.criar_repositorio()
+        for usuario in USUARIOS:
+            self.repositorio.adicionar_usuario(*usuario)
+        for livro in LIVROS:
+            self.repositorio.adicionar_livro(*livro)
+        self.controller = controler.Controller(self.repositorio)
+
+
+class BackendMemoria:
+    def criar_repositorio(self):
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        mock_catalogo._catalogo_db = {}
+        mock_usuarios._usuarios_db = {}
+        return RepositorioMemoria()
+
+    def tearDown(self):
+        modulo_emprestimo.emprestimos = []
+
+
+class BackendSQLite:
+    def criar_repositorio(self):
+        self.dir = tempfile.TemporaryDirectory()
+        return criar_repositorio("sqlite", os.path.join(self.dir.name, "biblioteca.db"), tamanho_pool=4)
+
+    def tearDown(self):
+        self.repositorio.fechar()
+        self.dir.cleanup()
+
+
+# Backend (repositorio.BACKENDS) -> mixin que cria o repositório de teste
+BACKENDS_DE_TESTE = {"memoria": BackendMemoria, "sqlite": BackendSQLite}
+
+
+class CenariosRepositorio(RepositorioDeTeste):
+    """Testes comuns, executados contra cada backend."""
+
+    def test_verificar_disponibilidade(self):
+        self.assertEqual(self.controller.verificar_disponibilidade(1)["status"], "disponivel")
+        self.assertEqual(self.controller.verificar_disponibilidade(999), {"erro": "Livro não encontrado"})
+
+    def test_erros_de_emprestimo(self):
+        self.assertEqual(self.controller.registrar_emprestimo(999, 1)["erro"], "Usuário não encontrado")
+        self.assertEqual(self.controller.registrar_emprestimo(1, 999)["erro"], "Livro não encontrado")
+        self.assertEqual(self.controller.registrar_emprestimo(1, 2)["erro"], "Livro indisponível")
+
+    def test_fluxo_emprestimo_e_devolucao(self):
+        res = self.controller.registrar_emprestimo(user_id=2, book_id=3)
+        self.assertTrue(res["sucesso"])
+        loan = res["loan"]
+        self.assertEqual((loan["userId"], loan["bookId"], loan["status"]), (2, 3, "ACTIVE"))
+        self.assertEqual(self.repositorio.get_livro(3)["status"], "emprestado")
+
+        dev = self.controller.registrar_devolucao(loan["loanId"])
+        self.assertTrue(dev["sucesso"])
+        self.assertEqual(dev["loan"]["status"], "RETURNED")
+        self.assertIsNotNone(dev["loan"]["returnDate"])
+        self.assertEqual(self.repositorio.get_livro(3)["status"], "disponivel")
+
+        again = self.controller.registrar_devolucao(loan["loanId"])
+        self.assertEqual(again["erro"], "Empréstimo já devolvido")
+        self.assertEqual(self.controller.registrar_devolucao(999)["erro"], "Empréstimo não encontrado")
+
+    def test_listagem_estatisticas_e_relatorios(self):
+        primeiro = self.controller.registrar_emprestimo(1, 1)
+        self.controller.registrar_emprestimo(1, 3)
+        self.controller.registrar_devolucao(primeiro["loan"]["loanId"])
+        self.controller.registrar_emprestimo(2, 1)
+
+        self.assertEqual(self.controller.get_estatisticas(), {"ativos": 2, "devolvidos": 1, "total": 3})
+        pagina = self.controller.listar_emprestimos(status="ACTIVE", user_id=1)
+        self.assertEqual(pagina["total"], 1)
+        self.assertEqual(pagina["emprestimos"][0]["bookId"], 3)
+        self.assertEqual(self.controller.listar_emprestimos(offset=2, limite=5)["total"], 3)
+        self.assertEqual(len(self.controller.get_emprestimos()), 3)
+
+        relatorios = self.controller.get_relatorios(k=1)
+        self.assertEqual(relatorios["livros_mais_emprestados"][0]["bookId"], 1)
+        self.assertEqual(relatorios["usuarios_mais_ativos"][0]["nome"], "Ana Silva")
+        self.assertEqual(relatorios["taxa_ocupacao"]["emprestados"], 3)
+
+    def test_emprestimos_em_lote(self):
+        resultados = self.controller.registrar_emprestimos([(1, 1), (2, 1), (999, 3), (1, 2), (2, 3)])
+        self.assertEqual([r["sucesso"] for r in resultados], [True, False, False, False, True])
+        self.assertEqual(resultados[1]["erro"], "Livro indisponível")
+        self.assertEqual(resultados[2]["erro"], "Usuário não encontrado")
+        self.assertEqual(resultados[4]["loan"]["userId"], 2)
+        self.assertEqual(self.repositorio.get_livro(3)["status"], "emprestado")
+        self.assertEqual(self.controller.get_estatisticas()["ativos"], 2)
+
+    def test_devolucoes_em_lote(self):
+        ids = [r["loan"]["loanId"] for r in self.controller.registrar_emprestimos([(1, 1), (2, 3)])]
+        resultados = self.controller.registrar_devolucoes(ids + [ids[0], 999])
+        self.assertEqual([r["sucesso"] for r in resultados], [True, True, False, False])
+        self.assertEqual(resultados[2]["erro"], "Empréstimo já devolvido")
+        self.assertEqual(resultados[3]["erro"], "Empréstimo não encontrado")
+        self.assertEqual(resultados[0]["loan"]["status"], "RETURNED")
+        self.assertEqual(self.repositorio.get_livro(1)["status"], "disponivel")
+        self.assertEqual(self.controller.get_estatisticas(), {"ativos": 0, "devolvidos": 2, "total": 2})
+
+    def test_iterar_emprestimos(self):
+        self.repositorio.adicionar_livro(4, "Redes", "Tanenbaum", "disponivel")
+        ids = [r["loan"]["loanId"] for r in self.controller.registrar_emprestimos([(1, 1), (2, 3), (1, 4)])]
+        self.controller.registrar_devolucao(ids[1])
+
+        def iterados(**filtros):
+            return [emp["loanId"] for emp in self.repositorio.iterar_emprestimos(lote=2, **filtros)]
+
+        self.assertEqual(iterados(), ids)
+        self.assertEqual(list(self.repositorio.iterar_emprestimos()), self.controller.get_emprestimos())
+        self.assertEqual(iterados(status="RETURNED"), [ids[1]])
+        self.assertEqual(iterados(status="ACTIVE"), [ids[0], ids[2]])
+        agora = datetime.now()
+        self.assertEqual(iterados(inicio=agora - timedelta(hours=1), fim=agora + timedelta(hours=1)), ids)
+        self.assertEqual(iterados(inicio=agora + timedelta(hours=1)), [])
+        self.assertEqual(iterados(status="ACTIVE", fim=agora - timedelta(hours=1)), [])
+
+    def test_atrasados_vencimentos_e_multas(self):
+        self.repositorio.adicionar_livro(4, "Redes", "Tanenbaum", "disponivel")
+        ids = [r["loan"]["loanId"] for r in self.controller.registrar_emprestimos([(1, 1), (2, 3), (1, 4)])]
+        self.controller.registrar_devolucao(ids[0])
+        # aluno: 14 dias; professor: prazo maior
+        vencimentos = {emp["loanId"]: datetime.fromisoformat(emp["dueDate"]) for emp in self.controller.get_emprestimos()}
+        agora = datetime.now()
+
+        self.assertEqual(self.controller.listar_atrasados(agora), {"emprestimos": [], "total": 0})
+        proximos = [emp["loanId"] for emp in self.controller.proximos_vencimentos(k=5, agora=agora)]
+        self.assertEqual(proximos, sorted(ids[1:], key=lambda i: (vencimentos[i], i)))
+
+        depois = vencimentos[ids[2]] + timedelta(days=3)
+        atrasados = self.controller.listar_atrasados(depois)
+        self.assertEqual([emp["loanId"] for emp in atrasados["emprestimos"]][:1], [ids[2]])
+        self.assertEqual(atrasados["emprestimos"][0]["diasAtraso"], 3)
+        self.assertEqual(atrasados["emprestimos"][0]["fine"], 3.0)
+
+        muito_depois = max(vencimentos.values()) + timedelta(days=1)
+        self.assertEqual(self.controller.listar_atrasados(muito_depois, limite=1)["total"], 2)
+        versao = self.repositorio.get_versao()
+        self.assertEqual(self.controller.aplicar_multas(muito_depois), {"atrasados": 2, "atualizados": 2})
+        self.assertNotEqual(self.repositorio.get_versao(), versao)
+        self.assertGreater(self.controller.get_emprestimo_by_id(ids[2])["fine"], 0)
+        self.assertEqual(self.controller.get_emprestimo_by_id(ids[0])["fine"], 0.0)
+        self.assertEqual(self.controller.aplicar_multas(muito_depois)["atualizados"], 0)
+
+    def test_reimportar_livros_nao_libera_emprestado(self):
+        self.controller.registrar_emprestimo(1, 1)
+        recusados = self.repositorio.adicionar_livros([
+            (1, "Engenharia de Software", "Sommerville", None),
+            (3, "IA Moderna", "Russell", "emprestado"),
+            (1, "Engenharia de Software", "Sommerville", "disponivel"),
+            (4, "Redes", "Tanenbaum", None),
+        ])
+        self.assertEqual(recusados, [
+            (1, "livro sem empréstimo ativo não pode ficar emprestado"),
+            (2, "livro com empréstimo ativo não pode ficar disponivel"),
+        ])
+        self.assertEqual(self.repositorio.get_livro(1)["status"], "emprestado")
+        self.assertEqual(self.repositorio.get_livro(3)["status"], "disponivel")
+        self.assertEqual(self.repositorio.get_livro(4)["status"], "disponivel")
+        self.assertEqual(self.controller.registrar_emprestimo(2, 1)["erro"], "Livro indisponível")
+        self.assertEqual(self.repositorio.contar_livros_por_status(), {"disponivel": 2, "emprestado": 2})
+        self.assertEqual(self.repositorio.adicionar_usuarios([(3, "Caio", "aluno", "caio@escola.com")]), [])
+
+    def test_ranking_empate_fica_com_menor_id(self):
+        # Mais livros empatados que o top-K mantido em memória, emprestados do
+        # maior id para o menor: o ranking deve preferir os menores ids
+        for book_id in range(modulo_emprestimo.TOP_K + 10, 3, -1):
+            self.repositorio.adicionar_livro(book_id, f"Livro {book_id}", "Autor")
+            loan_id = self.controller.registrar_emprestimo(1, book_id)["loan"]["loanId"]
+            self.controller.registrar_devolucao(loan_id)
+        esperado = [(book_id, 1) for book_id in range(4, 7)]
+        self.assertEqual(self.repositorio.get_livros_mais_emprestados(3), esperado)
+        self.assertEqual(self.repositorio.get_livros_mais_emprestados(modulo_emprestimo.TOP_K + 1)[:3], esperado)
+
+    def test_versao_muda_a_cada_alteracao(self):
+        versao = self.repositorio.get_versao()
+        self.assertEqual(self.repositorio.get_versao(), versao)
+        loan_id = self.controller.registrar_emprestimo(1, 1)["loan"]["loanId"]
+        self.assertNotEqual(self.repositorio.get_versao(), versao)
+        versao = self.repositorio.get_versao()
+        self.controller.registrar_devolucao(loan_id)
+        self.assertNotEqual(self.repositorio.get_versao(), versao)
+        versao = self.repositorio.get_versao()
+        self.repositorio.adicionar_usuario(50, "Nova", "aluno", "nova@escola.com")
+        self.assertNotEqual(self.repositorio.get_versao(), versao)
+
+    def test_livros_por_status(self):
+        def ids(status, **opcoes):
+            pagina = self.controller.listar_livros_por_status(status, **opcoes)
+            return sorted(livro["bookId"] for livro in pagina["livros"]), pagina["total"]
+
+        self.assertEqual(ids("disponivel"), ([1, 3], 2))
+        self.assertEqual(ids("emprestado"), ([2], 1))
+        self.assertEqual(ids("inexistente"), ([], 0))
+
+        # Empréstimo, devolução e livros novos mudam as partições na hora
+        loan_id = self.controller.registrar_emprestimo(1, 1)["loan"]["loanId"]
+        self.repositorio.adicionar_livro(4, "Redes de Computadores", "Tanenbaum")
+        self.assertEqual(ids("disponivel"), ([3, 4], 2))
+        self.assertEqual(ids("emprestado"), ([1, 2], 2))
+        self.controller.registrar_devolucao(loan_id)
+        self.repositorio.adicionar_livro(2, "Banco de Dados", "Date", "disponivel")
+        self.assertEqual(ids("disponivel"), ([1, 2, 3, 4], 4))
+        self.assertEqual(ids("emprestado"), ([], 0))
+        self.assertEqual(self.controller.listar_livros_disponiveis().__len__(), 4)
+        self.assertEqual(self.repositorio.contar_livros_por_status(), {"disponivel": 4})
+
+        # Paginação: as páginas cobrem os livros sem repetir
+        paginas = [ids("disponivel", offset=offset, limite=3)[0] for offset in (0, 3)]
+        self.assertEqual(sorted(paginas[0] + paginas[1]), [1, 2, 3, 4])
+        self.assertEqual(len(paginas[0]), 3)
+
+        # Busca restrita ao status
+        self.controller.registrar_emprestimo(1, 4)
+        self.assertEqual(ids("disponivel", consulta="redes"), ([], 0))
+        self.assertEqual(ids("emprestado", consulta="TANENB"), ([4], 1))
+        self.assertEqual(ids("disponivel", consulta="de", limite=1)[1], 2)
+
+    def test_busca_de_livros(self):
+        self.repositorio.adicionar_livro(4, "Programação Orientada a Objetos", "Ramalho")
+        self.repositorio.adicionar_livro(5, "Introdução à programação", "Sommerville")
+        self.repositorio.adicionar_livro(6, "Ramalho", "Costa")
+
+        def ids(consulta, limite=20):
+            return [livro["bookId"] for livro in self.controller.buscar_livros(consulta, limite)]
+
+        self.assertEqual(sorted(ids("PROGRAMACAO")), [4, 5])
+        self.assertEqual(sorted(ids("introducao program")), [5])
+        self.assertEqual(ids("engenharia de so"), [1])
+        self.assertEqual(ids("ramalho"), [6, 4])  # título pesa mais que autor
+        self.assertEqual(len(ids("program", limite=1)), 1)
+        self.assertEqual(ids("inexistente"), [])
+        self.assertEqual(ids("  "), [])
+        self.assertEqual(self.controller.buscar_livros("banco")[0]["status"], "emprestado")
+
+        # Livros adicionados depois da primeira busca já aparecem
+        self.repositorio.adicionar_livro(7, "Álgebra Linear", "Boldrini")
+        self.assertEqual(ids("álgebra"), [7])
+        self.repositorio.adicionar_livro(7, "Cálculo", "Boldrini")
+        self.assertEqual(ids("algebra"), [])
+        self.assertEqual(ids("calc"), [7])
+
+        # ... inclusive os de uma carga em lote
+        self.repositorio.adicionar_livros([
+            (7, "Geometria Analítica", "Boldrini", None),
+            (8, "Cálculo Numérico", "Ruggiero", None),
+        ])
+        self.assertEqual(ids("calc"), [8])
+        self.assertEqual(ids("geometria"), [7])
+
+    def test_concorrencia_mesmo_livro(self):
+        resultados = []
+        barreira = threading.Barrier(6)
+
+        def emprestar():
+            barreira.wait()
+            resultados.append(self.controller.registrar_emprestimo(1, 3))
+
+        threads = [threading.Thread(target=emprestar) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sum(1 for r in resultados if r["sucesso"]), 1)
+
+
+class TestRepositorioMemoria(CenariosRepositorio, BackendMemoria, unittest.TestCase):
+    def test_carga_em_lote_atualiza_indice_sem_reconstruir(self):
+        self.controller.buscar_livros("software")
+        with mock.patch.object(mock_catalogo._indice, "construir") as construir:
+            self.repositorio.adicionar_livros([(4, "Redes de Computadores", "Tanenbaum", None)])
+            self.assertEqual([l["bookId"] for l in self.controller.buscar_livros("redes")], [4])
+        construir.assert_not_called()
+
+
+class TestRepositorioSQLite(CenariosRepositorio, BackendSQLite, unittest.TestCase):
+    def test_dados_persistem_entre_instancias(self):
+        self.controller.registrar_emprestimo(1, 1)
+        self.repositorio.fechar()
+        outro = RepositorioSQLite(self.repositorio.caminho)
+        try:
+            self.assertEqual(outro.get_livro(1)["status"], "emprestado")
+            self.assertEqual(outro.get_estatisticas()["ativos"], 1)
+        finally:
+            outro.fechar()
+
+    def test_importar_mocks_apenas_banco_vazio(self):
+        self.assertFalse(self.repositorio.importar_mocks())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,648 @@
+# test_view.py
+import asyncio
+import gzip
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from datetime import datetime, timedelta
+import modulo_emprestimo
+import mock_catalogo
+import servidor
+import servidor_async
+import metricas
+import perfil
+from View_and_Interface import view
+from View_and_Interface import compressao
+from View_and_Interface.templates import CacheTemplates
+from View_and_Interface.cache_paginas import CachePaginas
+from View_and_Interface.rotas import Roteador, Requisicao, ErroRota
+
+
+class ServidorDeTeste(unittest.TestCase):
+    """Sobe a BibliotecaView numa porta livre para testes ponta a ponta."""
+
+    opcoes_servidor = {"workers": 2}
+
+    def setUp(self):
+        modulo_emprestimo.emprestimos = []
+        modulo_emprestimo.next_loan_id = 1
+        mock_catalogo._catalogo_db = {
+            i: {"bookId": i, "titulo": f"Livro {i}", "autor": "Autor", "status": "disponivel"}
+            for i in range(1, 8)
+        }
+        view.BibliotecaView.log_message = lambda *args: None
+        self.iniciar_servidor()
+
+    def tearDown(self):
+        self.parar_servidor()
+        modulo_emprestimo.emprestimos = []
+
+    def iniciar_servidor(self):
+        self.httpd = servidor.criar_servidor(view.BibliotecaView, porta=0, **self.opcoes_servidor)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def parar_servidor(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def requisitar(self, metodo, caminho, corpo=None, headers=None):
+        conexao = http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+        conexao.request(metodo, caminho, body=corpo, headers=headers or {})
+        resposta = conexao.getresponse()
+        dados = resposta.read()
+        conexao.close()
+        return resposta, dados.decode("utf-8")
+
+
+class ServidorAssincronoDeTeste(ServidorDeTeste):
+    """Mesmos testes ponta a ponta, servidos pelo ServidorAssincrono."""
+
+    def iniciar_servidor(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.httpd = servidor_async.ServidorAssincrono(view.BibliotecaView, porta=0, **self.opcoes_servidor)
+        asyncio.run_coroutine_threadsafe(self.httpd.iniciar(), self.loop).result(5)
+
+    def parar_servidor(self):
+        asyncio.run_coroutine_threadsafe(self.httpd.encerrar(), self.loop).result(15)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.dir.name, "pagina.html")
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write("<html><body><!--CONTEUDO--></body></html>")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_render_substitui_marcador(self):
+        cache = CacheTemplates(self.dir.name)
+        self.assertEqual(cache.render("pagina.html", "<p>oi</p>"), "<html><body><p>oi</p></body></html>")
+
+    def test_template_lido_apenas_uma_vez(self):
+        cache = CacheTemplates(self.dir.name)
+        cache.carregar_todos()
+        os.remove(self.caminho)
+        self.assertIn("<p>x</p>", cache.render("pagina.html", "<p>x</p>"))
+
+    def test_recarregar_quando_arquivo_muda(self):
+        cache = CacheTemplates(self.dir.name, recarregar=True)
+        cache.get("pagina.html")
+        with open(self.caminho, "w", encoding="utf-8") as f:
+            f.write("<main><!--CONTEUDO--></main>")
+        novo_mtime = time.time() + 10
+        os.utime(self.caminho, (novo_mtime, novo_mtime))
+        self.assertEqual(cache.render("pagina.html", "y"), "<main>y</main>")
+
+    def test_template_inexistente(self):
+        cache = CacheTemplates(self.dir.name)
+        with self.assertRaises(FileNotFoundError):
+            cache.get("nao_existe.html")
+
+
+class TestCachePaginas(unittest.TestCase):
+    def test_versao_nova_descarta_paginas_anteriores(self):
+        cache = CachePaginas()
+        cache.guardar("/a", "ab.1.2.3", b"a1")
+        cache.guardar("/b", "ab.2.2.3", b"b2")
+        self.assertIsNone(cache.get("/a", "ab.1.2.3"))
+        self.assertEqual(cache.get("/b", "ab.2.2.3"), b"b2")
+
+    def test_resposta_de_versao_antiga_nao_e_guardada(self):
+        cache = CachePaginas()
+        cache.guardar("/a", "ab.2.2.3", b"a2")
+        cache.guardar("/b", "ab.1.2.3", b"b1")   # requisição lenta, dados antigos
+        cache.guardar("/c", "ab.3.1.3", b"c?")   # leitura misturada: não comparável
+        self.assertEqual(cache.get("/a", "ab.2.2.3"), b"a2")
+        self.assertIsNone(cache.get("/b", "ab.1.2.3"))
+        self.assertIsNone(cache.get("/c", "ab.3.1.3"))
+        cache.guardar("/d", "cd.0.0.0", b"d")    # repositório recriado
+        self.assertEqual(cache.get("/d", "cd.0.0.0"), b"d")
+
+
+
+class TestRoteador(unittest.TestCase):
+    def setUp(self):
+        self.roteador = Roteador()
+        self.chamadas = []
+        self.roteador.adicionar("/livros", lambda h: self.chamadas.append("lista"))
+        self.roteador.adicionar("/livros", lambda h: self.chamadas.append("salva"), metodos=("POST",))
+        self.roteador.adicionar("/livros/<int:book_id>", lambda h, book_id: self.chamadas.append(book_id))
+        self.roteador.adicionar("/arquivos/<caminho:resto>", lambda h, resto: self.chamadas.append(resto))
+
+    def despachar(self, metodo, caminho):
+        requisicao = Requisicao(metodo, caminho)
+        self.roteador.despachar(None, requisicao)
+        return requisicao
+
+    def test_rotas_fixas_por_metodo(self):
+        self.despachar("GET", "/livros")
+        self.despachar("POST", "/livros")
+        self.assertEqual(self.chamadas, ["lista", "salva"])
+
+    def test_parametros_convertidos(self):
+        requisicao = self.despachar("GET", "/livros/12")
+        self.assertEqual(self.chamadas, [12])
+        self.assertEqual(requisicao.parametros, {"book_id": 12})
+        self.despachar("GET", "/arquivos/a/b.csv")
+        self.assertEqual(self.chamadas[-1], "a/b.csv")
+
+    def test_erros(self):
+        casos = [("GET", "/livros/abc", 400), ("GET", "/nada", 404), ("GET", "/livros/1/x", 404),
+                 ("DELETE", "/livros", 405), ("POST", "/livros/1", 405)]
+        for metodo, caminho, status in casos:
+            with self.assertRaises(ErroRota) as contexto:
+                self.despachar(metodo, caminho)
+            self.assertEqual(contexto.exception.status, status, caminho)
+        self.assertEqual(contexto.exception.permitidos, ("GET",))
+        self.assertEqual(self.chamadas, [])
+
+    def test_middlewares_em_ordem(self):
+        ordem = []
+
+        def registrar(nome):
+            def middleware(handler, requisicao, proximo):
+                ordem.append(nome)
+                if not requisicao.rota.opcoes.get("bloquear"):
+                    proximo()
+                ordem.append("/" + nome)
+            return middleware
+
+        self.roteador.usar(registrar("a"))
+        self.roteador.usar(registrar("b"))
+        self.roteador.adicionar("/bloqueada", lambda h: ordem.append("rota"), bloquear=True)
+        self.despachar("GET", "/livros")
+        self.assertEqual(ordem, ["a", "b", "/b", "/a"])
+        self.assertEqual(self.chamadas, ["lista"])
+        ordem.clear()
+        self.despachar("GET", "/bloqueada")
+        self.assertEqual(ordem, ["a", "/a"])
+
+    def test_formulario(self):
+        requisicao = Requisicao("POST", "/x", corpo=b"nome=Ana&loan_id=1&loan_id=2")
+        self.assertEqual(requisicao.formulario, {"nome": "Ana", "loan_id": ["1", "2"]})
+
+
+class TestRotasDaView(ServidorDeTeste):
+    def test_id_malformado_responde_400(self):
+        resposta, _ = self.requisitar("GET", "/emprestimos/devolver/abc")
+        self.assertEqual(resposta.status, 400)
+
+    def test_metodo_nao_permitido(self):
+        resposta, _ = self.requisitar("POST", "/emprestimos/novo", b"")
+        self.assertEqual(resposta.status, 405)
+        self.assertEqual(resposta.getheader("Allow"), "GET")
+        resposta, _ = self.requisitar("GET", "/cadastro/salvar")
+        self.assertEqual(resposta.status, 405)
+        self.assertEqual(resposta.getheader("Allow"), "POST")
+
+    def test_rotas_existentes(self):
+        resposta, _ = self.requisitar("GET", "/")
+        self.assertEqual((resposta.status, resposta.getheader("Location")), (302, "/cadastro"))
+        resposta, _ = self.requisitar("GET", "/nao-existe")
+        self.assertEqual(resposta.status, 404)
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        resposta, _ = self.requisitar("GET", "/emprestimos/devolver/1")
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(modulo_emprestimo.emprestimos[0].get_status(), "RETURNED")
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        modulo_emprestimo.adicionar_emprestimo(1, 3)
+        resposta, _ = self.requisitar("POST", "/emprestimos/devolver", b"loan_id=2,3",
+                                      {"Content-Type": "application/x-www-form-urlencoded"})
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual([e.get_status() for e in modulo_emprestimo.emprestimos], ["RETURNED"] * 3)
+
+    def test_pagina_sem_etag_apos_versionada_na_mesma_conexao(self):
+        conexao = http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+        conexao.request("GET", "/emprestimos/novo")
+        resposta = conexao.getresponse()
+        resposta.read()
+        self.assertTrue(resposta.getheader("ETag"))
+        conexao.request("GET", "/emprestimos/devolver/99")
+        resposta = conexao.getresponse()
+        resposta.read()
+        self.assertIsNone(resposta.getheader("ETag"))
+        conexao.close()
+
+
+class TestCompressao(unittest.TestCase):
+    def test_negociacao_accept_encoding(self):
+        self.assertEqual(compressao.escolher_codificacao("gzip, deflate"), "gzip")
+        self.assertEqual(compressao.escolher_codificacao("*"), "gzip")
+        self.assertIsNone(compressao.escolher_codificacao("gzip;q=0, identity"))
+        self.assertIsNone(compressao.escolher_codificacao(None))
+
+    def test_pagina_com_segmentos_pre_comprimidos(self):
+        template = CacheTemplates().get("emprestimos.html")
+        conteudo = "<tr><td>linha</td></tr>".encode("utf-8") * 200
+        corpo = compressao.comprimir_pagina(template, conteudo, "gzip")
+        self.assertEqual(gzip.decompress(corpo), template.inicio_bytes + conteudo + template.fim_bytes)
+
+    def test_fluxo_em_partes(self):
+        fluxo = compressao.FluxoGzip()
+        corpo = fluxo.inicio() + fluxo.comprimir(b"abc") + fluxo.comprimir(b"") + fluxo.comprimir(b"def") + fluxo.fim()
+        self.assertEqual(gzip.decompress(corpo), b"abcdef")
+        self.assertEqual(gzip.decompress(compressao.comprimir(b"", "gzip")), b"")
+
+
+class TestListagemEmprestimos(ServidorDeTeste):
+    def test_listagem_paginada(self):
+        for book_id in range(1, 6):
+            modulo_emprestimo.adicionar_emprestimo(1, book_id)
+        resposta, html = self.requisitar("GET", "/emprestimos?pagina=2&por_pagina=2")
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(html.count("<tr>"), 2)
+        self.assertIn("Pagina 2 de 3", html)
+        self.assertIn('value="3"', html)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+    def test_listagem_filtrada_por_status(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        modulo_emprestimo.registrar_devolucao(1)
+        _, html = self.requisitar("GET", "/emprestimos?status=RETURNED")
+        self.assertEqual(html.count("<tr>"), 1)
+        self.assertIn("DEVOLVIDO", html)
+
+    def test_listagem_vazia(self):
+        _, html = self.requisitar("GET", "/emprestimos")
+        self.assertIn("Nenhum empréstimo registrado", html)
+
+    def test_formulario_lista_uma_pagina_de_livros_disponiveis(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        with unittest.mock.patch.object(view, "LIVROS_POR_PAGINA", 2):
+            _, html = self.requisitar("GET", "/emprestimos/novo")
+            self.assertIn("2 - Livro 2", html)
+            self.assertNotIn("1 - Livro 1", html)
+            self.assertNotIn("4 - Livro 4", html)
+            self.assertIn("Pagina 1 de 3 (6 livros disponíveis)", html)
+            self.assertIn('href="/emprestimos/novo?pagina=2', html)
+
+            _, html = self.requisitar("GET", "/emprestimos/novo?q=livro+5")
+            self.assertIn("5 - Livro 5", html)
+            self.assertNotIn("2 - Livro 2", html)
+            self.assertIn('value="livro 5"', html)
+
+
+
+class TestPaginasVersionadas(ServidorDeTeste):
+    def test_etag_e_304_enquanto_dados_nao_mudam(self):
+        resposta, html = self.requisitar("GET", "/emprestimos")
+        etag = resposta.getheader("ETag")
+        self.assertTrue(etag)
+
+        resposta, corpo = self.requisitar("GET", "/emprestimos", headers={"If-None-Match": etag})
+        self.assertEqual(resposta.status, 304)
+        self.assertEqual(corpo, "")
+
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        resposta, html = self.requisitar("GET", "/emprestimos", headers={"If-None-Match": etag})
+        self.assertEqual(resposta.status, 200)
+        self.assertNotEqual(resposta.getheader("ETag"), etag)
+        self.assertEqual(html.count("<tr>"), 1)
+
+    def test_pagina_reaproveitada_do_cache(self):
+        self.requisitar("GET", "/emprestimos?status=ACTIVE")
+        with unittest.mock.patch.object(view.controller, "listar_emprestimos") as listar:
+            resposta, html = self.requisitar("GET", "/emprestimos?status=ACTIVE")
+        listar.assert_not_called()
+        self.assertEqual(resposta.status, 200)
+        self.assertIn("Nenhum empréstimo registrado", html)
+
+
+class TestRespostasComprimidas(ServidorDeTeste):
+    def requisitar_bytes(self, caminho, headers):
+        conexao = http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+        conexao.request("GET", caminho, headers=headers)
+        resposta = conexao.getresponse()
+        dados = resposta.read()
+        conexao.close()
+        return resposta, dados
+
+    def test_pagina_em_partes_comprimida(self):
+        for book_id in range(1, 6):
+            modulo_emprestimo.adicionar_emprestimo(1, book_id)
+        resposta, dados = self.requisitar_bytes("/emprestimos", {"Accept-Encoding": "gzip"})
+        self.assertEqual(resposta.getheader("Content-Encoding"), "gzip")
+        html = gzip.decompress(dados).decode("utf-8")
+        self.assertEqual(html.count("<tr>"), 5)
+        self.assertTrue(html.rstrip().endswith("</html>"))
+
+        # Segunda resposta vem do cache, com o mesmo corpo comprimido
+        _, dados_cache = self.requisitar_bytes("/emprestimos", {"Accept-Encoding": "gzip"})
+        self.assertEqual(dados_cache, dados)
+
+    def test_etag_por_codificacao(self):
+        resposta_gzip, _ = self.requisitar_bytes("/emprestimos", {"Accept-Encoding": "gzip"})
+        resposta, dados = self.requisitar_bytes("/emprestimos", {"Accept-Encoding": "identity"})
+        self.assertIsNone(resposta.getheader("Content-Encoding"))
+        self.assertIn(b"</html>", dados)
+        self.assertNotEqual(resposta.getheader("ETag"), resposta_gzip.getheader("ETag"))
+
+    def test_resposta_pequena_sem_compressao(self):
+        resposta, dados = self.requisitar_bytes("/api/estatisticas", {"Accept-Encoding": "gzip"})
+        self.assertIsNone(resposta.getheader("Content-Encoding"))
+        self.assertEqual(json.loads(dados)["total"], 0)
+
+
+class TestConexoesPersistentes(ServidorDeTeste):
+    opcoes_servidor = {"workers": 1, "tempo_ocioso": 5, "max_requisicoes": 3}
+
+    def conectar(self):
+        return http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+
+    def test_varias_requisicoes_na_mesma_conexao(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        conexao = self.conectar()
+        conexao.request("GET", "/emprestimos")
+        resposta = conexao.getresponse()
+        self.assertEqual(resposta.version, 11)
+        self.assertIn("</html>", resposta.read().decode("utf-8"))
+        socket_inicial = conexao.sock
+
+        conexao.request("POST", "/api/devolucoes", body=json.dumps({"loanId": 1}))
+        resposta = conexao.getresponse()
+        self.assertEqual(json.loads(resposta.read())["loan"]["status"], "RETURNED")
+        self.assertIs(conexao.sock, socket_inicial)
+        conexao.close()
+
+    def test_fecha_apos_max_requisicoes(self):
+        conexao = self.conectar()
+        for _ in range(2):
+            conexao.request("GET", "/api/estatisticas")
+            resposta = conexao.getresponse()
+            resposta.read()
+            self.assertIsNone(resposta.getheader("Connection"))
+        conexao.request("GET", "/api/estatisticas")
+        resposta = conexao.getresponse()
+        resposta.read()
+        self.assertEqual(resposta.getheader("Connection"), "close")
+        conexao.close()
+
+    def test_conexao_ociosa_cede_thread_para_fila(self):
+        ociosa = self.conectar()
+        ociosa.request("GET", "/api/estatisticas")
+        ociosa.getresponse().read()
+
+        # Com um único worker preso na conexão ociosa, a nova só é atendida
+        # porque a ociosa é fechada ao perceber a fila
+        inicio = time.monotonic()
+        resposta, _ = self.requisitar("GET", "/api/estatisticas")
+        self.assertEqual(resposta.status, 200)
+        self.assertLess(time.monotonic() - inicio, 2)
+        ociosa.close()
+
+
+class TestLimiteCorpo(ServidorDeTeste):
+    def test_corpo_acima_do_limite_recusado_sem_ler(self):
+        # Só o Content-Length é grande: o servidor responde sem esperar o corpo
+        resposta, _ = self.requisitar("POST", "/api/devolucoes", b"{}",
+                                      {"Content-Length": str(servidor.LIMITE_CORPO + 1)})
+        self.assertEqual(resposta.status, 413)
+        self.assertEqual(resposta.getheader("Connection"), "close")
+
+        resposta, _ = self.requisitar("POST", "/api/devolucoes", b"{}", {"Content-Length": "abc"})
+        self.assertEqual(resposta.status, 400)
+        resposta, _ = self.requisitar("GET", "/api/estatisticas")
+        self.assertEqual(resposta.status, 200)
+
+
+class TestMetricasHttp(ServidorDeTeste):
+    def setUp(self):
+        super().setUp()
+        metricas.registro.limpar()
+
+    def test_endpoint_metrics(self):
+        self.requisitar("GET", "/emprestimos")
+        self.requisitar("GET", "/emprestimos/devolver/abc")
+        self.requisitar("POST", "/api/emprestimos", json.dumps({"userId": 1, "bookId": 1}).encode("utf-8"))
+        self.requisitar("POST", "/api/devolucoes", json.dumps({"loanId": 1}).encode("utf-8"))
+        resposta, texto = self.requisitar("GET", "/metrics")
+        self.assertEqual(resposta.status, 200)
+        self.assertTrue(resposta.getheader("Content-Type").startswith("text/plain; version=0.0.4"))
+        linhas = texto.splitlines()
+        self.assertIn('biblioteca_requisicoes_total{rota="/emprestimos",metodo="GET",status="200"} 1', linhas)
+        self.assertIn('biblioteca_erros_total{rota="/emprestimos/devolver/<int:loan_id>",metodo="GET",status="400"} 1',
+                      linhas)
+        # Rotas da API aparecem pelo padrao interno, nao pelo prefixo /api/
+        self.assertIn('biblioteca_requisicoes_total{rota="/api/emprestimos",metodo="POST",status="201"} 1', linhas)
+        self.assertIn('biblioteca_requisicao_duracao_segundos_count{rota="/emprestimos",metodo="GET"} 1', linhas)
+        self.assertIn("biblioteca_emprestimos_criados_total 1", linhas)
+        self.assertIn("biblioteca_devolucoes_processadas_total 1", linhas)
+        self.assertIn("biblioteca_emprestimos 1", linhas)
+        self.assertIn("biblioteca_livros_catalogo 7", linhas)
+
+
+class TestPerfilHttp(ServidorDeTeste):
+    def tearDown(self):
+        perfil.perfilador.desativar()
+        perfil.perfilador.limpar()
+        super().tearDown()
+
+    def test_amostra_pedida_pelo_cabecalho(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        resposta, _ = self.requisitar("POST", "/perfil/ativar", b"taxa=0",
+                                      {"Content-Type": "application/x-www-form-urlencoded"})
+        self.assertEqual(resposta.status, 200)
+        self.requisitar("GET", "/emprestimos")
+        self.assertEqual(perfil.perfilador.amostras, 0)
+        # Outra URL: a anterior ja esta no cache de paginas
+        self.requisitar("GET", "/emprestimos?status=ACTIVE", headers={"X-Perfil": "1"})
+        # A amostra e agregada depois que a resposta ja foi enviada
+        limite = time.monotonic() + 2
+        while perfil.perfilador.amostras == 0 and time.monotonic() < limite:
+            time.sleep(0.01)
+
+        _, pilhas = self.requisitar("GET", "/perfil/pilhas")
+        self.assertIn("GET /emprestimos;BibliotecaView.render_emprestimos;Controller.listar_emprestimos ", pilhas)
+        _, resumo = self.requisitar("GET", "/perfil")
+        self.assertIn("BibliotecaView.render_emprestimos", resumo)
+
+        self.requisitar("POST", "/perfil/desativar", b"")
+        self.assertFalse(perfil.perfilador.ativo)
+        resposta, _ = self.requisitar("POST", "/perfil/ativar", b"taxa=abc")
+        self.assertEqual(resposta.status, 400)
+        resposta, _ = self.requisitar("POST", "/perfil/ativar", b"taxa=0.1&taxa=0.2")
+        self.assertEqual(resposta.status, 400)
+        self.assertFalse(perfil.perfilador.ativo)
+
+
+class TestApi(ServidorDeTeste):
+    def requisitar_json(self, metodo, caminho, dados=None, headers=None):
+        corpo = json.dumps(dados).encode("utf-8") if dados is not None else None
+        resposta, texto = self.requisitar(metodo, caminho, corpo, headers)
+        return resposta, (json.loads(texto) if texto else None)
+
+    def test_emprestimo_e_devolucao(self):
+        resposta, dados = self.requisitar_json("POST", "/api/emprestimos", {"userId": 1, "bookId": 2})
+        self.assertEqual(resposta.status, 201)
+        loan_id = dados["loan"]["loanId"]
+
+        resposta, dados = self.requisitar_json("POST", "/api/emprestimos", {"userId": 1, "bookId": 2})
+        self.assertEqual(resposta.status, 409)
+        self.assertEqual(dados["erro"], "Livro indisponível")
+
+        resposta, dados = self.requisitar_json("GET", "/api/livros/2")
+        self.assertEqual(dados["status"], "emprestado")
+
+        resposta, dados = self.requisitar_json("POST", "/api/devolucoes", {"loanId": loan_id})
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(dados["loan"]["status"], "RETURNED")
+
+    def test_lotes(self):
+        resposta, dados = self.requisitar_json(
+            "POST", "/api/emprestimos", [{"userId": 1, "bookId": 1}, {"userId": 2, "bookId": 1}])
+        self.assertEqual([r["sucesso"] for r in dados["resultados"]], [True, False])
+        resposta, dados = self.requisitar_json("POST", "/api/devolucoes", {"loanIds": [1, 99]})
+        self.assertEqual([r["sucesso"] for r in dados["resultados"]], [True, False])
+
+    def test_listagem_e_get_condicional(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 1)
+        resposta, dados = self.requisitar_json("GET", "/api/emprestimos?status=ACTIVE&limite=10")
+        self.assertEqual(dados["total"], 1)
+        etag = resposta.getheader("ETag")
+        self.assertTrue(etag)
+
+        resposta, dados = self.requisitar_json("GET", "/api/emprestimos?status=ACTIVE&limite=10",
+                                               headers={"If-None-Match": etag})
+        self.assertEqual(resposta.status, 304)
+        self.assertIsNone(dados)
+
+    def test_erros(self):
+        resposta, dados = self.requisitar_json("GET", "/api/emprestimos/abc")
+        self.assertEqual(resposta.status, 400)
+        resposta, _ = self.requisitar_json("GET", "/api/emprestimos/42")
+        self.assertEqual(resposta.status, 404)
+        resposta, _ = self.requisitar("POST", "/api/emprestimos", b"{nao e json")
+        self.assertEqual(resposta.status, 400)
+        resposta, _ = self.requisitar("DELETE", "/api/estatisticas")
+        self.assertEqual(resposta.status, 501)
+        resposta, _ = self.requisitar_json("POST", "/api/estatisticas", {})
+        self.assertEqual(resposta.status, 405)
+        self.assertEqual(resposta.getheader("Allow"), "GET")
+
+    def test_busca_de_livros(self):
+        mock_catalogo.adicionar_livro(8, "Programação Concorrente", "Andrews")
+        resposta, dados = self.requisitar_json("GET", "/api/livros?q=programacao%20conc")
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual([l["bookId"] for l in dados["livros"]], [8])
+        resposta, dados = self.requisitar_json("GET", "/api/livros?q=livro&limite=3")
+        self.assertEqual(len(dados["livros"]), 3)
+        resposta, dados = self.requisitar_json("GET", "/api/livros")
+        self.assertEqual(resposta.status, 400)
+
+    def test_livros_disponiveis(self):
+        modulo_emprestimo.adicionar_emprestimo(1, 2)
+        resposta, dados = self.requisitar_json("GET", "/api/livros/disponiveis?limite=4")
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(dados["total"], 6)
+        self.assertEqual([l["bookId"] for l in dados["livros"]], [1, 3, 4, 5])
+        resposta, dados = self.requisitar_json("GET", "/api/livros/disponiveis?q=livro%202")
+        self.assertEqual(dados, {"livros": [], "total": 0})
+        resposta, dados = self.requisitar_json("GET", "/api/livros/disponiveis?q=livro%207")
+        self.assertEqual([l["bookId"] for l in dados["livros"]], [7])
+
+    def test_exportacao_em_fluxo(self):
+        ids = [r["loan"]["loanId"] for r in modulo_emprestimo.registrar_emprestimos([(1, 1), (1, 2), (1, 3)])]
+        modulo_emprestimo.registrar_devolucao(ids[0])
+        hoje = modulo_emprestimo.emprestimos[0].get_loan_date().date().isoformat()
+
+        resposta, texto = self.requisitar("GET", f"/api/emprestimos/exportar?formato=jsonl&status=ACTIVE&de={hoje}")
+        self.assertEqual(resposta.status, 200)
+        self.assertEqual(resposta.getheader("Transfer-Encoding"), "chunked")
+        self.assertEqual(resposta.getheader("Content-Type"), "application/x-ndjson")
+        self.assertEqual([json.loads(linha)["loanId"] for linha in texto.splitlines()], ids[1:])
+
+        conexao = http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+        conexao.request("GET", f"/api/emprestimos/exportar?ate={hoje}", headers={"Accept-Encoding": "gzip"})
+        resposta = conexao.getresponse()
+        csv = gzip.decompress(resposta.read()).decode("utf-8")
+        conexao.close()
+        self.assertIn('filename="emprestimos.csv"', resposta.getheader("Content-Disposition"))
+        self.assertEqual(csv.splitlines()[0], "loanId,userId,bookId,loanDate,dueDate,returnDate,status,fine")
+        self.assertEqual(len(csv.splitlines()), 4)
+
+        for query in ("formato=xml", "status=PERDIDO", "de=ontem", "de=2024-02-01&ate=2024-01-01"):
+            resposta, _ = self.requisitar_json("GET", "/api/emprestimos/exportar?" + query)
+            self.assertEqual(resposta.status, 400)
+
+    def test_atrasados_e_vencimentos(self):
+        loan = modulo_emprestimo.adicionar_emprestimo(1, 1)["loan"]
+        vencimento = datetime.fromisoformat(loan["dueDate"])
+
+        resposta, dados = self.requisitar_json("GET", "/api/emprestimos/vencimentos?k=3")
+        self.assertEqual([e["loanId"] for e in dados["emprestimos"]], [loan["loanId"]])
+        resposta, dados = self.requisitar_json("GET", "/api/emprestimos/atrasados")
+        self.assertEqual(dados, {"emprestimos": [], "total": 0})
+        self.assertIsNone(resposta.getheader("ETag"))
+
+        em = (vencimento + timedelta(days=2)).isoformat()
+        resposta, dados = self.requisitar_json("GET", f"/api/emprestimos/atrasados?em={em}")
+        self.assertEqual(dados["total"], 1)
+        self.assertEqual((dados["emprestimos"][0]["diasAtraso"], dados["emprestimos"][0]["fine"]), (2, 2.0))
+        resposta, _ = self.requisitar_json("GET", "/api/emprestimos/atrasados?em=ontem")
+        self.assertEqual(resposta.status, 400)
+
+        resposta, dados = self.requisitar_json("POST", "/api/multas")
+        self.assertEqual(dados, {"atrasados": 0, "atualizados": 0})
+
+
+
+class TestListagemAssincrona(ServidorAssincronoDeTeste, TestListagemEmprestimos):
+    pass
+
+
+class TestRespostasComprimidasAssincronas(ServidorAssincronoDeTeste, TestRespostasComprimidas):
+    pass
+
+
+class TestApiAssincrona(ServidorAssincronoDeTeste, TestApi):
+    pass
+
+
+class TestLimiteCorpoAssincrono(ServidorAssincronoDeTeste, TestLimiteCorpo):
+    pass
+
+
+class TestEncerramentoAssincrono(ServidorAssincronoDeTeste):
+    def test_encerramento_espera_requisicao_em_andamento(self):
+        ociosa = http.client.HTTPConnection("localhost", self.httpd.server_address[1], timeout=5)
+        ociosa.request("GET", "/api/estatisticas")
+        ociosa.getresponse().read()
+
+        original = view.controller.get_estatisticas
+        def lenta():
+            time.sleep(0.3)
+            return original()
+        resultado = {}
+        with unittest.mock.patch.object(view.controller, "get_estatisticas", lenta):
+            cliente = threading.Thread(target=lambda: resultado.update(resposta=self.requisitar("GET", "/emprestimos")))
+            cliente.start()
+            time.sleep(0.1)
+            asyncio.run_coroutine_threadsafe(self.httpd.encerrar(), self.loop).result(5)
+            cliente.join()
+
+        resposta, html = resultado["resposta"]
+        self.assertEqual(resposta.status, 200)
+        self.assertIn("</html>", html)
+        with self.assertRaises(OSError):
+            ociosa.request("GET", "/api/estatisticas")
+            ociosa.getresponse()
+        with self.assertRaises(OSError):
+            self.requisitar("GET", "/api/estatisticas")
+
+
+if __name__ == '__main__':
+    unittest.main()